@@ -1,5 +1,7 @@
 import os
 import json
+import hashlib
+import math
 import logging
 from pathlib import Path
 from collections import Counter
@@ -7,82 +9,836 @@ import re
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.cluster import KMeans
 import numpy as np
+import pandas as pd
+from services.metrics import timed, record_corpus_size, current_timings
+from services.pipeline import Node
+from utils.corpus import find_topic_files, read_corpus_file, read_corpus_header, read_corpus_summary, CorpusEntries
+from utils.corpus_stats import CorpusStatsStore, SEGMENT_DIMENSIONS, corpus_frame, segment_column
+from utils.job_classifier import KeywordClassifier
+from utils.statement_store import StatementStore
 
 logger = logging.getLogger(__name__)
 
+# Job lists returned by an analysis, one per job type
+JOB_LIST_FIELDS = ["functional_jobs", "social_jobs", "emotional_jobs"]
+
+# Optional sections of an analysis; "topic" and "analysis_type" are always included
+ANALYSIS_FIELDS = ["themes", *JOB_LIST_FIELDS, "sources", "data_points", "reliability", "coverage"]
+
+# Job types, in the order of the coverage matrix's last axis
+JOB_TYPES = ["functional", "social", "emotional"]
+
+# Number of points reported on a saturation curve
+SATURATION_CURVE_POINTS = 20
+
+# New unique jobs per entry, over the last quarter of the entries, below which
+# a corpus counts as saturated
+SATURATION_RATE = 0.1
+
+# Keywords marking each job type in a statement or its context (in a real
+# system this would use NLP); statements matching none are functional
+JOB_TYPE_INDICATORS = {
+    # Related to practical tasks and outcomes
+    "functional": [
+        "need to", "have to", "want to", "trying to", "easier", "faster",
+        "efficient", "help me", "allows me", "lets me", "enables me",
+        "accomplish", "complete", "finish", "get done", "achieve"
+    ],
+    # Related to how others perceive the user
+    "social": [
+        "others think", "people see", "impression", "look good",
+        "respected", "admired", "recognized", "status", "reputation",
+        "colleagues", "friends", "family", "peers", "society",
+        "community", "belong", "fit in", "stand out"
+    ],
+    # Related to how the user feels
+    "emotional": [
+        "feel", "feeling", "happy", "satisfied", "frustrated", "anxious",
+        "worry", "stress", "peace of mind", "confidence", "trust",
+        "comfortable", "uncomfortable", "enjoy", "love", "hate",
+        "fear", "excited", "bored", "overwhelmed"
+    ],
+}
+
+# Words dropped when normalizing statements for comparison (a simplified list)
+STOP_WORDS = {
+    'i', 'me', 'my', 'myself', 'we', 'our', 'ours', 'ourselves', 'you', 'your',
+    'yours', 'yourself', 'yourselves', 'he', 'him', 'his', 'himself', 'she',
+    'her', 'hers', 'herself', 'it', 'its', 'itself', 'they', 'them', 'their',
+    'theirs', 'themselves', 'what', 'which', 'who', 'whom', 'this', 'that',
+    'these', 'those', 'am', 'is', 'are', 'was', 'were', 'be', 'been', 'being',
+    'have', 'has', 'had', 'having', 'do', 'does', 'did', 'doing', 'a', 'an',
+    'the', 'and', 'but', 'if', 'or', 'because', 'as', 'until', 'while', 'of',
+    'at', 'by', 'for', 'with', 'about', 'against', 'between', 'into', 'through',
+    'during', 'before', 'after', 'above', 'below', 'to', 'from', 'up', 'down',
+    'in', 'out', 'on', 'off', 'over', 'under', 'again', 'further', 'then',
+    'once', 'here', 'there', 'when', 'where', 'why', 'how', 'all', 'any',
+    'both', 'each', 'few', 'more', 'most', 'other', 'some', 'such', 'no',
+    'nor', 'not', 'only', 'own', 'same', 'so', 'than', 'too', 'very'
+}
+
+# Version of the statement rules above; stored statement analyses are kept per version
+STATEMENT_RULES_VERSION = hashlib.sha1(
+    json.dumps([JOB_TYPE_INDICATORS, sorted(STOP_WORDS)]).encode("utf-8")
+).hexdigest()[:12]
+
+# Estimated peak memory per research entry for an in-memory analysis,
+# measured with tracemalloc on generated corpora (about 1.1 KB) plus headroom
+ENTRY_MEMORY_BYTES = 1500
+
+# Smallest on-disk size of a research entry in a .json file (generated corpora
+# average about 290 bytes), used to estimate entry counts without parsing
+JSON_ENTRY_FILE_BYTES = 250
+
+# Entries clustered in approximate mode; the rest are assigned to the nearest theme
+APPROXIMATE_SAMPLE_SIZE = 2000
+
+# z-score of the confidence intervals reported for approximate frequencies (95%)
+CONFIDENCE_Z = 1.96
+
+# What to do when an analysis is estimated to exceed the memory budget
+MEMORY_BUDGET_ACTIONS = ("downgrade", "reject")
+
+
+class MemoryBudgetExceeded(RuntimeError):
+    """Raised when an analysis would exceed the memory budget and downgrading is disabled."""
+
+def resolve_fields(fields):
+    """
+    Validate the requested analysis sections.
+    
+    Args:
+        fields (iterable, optional): Requested sections, or None for all
+        
+    Returns:
+        set: The sections to build
+        
+    Raises:
+        ValueError: If an unknown section is requested
+    """
+    if fields is None:
+        return set(ANALYSIS_FIELDS)
+    
+    fields = set(fields)
+    unknown = fields - set(ANALYSIS_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown analysis fields: {', '.join(sorted(unknown))}")
+    
+    return fields
+
 class JTBDAgent:
     """
     The JTBD Agent analyzes research data to identify Jobs to Be Done
     and clusters them into themes.
     """
     
-    def __init__(self):
-        """Initialize the JTBD Agent."""
-        self.data_directory = Path("data")
+    def __init__(self, data_directory="data", memory_budget=None, memory_budget_action="downgrade",
+                 corpus_stats=None, embeddings=None, statement_store=None, job_classifier=None):
+        """
+        Initialize the JTBD Agent.
+        
+        Args:
+            data_directory (str): Directory holding the research data files
+            memory_budget (int, optional): Estimated peak bytes an analysis may use;
+                unlimited when omitted
+            memory_budget_action (str): "downgrade" to stream the corpus from disk
+                (JSON Lines files only) or "reject" to raise MemoryBudgetExceeded
+                when over budget
+            corpus_stats (CorpusStatsStore, optional): Shared corpus statistics;
+                a store for `data_directory` is created when omitted
+            embeddings (EmbeddingCache, optional): Embeds statements for
+                clustering; TF-IDF is used when omitted
+            statement_store (StatementStore, optional): Shared store of
+                normalized and classified statements; a store for
+                `data_directory` is created when omitted
+            job_classifier (TrainedClassifier, optional): Classifies statements
+                into job types; the keyword rules are used when omitted
+        """
+        if memory_budget_action not in MEMORY_BUDGET_ACTIONS:
+            raise ValueError(f"Unknown memory budget action: {memory_budget_action}")
+        
+        self.data_directory = Path(data_directory)
+        self.memory_budget = memory_budget
+        self.memory_budget_action = memory_budget_action
+        self.corpus_stats = corpus_stats or CorpusStatsStore(data_directory)
+        self.embeddings = embeddings
+        self.job_classifier = job_classifier or KeywordClassifier(JOB_TYPE_INDICATORS)
+        self.statement_store = statement_store or StatementStore(
+            data_directory, f"{STATEMENT_RULES_VERSION}-{self.job_classifier.name}"
+        )
+    
+    def pipeline_nodes(self):
+        """
+        Pipeline nodes provided by the agent (see services.pipeline).
+        
+        "research_data" loads the corpus of the "topic" parameter,
+        "extraction" extracts and combines its jobs (from a sample when the
+        "approximate" parameter is set), "themes" clusters and ranks them,
+        and "coverage" and "segments" build on those. "analysis" assembles
+        the sections requested by the "analysis_fields" parameter for a
+        full or partial ("full_analysis") analysis, depending only on the
+        nodes those sections need. Extraction, themes and coverage are
+        memoized, so e.g. segments reuse the jobs and themes of an analysis.
+        
+        Returns:
+            list: Node instances
+        """
+        return [
+            Node("research_data", self._load_topic_data, params=("topic",)),
+            Node("corpus_stats", self.corpus_stats.get, params=("topic",)),
+            Node("extraction", self._extract, inputs=("research_data",), params=("approximate",), memoize=True),
+            Node("clusters", self._cluster_extraction, inputs=("extraction",)),
+            Node("themes", lambda clusters: self._rank_themes(clusters), inputs=("clusters",), memoize=True),
+            Node("coverage", self._assess_extraction_coverage, inputs=("research_data", "extraction", "themes"),
+                 memoize=True),
+            Node("segments", self._segment_analysis, inputs=("research_data", "extraction", "themes"),
+                 params=("topic",)),
+            Node("analysis", self._assemble_analysis, inputs=self._analysis_inputs,
+                 params=("topic", "full_analysis", "analysis_fields")),
+        ]
+    
+    def _analysis_inputs(self, params):
+        """Names of the nodes an analysis with the given run parameters depends on."""
+        fields = resolve_fields(params["analysis_fields"])
+        build_coverage = not params["full_analysis"] and "coverage" in fields
+        
+        inputs = ["corpus_stats"]
+        if "themes" in fields or build_coverage or any(field in fields for field in JOB_LIST_FIELDS):
+            inputs.append("extraction")
+        if "themes" in fields or build_coverage:
+            inputs.append("themes")
+        if build_coverage:
+            inputs.append("coverage")
+        return inputs
     
-    def analyze(self, topic, full_analysis=True):
+    def node_stage_name(self, name, fields=None):
         """
-        Analyze the data for a given topic to identify JTBD insights.
+        Stage an agent pipeline node is streamed as, given the sections being built.
+        
+        "extraction" is the "jobs" stage when job lists are requested and
+        "themes" the "themes" stage when themes are.
         
         Args:
-            topic (str): The topic to analyze
-            full_analysis (bool): Whether to perform a full analysis
+            name (str): The node name
+            fields (iterable, optional): Analysis sections being built
             
         Returns:
-            dict: JTBD analysis results
+            str: The stage name, or None if the node is not a stage
         """
-        # Load data for the topic
-        research_data = self._load_research_data(topic)
+        fields = resolve_fields(fields)
         
-        if not research_data:
-            logger.warning(f"No research data found for topic: {topic}")
-            return {"error": "No research data found for the specified topic"}
+        if name == "extraction" and any(field in fields for field in JOB_LIST_FIELDS):
+            return "jobs"
+        if name == "themes" and "themes" in fields:
+            return "themes"
+        return None
+    
+    def node_stage(self, name, output, fields=None):
+        """
+        Staged result of one of the agent's pipeline node outputs.
         
-        # Step 1: Extract jobs from research data
-        jobs = self._extract_jobs(research_data)
+        Outputs without jobs or themes (e.g. of a topic without data) are
+        not stages, see node_stage_name for the rest.
         
-        # Step 2: Cluster jobs into themes
-        themes = self._cluster_into_themes(jobs)
+        Args:
+            name (str): The node name
+            output: The node's output
+            fields (iterable, optional): Analysis sections being built
+            
+        Returns:
+            tuple: (stage name, stage payload), or None if the output is not
+                a stage for these fields
+        """
+        stage = self.node_stage_name(name, fields)
+        
+        if stage == "jobs" and output["jobs"]:
+            return stage, self._jobs_by_type(output, resolve_fields(fields))
+        if stage == "themes" and output:
+            return stage, {"themes": output}
+        return None
+    
+    def _assemble_analysis(self, topic, full_analysis, analysis_fields, corpus_stats, extraction=None, themes=None,
+                           coverage=None):
+        """
+        Assemble an analysis from the outputs of its stages.
+        
+        Args:
+            topic (str): The analyzed topic
+            full_analysis (bool): Whether this is a full analysis
+            analysis_fields (iterable, optional): Sections to include, or None for all
+            corpus_stats (dict): Statistics of the topic's corpus, or None without data
+            extraction (dict, optional): Result of _extract
+            themes (list, optional): Ranked themes
+            coverage (dict, optional): Result of _assess_coverage
+            
+        Returns:
+            dict: JTBD analysis results
+        """
+        if corpus_stats is None:
+            logger.warning(f"No research data found for topic: {topic}")
+            return {"error": "No research data found for the specified topic"}
         
-        # Step 3: Rank themes
-        ranked_themes = self._rank_themes(themes)
+        fields = resolve_fields(analysis_fields)
+        sampling = extraction["sampling"] if extraction else None
         
-        # Step 4: Summarize results
         result = {
             "topic": topic,
             "analysis_type": "full" if full_analysis else "partial",
-            "themes": ranked_themes,
-            "functional_jobs": self._filter_jobs_by_type(jobs, "functional"),
-            "social_jobs": self._filter_jobs_by_type(jobs, "social"),
-            "emotional_jobs": self._filter_jobs_by_type(jobs, "emotional"),
-            "sources": research_data.get("sources", []),
-            "data_points": len(research_data.get("research_data", [])),
         }
         
+        if "themes" in fields:
+            result["themes"] = themes
+        if extraction:
+            result.update(self._jobs_by_type(extraction, fields))
+        if "sources" in fields:
+            result["sources"] = corpus_stats["sources"]
+        if "data_points" in fields:
+            result["data_points"] = corpus_stats["entries"]
+        
         # Add reliability assessment if it's not a full analysis
-        if not full_analysis:
-            result["reliability"] = self._assess_reliability(research_data)
+        if not full_analysis and "reliability" in fields:
+            result["reliability"] = self._assess_reliability(
+                {}, sampling["fraction"] if sampling else None, corpus_stats
+            )
+        
+        if coverage is not None:
+            result["coverage"] = coverage
+        
+        if sampling:
+            result["approximation"] = {
+                "method": "stratified sample by source and job type",
+                "sample_size": sampling["sample_size"],
+                "population_size": sampling["population_size"],
+                "sampling_fraction": round(sampling["fraction"], 4),
+                "strata": sampling["strata"],
+                "confidence_level": 0.95
+            }
         
         return result
     
-    def _load_research_data(self, topic):
+    def _load_topic_data(self, topic):
+        """Load a topic's research data, streaming it from disk if it won't fit the memory budget."""
+        return self._load_research_data(topic, stream=self._exceeds_memory_budget(topic))
+    
+    def _extract(self, research_data, approximate=False):
+        """
+        Extract jobs from research data, or from a stratified sample of it.
+        
+        In approximate mode jobs are extracted from a sample stratified by
+        source and job type, and their frequencies are scaled up with
+        confidence intervals; clustering then assigns the remaining entries
+        to their nearest theme so theme totals cover the whole corpus.
+        
+        Args:
+            research_data (dict): The research data
+            approximate (bool): Extract from a sample and estimate frequencies
+            
+        Returns:
+            dict: "jobs" and "sampling" (the sample, or None when exact)
+        """
+        if not approximate:
+            return {"jobs": self._extract_jobs(research_data), "sampling": None}
+        
+        sampling = self._stratified_sample(research_data.get("research_data", []), APPROXIMATE_SAMPLE_SIZE)
+        jobs = self._extract_jobs({"research_data": sampling["entries"]})
+        self._estimate_frequencies(jobs, sampling)
+        return {"jobs": jobs, "sampling": sampling}
+    
+    def _cluster_extraction(self, extraction):
+        """Cluster the jobs of an extraction into (unranked) themes."""
+        return self._cluster_into_themes(extraction["jobs"], extraction["sampling"])
+    
+    def _assess_extraction_coverage(self, research_data, extraction, themes):
+        """Assess the coverage of the jobs of an extraction, see _assess_coverage."""
+        return self._assess_coverage(research_data, extraction["jobs"], themes)
+    
+    def _jobs_by_type(self, extraction, fields):
+        """The requested job lists of an extraction, each ranked by frequency."""
+        return {
+            field: self._filter_jobs_by_type(extraction["jobs"], field[:-len("_jobs")])
+            for field in JOB_LIST_FIELDS if field in fields
+        }
+    
+    @timed("sample")
+    def _stratified_sample(self, entries, sample_size):
+        """
+        Take a proportional sample of entries, stratified by source and job type.
+        
+        Entries are selected systematically within each stratum in a single
+        pass (so streamed corpora work too), and every stratum contributes
+        at least one entry. Statements of the entries left out are counted
+        for assignment to themes.
+        
+        Args:
+            entries (iterable): Research entries; must support len()
+            sample_size (int): Target number of sampled entries
+            
+        Returns:
+            dict: "entries" (the sample), "remaining" (Counter of unsampled
+                statements), "sample_size", "population_size", "fraction"
+                and "strata"
+        """
+        population_size = len(entries)
+        target_fraction = min(1.0, sample_size / population_size) if population_size else 1.0
+        
+        seen = Counter()
+        sample = []
+        remaining = Counter()
+        
+        for entry in entries:
+            stratum = (entry.get("source", "Unknown"), entry.get("job_type", "unknown"))
+            position = seen[stratum]
+            seen[stratum] += 1
+            
+            if position == 0 or int((position + 1) * target_fraction) > int(position * target_fraction):
+                sample.append(entry)
+            else:
+                remaining[entry.get("statement", "")] += 1
+        
+        return {
+            "entries": sample,
+            "remaining": remaining,
+            "sample_size": len(sample),
+            "population_size": population_size,
+            "fraction": len(sample) / population_size if population_size else 1.0,
+            "strata": len(seen)
+        }
+    
+    def _estimate_frequencies(self, jobs, sampling):
+        """
+        Scale sampled job frequencies to the whole corpus, with confidence intervals.
+        
+        Each job's frequency becomes its estimated corpus-wide count; the
+        observed count is kept as "sample_frequency" and "frequency_ci"
+        holds the 95% interval (normal approximation with finite
+        population correction).
+        
+        Args:
+            jobs (list): Jobs extracted from the sample
+            sampling (dict): Result of _stratified_sample
+        """
+        sample_size = sampling["sample_size"]
+        population_size = sampling["population_size"]
+        if not sample_size:
+            return
+        
+        correction = (population_size - sample_size) / (population_size - 1) if population_size > 1 else 0.0
+        
+        for job in jobs:
+            observed = job["frequency"]
+            proportion = min(1.0, observed / sample_size)
+            estimate = observed * population_size / sample_size
+            margin = CONFIDENCE_Z * population_size * math.sqrt(proportion * (1 - proportion) / sample_size * correction)
+            
+            job["sample_frequency"] = observed
+            job["frequency"] = round(estimate)
+            job["frequency_ci"] = [max(observed, math.floor(estimate - margin)), math.ceil(estimate + margin)]
+    
+    @timed("compare_topics")
+    def compare_topics(self, analyses):
+        """
+        Compare several topic analyses on a shared set of themes.
+        
+        TF-IDF and K-means are fitted once on the combined job statements of
+        all topics, so every topic is described in the same theme space.
+        
+        Args:
+            analyses (dict): Mapping of topic to its JTBD analysis
+            
+        Returns:
+            dict: Shared themes with per-topic job counts and frequency shares
+        """
+        # Collect each topic's unique jobs across the three job type lists
+        corpus = []
+        for topic, analysis in analyses.items():
+            seen_statements = set()
+            for job_type in ["functional", "social", "emotional"]:
+                for job in analysis.get(f"{job_type}_jobs", []):
+                    if job["statement"] not in seen_statements:
+                        seen_statements.add(job["statement"])
+                        corpus.append((topic, job))
+        
+        if len(analyses) < 2 or len(corpus) < 3:
+            return {"topics": list(analyses), "shared_themes": []}
+        
+        # Topic names appear in most statements and would otherwise split
+        # the clusters by topic instead of by job
+        statements = []
+        for topic, job in corpus:
+            statement = re.sub(re.escape(topic), " ", job["statement"], flags=re.IGNORECASE)
+            statements.append(statement)
+        
+        vectorizer = TfidfVectorizer(max_features=100, stop_words="english")
+        X = vectorizer.fit_transform(statements)
+        
+        n_clusters = min(8, len(statements) // 2)
+        n_clusters = max(2, n_clusters)
+        
+        kmeans = KMeans(n_clusters=n_clusters, random_state=42)
+        clusters = kmeans.fit_predict(X)
+        
+        feature_names = vectorizer.get_feature_names_out()
+        topic_totals = Counter()
+        for topic, job in corpus:
+            topic_totals[topic] += job["frequency"]
+        
+        shared_themes = []
+        for i in range(n_clusters):
+            members = [corpus[j] for j in range(len(corpus)) if clusters[j] == i]
+            if not members:
+                continue
+            
+            # Name the theme after the heaviest terms of its centroid
+            top_terms = kmeans.cluster_centers_[i].argsort()[::-1][:3]
+            theme_name = " ".join(feature_names[t] for t in top_terms).title()
+            
+            per_topic = {}
+            for topic, job in members:
+                entry = per_topic.setdefault(topic, {"job_count": 0, "total_frequency": 0, "examples": []})
+                entry["job_count"] += 1
+                entry["total_frequency"] += job["frequency"]
+                if len(entry["examples"]) < 3:
+                    entry["examples"].append(job["statement"])
+            
+            for topic, entry in per_topic.items():
+                entry["share"] = round(entry["total_frequency"] / topic_totals[topic], 3)
+            
+            shared_themes.append({
+                "name": theme_name,
+                "is_shared": len(per_topic) > 1,
+                "total_frequency": sum(entry["total_frequency"] for entry in per_topic.values()),
+                "topics": per_topic
+            })
+        
+        return {
+            "topics": list(analyses),
+            "shared_themes": self._rank_themes(shared_themes)
+        }
+    
+    @timed("analyze_segments")
+    def analyze_segments(self, topic, top_jobs=5):
+        """
+        Break theme and job frequencies down by demographic segment.
+        
+        Jobs are extracted and clustered once for the whole corpus. Each
+        entry is then mapped to its job and theme, and the counts of every
+        segment come from one group-by per dimension in SEGMENT_DIMENSIONS,
+        so segments never cluster on their own. Counts are entries, so the
+        theme shares of a segment add up to 1.
+        
+        Args:
+            topic (str): The topic to analyze
+            top_jobs (int): Number of most mentioned jobs listed per segment
+            
+        Returns:
+            dict: "topic", "entries", the corpus-wide "themes" (with the
+                "index" segments refer to them by) and, per dimension, a list
+                of segments with their entry counts, theme shares and top jobs
+        """
+        research_data = self._load_topic_data(topic)
+        extraction = self._extract(research_data) if research_data else None
+        themes = self._rank_themes(self._cluster_extraction(extraction)) if extraction else None
+        return self._segment_analysis(topic, research_data, extraction, themes, top_jobs)
+    
+    def _segment_analysis(self, topic, research_data, extraction, themes, top_jobs=5):
+        """
+        Aggregate segments from an exact extraction and its ranked themes, see analyze_segments.
+        
+        Args:
+            topic (str): The analyzed topic
+            research_data (dict): The topic's research data
+            extraction (dict): Result of _extract
+            themes (list): Ranked themes
+            top_jobs (int): Number of most mentioned jobs listed per segment
+            
+        Returns:
+            dict: The segment analysis
+        """
+        if not research_data:
+            logger.warning(f"No research data found for topic: {topic}")
+            return {"error": "No research data found for the specified topic"}
+        
+        jobs = extraction["jobs"]
+        
+        with timed("aggregate_segments"):
+            frame = self._entry_frame(research_data.get("research_data", []), jobs, themes)
+            segments = {
+                dimension: self._aggregate_segments(frame, dimension, themes, jobs, top_jobs)
+                for dimension in SEGMENT_DIMENSIONS
+            }
+        
+        return {
+            "topic": topic,
+            "entries": len(frame),
+            "themes": [
+                {
+                    "index": index,
+                    "name": theme["name"],
+                    "job_count": theme["job_count"],
+                    "total_frequency": theme["total_frequency"]
+                }
+                for index, theme in enumerate(themes)
+            ],
+            "segments": segments
+        }
+    
+    def _aggregate_segments(self, frame, dimension, themes, jobs, top_jobs):
+        """
+        Count the entries of each segment of one dimension by theme and job.
+        
+        Args:
+            frame (pandas.DataFrame): Entries with "job" and "theme" columns
+            dimension (str): One of SEGMENT_DIMENSIONS
+            themes (list): Ranked themes, indexed by the "theme" column
+            jobs (list): Extracted jobs
+            top_jobs (int): Number of jobs listed per segment
+            
+        Returns:
+            list: One summary per non-empty segment, largest first
+        """
+        column = segment_column(frame, dimension).rename("segment")
+        sizes = column.value_counts()
+        theme_counts = frame.groupby([column, "theme"], observed=True).size()
+        job_counts = (
+            frame.groupby([column, "job"], observed=True).size()
+            .sort_values(ascending=False, kind="stable")
+            .groupby(level=0, observed=True).head(top_jobs)
+        )
+        
+        jobs_by_id = {job["id"]: job for job in jobs}
+        summaries = {
+            segment: {"segment": str(segment), "entries": int(size), "share": round(size / len(frame), 3),
+                      "themes": [], "top_jobs": []}
+            for segment, size in sizes.items() if size
+        }
+        
+        for (segment, theme_index), count in theme_counts.items():
+            summary = summaries[segment]
+            summary["themes"].append({
+                "index": int(theme_index),
+                "name": themes[int(theme_index)]["name"],
+                "entries": int(count),
+                "share": round(count / summary["entries"], 3)
+            })
+        
+        for (segment, job_id), count in job_counts.items():
+            summary = summaries[segment]
+            job = jobs_by_id[job_id]
+            summary["top_jobs"].append({
+                "id": job_id,
+                "statement": job["statement"],
+                "type": job["type"],
+                "entries": int(count),
+                "share": round(count / summary["entries"], 3)
+            })
+        
+        for summary in summaries.values():
+            summary["themes"].sort(key=lambda theme: theme["entries"], reverse=True)
+        
+        return list(summaries.values())
+    
+    def _entry_frame(self, entries, jobs, themes):
+        """
+        Build a columnar view of entries linked to the analysis.
+        
+        Entries map to the job of their normalized statement, and jobs to
+        their theme. Entries whose statement has no job (e.g. unsampled
+        entries in approximate mode) have a missing job and theme.
+        
+        Args:
+            entries (iterable): Research entries
+            jobs (list): Extracted jobs
+            themes (list): Ranked themes
+            
+        Returns:
+            pandas.DataFrame: corpus_frame columns plus "normalized" (the
+                normalized statement), "job" (job id), "job_class" (the
+                job's classified type) and "theme" (index into `themes`)
+        """
+        frame = corpus_frame(entries, statements=True)
+        
+        # Each distinct statement is normalized once
+        frame["normalized"] = frame["statement"].map({
+            statement: self._normalize_statement(statement) for statement in frame["statement"].unique()
+        })
+        frame["job"] = frame["normalized"].map({self._normalize_statement(job["statement"]): job["id"] for job in jobs})
+        frame["job_class"] = frame["job"].map({job["id"]: job["type"] for job in jobs})
+        frame["theme"] = frame["job"].map({
+            job["id"]: index for index, theme in enumerate(themes) for job in theme["jobs"]
+        })
+        return frame
+    
+    @timed("assess_coverage")
+    def _assess_coverage(self, research_data, jobs, themes):
+        """
+        Measure how well the research covers themes, sources and job types.
+        
+        Entries are counted into a theme x source x job type matrix in one
+        vectorized pass, from which per-job-type and per-theme coverage is
+        derived. The saturation curve tracks unique jobs (normalized
+        statements) against entries read; a flat tail means more of the same
+        kind of research is unlikely to surface new jobs.
+        
+        Args:
+            research_data (dict): The research data
+            jobs (list): Extracted jobs
+            themes (list): Ranked themes
+            
+        Returns:
+            dict: "axes", "matrix" (entry counts indexed [theme][source][job
+                type]), "by_job_type", "by_theme" and "saturation"
+        """
+        frame = self._entry_frame(research_data.get("research_data", []), jobs, themes)
+        sources = sorted(frame["source"].unique())
+        
+        mapped = frame[frame["theme"].notna()]
+        matrix = np.zeros((len(themes), len(sources), len(JOB_TYPES)), dtype=np.int64)
+        np.add.at(matrix, (
+            mapped["theme"].to_numpy(dtype=np.int64),
+            pd.Categorical(mapped["source"], categories=sources).codes,
+            pd.Categorical(mapped["job_class"], categories=JOB_TYPES).codes
+        ), 1)
+        
+        distinct_jobs = Counter(job["type"] for job in jobs)
+        type_entries = matrix.sum(axis=(0, 1))
+        type_sources = (matrix.sum(axis=0) > 0).sum(axis=0)
+        theme_entries = matrix.sum(axis=(1, 2))
+        theme_sources = (matrix.sum(axis=2) > 0).sum(axis=1)
+        theme_job_types = (matrix.sum(axis=1) > 0).sum(axis=1)
+        
+        return {
+            "axes": {
+                "themes": [theme["name"] for theme in themes],
+                "sources": sources,
+                "job_types": JOB_TYPES
+            },
+            "matrix": matrix.tolist(),
+            "by_job_type": {
+                job_type: {
+                    "entries": int(type_entries[index]),
+                    "jobs": distinct_jobs[job_type],
+                    "sources": int(type_sources[index])
+                }
+                for index, job_type in enumerate(JOB_TYPES)
+            },
+            "by_theme": [
+                {
+                    "name": theme["name"],
+                    "entries": int(theme_entries[index]),
+                    "sources": int(theme_sources[index]),
+                    "job_types": int(theme_job_types[index])
+                }
+                for index, theme in enumerate(themes)
+            ],
+            "saturation": self._saturation(frame["normalized"])
+        }
+    
+    def _saturation(self, statements):
+        """
+        Compute the saturation curve of unique jobs against entries read.
+        
+        Args:
+            statements (pandas.Series): Normalized statements in corpus order
+            
+        Returns:
+            dict: "entries", "unique_jobs", "curve" ([entries, unique jobs]
+                points), "discovery_rate" (new jobs per entry over the last
+                quarter of the entries) and "saturated"
+        """
+        entries = len(statements)
+        if not entries:
+            return {"entries": 0, "unique_jobs": 0, "curve": [], "discovery_rate": 0.0, "saturated": False}
+        
+        unique_so_far = (~statements.duplicated()).to_numpy().cumsum()
+        points = np.unique(np.linspace(1, entries, min(entries, SATURATION_CURVE_POINTS)).astype(np.int64))
+        
+        window = max(1, entries // 4)
+        previous = unique_so_far[entries - window - 1] if entries > window else 0
+        discovery_rate = (unique_so_far[-1] - previous) / window
+        
+        return {
+            "entries": entries,
+            "unique_jobs": int(unique_so_far[-1]),
+            "curve": [[int(point), int(unique_so_far[point - 1])] for point in points],
+            "discovery_rate": round(float(discovery_rate), 4),
+            "saturated": bool(discovery_rate < SATURATION_RATE)
+        }
+    
+    def _exceeds_memory_budget(self, topic):
+        """
+        Check the estimated memory of analyzing a topic against the budget.
+        
+        Entry counts come from the header of JSON Lines files and are
+        estimated from the size of .json files, so no corpus is parsed.
+        Only JSON Lines files can be streamed; an over-budget topic with
+        .json files is rejected whatever the action.
+        
+        Args:
+            topic (str): The topic to be analyzed
+            
+        Returns:
+            bool: Whether the analysis should stream its corpus
+            
+        Raises:
+            MemoryBudgetExceeded: If over budget and the action is "reject",
+                or the topic has .json files
+        """
+        if not self.memory_budget:
+            return False
+        
+        data_files = find_topic_files(self.data_directory, topic)
+        json_files = [path for path in data_files if path.suffix != ".jsonl"]
+        entries = sum(read_corpus_summary(path)[1] for path in data_files if path.suffix == ".jsonl")
+        entries += sum(path.stat().st_size // JSON_ENTRY_FILE_BYTES for path in json_files)
+        estimate = entries * ENTRY_MEMORY_BYTES
+        if estimate <= self.memory_budget:
+            return False
+        
+        message = (
+            f"Analysis of '{topic}' ({'about ' if json_files else ''}{entries} entries) needs an estimated {estimate / 2 ** 20:.0f} MB, "
+            f"over the {self.memory_budget / 2 ** 20:.0f} MB memory budget"
+        )
+        if self.memory_budget_action == "reject":
+            raise MemoryBudgetExceeded(message)
+        if json_files:
+            raise MemoryBudgetExceeded(
+                f"{message}; only JSON Lines files can be streamed, convert "
+                f"{', '.join(path.name for path in json_files)} to .jsonl"
+            )
+        
+        logger.warning(f"{message}; streaming the corpus from disk")
+        timings = current_timings()
+        if timings is not None:
+            timings.notes["memory_mode"] = "streaming"
+        return True
+    
+    @timed("load_research_data")
+    def _load_research_data(self, topic, stream=False):
         """
         Load research data for the given topic.
         
         Args:
             topic (str): The topic to load data for
+            stream (bool): Read entries lazily from disk instead of loading them
             
         Returns:
             dict: The combined research data for the topic
         """
-        normalized_topic = topic.lower().replace(" ", "_")
-        
         # Look for matching data files
-        data_files = list(self.data_directory.glob(f"*{normalized_topic}*.json"))
+        data_files = find_topic_files(self.data_directory, topic)
         
         if not data_files:
             return {}
         
+        if stream:
+            sources = set()
+            for file_path in data_files:
+                sources.update(read_corpus_header(file_path)["sources"])
+            
+            entries = CorpusEntries(data_files)
+            record_corpus_size(len(entries))
+            return {"topic": topic, "sources": list(sources), "research_data": entries}
+        
         # Combine data from multiple files
         combined_data = {
             "topic": topic,
@@ -92,22 +848,24 @@ class JTBDAgent:
         
         for file_path in data_files:
             try:
-                with open(file_path, 'r') as file:
-                    data = json.load(file)
-                    
-                    # Add sources
-                    combined_data["sources"].extend(data.get("sources", []))
-                    
-                    # Add research data
-                    combined_data["research_data"].extend(data.get("research_data", []))
+                data = read_corpus_file(file_path)
+                
+                # Add sources
+                combined_data["sources"].extend(data.get("sources", []))
+                
+                # Add research data
+                combined_data["research_data"].extend(data.get("research_data", []))
             except Exception as e:
                 logger.error(f"Error reading data file {file_path}: {e}")
         
         # Remove duplicate sources
         combined_data["sources"] = list(set(combined_data["sources"]))
         
+        record_corpus_size(len(combined_data["research_data"]))
+        
         return combined_data
     
+    @timed("extract_jobs")
     def _extract_jobs(self, research_data):
         """
         Extract jobs from research data and categorize them.
@@ -118,38 +876,67 @@ class JTBDAgent:
         Returns:
             list: List of extracted and categorized jobs
         """
-        jobs = []
+        # Jobs are combined as they are extracted, so only distinct jobs are held
+        combined_jobs = self._combine_similar_jobs(self._iter_jobs(research_data))
         
-        for entry in research_data.get("research_data", []):
-            # Extract each statement/quote
-            statement = entry.get("statement", "")
-            source = entry.get("source", "Unknown")
-            context = entry.get("context", "")
-            
-            # Classify the job type (in a real system, this would use NLP)
-            job_types = self._classify_job_types(statement, context)
+        # Give each job a stable id so responses can reference it
+        for index, job in enumerate(combined_jobs):
+            job["id"] = f"job-{index}"
+        
+        return combined_jobs
+    
+    def _iter_jobs(self, research_data):
+        """
+        Yield one job per entry and identified job type.
+        
+        Statements are normalized and classified through the statement
+        store, so each distinct statement is analyzed once.
+        
+        Args:
+            research_data (dict): Research data containing interviews, surveys, etc.
             
+        Yields:
+            tuple: (normalized statement, an extracted job with a frequency of 1)
+        """
+        entries = research_data.get("research_data", [])
+        for entry, (normalized, job_types) in self.statement_store.resolve(entries, self._analyze_statements):
             # For each identified job type, create a job entry
             for job_type in job_types:
-                jobs.append({
-                    "statement": statement,
+                yield normalized, {
+                    "statement": entry.get("statement", ""),
                     "type": job_type,
-                    "source": source,
-                    "context": context,
+                    "source": entry.get("source", "Unknown"),
+                    "context": entry.get("context", ""),
                     "frequency": 1  # Start with a frequency of 1
-                })
-        
-        # Combine similar jobs and increment frequencies
-        combined_jobs = self._combine_similar_jobs(jobs)
+                }
+    
+    def _analyze_statements(self, statements, contexts):
+        """
+        Normalize and classify a batch of statements.
         
-        return combined_jobs
+        Args:
+            statements (list): User statements or quotes
+            contexts (list): Additional context about each statement
+            
+        Returns:
+            list: (normalized statement, list of job types) per statement
+        """
+        with timed("classify_statements"):
+            job_types = self.job_classifier.predict(statements, contexts)
+        return [
+            (self._normalize_statement(statement), types)
+            for statement, types in zip(statements, job_types)
+        ]
     
     def _classify_job_types(self, statement, context):
         """
         Classify the statement into job types (functional, social, emotional).
         
-        In a production system, this would use more sophisticated NLP.
-        For this demo, we'll use simple keyword matching.
+        By default keyword matching is used: a statement has every type
+        one of whose indicators occurs in it or its context, and is
+        functional otherwise. A model trained on labeled entries can be
+        used instead (see TrainedClassifier). Batches of statements are
+        classified with `self.job_classifier` directly.
         
         Args:
             statement (str): User statement or quote
@@ -158,61 +945,15 @@ class JTBDAgent:
         Returns:
             list: List of job types identified
         """
-        statement_lower = statement.lower() + " " + context.lower()
-        
-        job_types = []
-        
-        # Functional job indicators (related to practical tasks and outcomes)
-        functional_indicators = [
-            "need to", "have to", "want to", "trying to", "easier", "faster",
-            "efficient", "help me", "allows me", "lets me", "enables me",
-            "accomplish", "complete", "finish", "get done", "achieve"
-        ]
-        
-        # Social job indicators (related to how others perceive the user)
-        social_indicators = [
-            "others think", "people see", "impression", "look good",
-            "respected", "admired", "recognized", "status", "reputation",
-            "colleagues", "friends", "family", "peers", "society",
-            "community", "belong", "fit in", "stand out"
-        ]
-        
-        # Emotional job indicators (related to how the user feels)
-        emotional_indicators = [
-            "feel", "feeling", "happy", "satisfied", "frustrated", "anxious",
-            "worry", "stress", "peace of mind", "confidence", "trust",
-            "comfortable", "uncomfortable", "enjoy", "love", "hate",
-            "fear", "excited", "bored", "overwhelmed"
-        ]
-        
-        # Check for indicators in the statement
-        for indicator in functional_indicators:
-            if indicator in statement_lower:
-                job_types.append("functional")
-                break
-                
-        for indicator in social_indicators:
-            if indicator in statement_lower:
-                job_types.append("social")
-                break
-                
-        for indicator in emotional_indicators:
-            if indicator in statement_lower:
-                job_types.append("emotional")
-                break
-        
-        # If no types were identified, default to functional
-        if not job_types:
-            job_types.append("functional")
-        
-        return job_types
+        return self.job_classifier.predict([statement], [context])[0]
     
+    @timed("combine_similar_jobs")
     def _combine_similar_jobs(self, jobs):
         """
         Combine similar jobs and increment their frequencies.
         
         Args:
-            jobs (list): List of extracted jobs
+            jobs (iterable): (normalized statement, job) pairs, consumed once
             
         Returns:
             list: List of combined jobs with updated frequencies
@@ -220,26 +961,18 @@ class JTBDAgent:
         # In a real system, this would use more sophisticated text similarity
         # For this demo, we'll use a simple approach based on statement similarity
         
-        combined_jobs = []
-        statements_added = set()
+        # The first job seen for each normalized statement, in order of appearance
+        combined_jobs = {}
         
-        for job in jobs:
-            # Normalize the statement to check for duplicates
-            normalized_statement = self._normalize_statement(job["statement"])
-            
-            # Check if a similar statement already exists
-            if normalized_statement in statements_added:
-                # Find the existing job and update its frequency
-                for existing_job in combined_jobs:
-                    if self._normalize_statement(existing_job["statement"]) == normalized_statement:
-                        existing_job["frequency"] += 1
-                        break
+        for normalized_statement, job in jobs:
+            existing_job = combined_jobs.get(normalized_statement)
+            if existing_job is not None:
+                existing_job["frequency"] += 1
             else:
                 # Add the new job
-                combined_jobs.append(job)
-                statements_added.add(normalized_statement)
+                combined_jobs[normalized_statement] = job
         
-        return combined_jobs
+        return list(combined_jobs.values())
     
     def _normalize_statement(self, statement):
         """
@@ -254,32 +987,21 @@ class JTBDAgent:
         # Remove punctuation and convert to lowercase
         normalized = re.sub(r'[^\w\s]', '', statement.lower())
         
-        # Remove stop words (a simplified version)
-        stop_words = {'i', 'me', 'my', 'myself', 'we', 'our', 'ours', 'ourselves', 'you', 'your', 
-                      'yours', 'yourself', 'yourselves', 'he', 'him', 'his', 'himself', 'she', 
-                      'her', 'hers', 'herself', 'it', 'its', 'itself', 'they', 'them', 'their', 
-                      'theirs', 'themselves', 'what', 'which', 'who', 'whom', 'this', 'that', 
-                      'these', 'those', 'am', 'is', 'are', 'was', 'were', 'be', 'been', 'being', 
-                      'have', 'has', 'had', 'having', 'do', 'does', 'did', 'doing', 'a', 'an', 
-                      'the', 'and', 'but', 'if', 'or', 'because', 'as', 'until', 'while', 'of', 
-                      'at', 'by', 'for', 'with', 'about', 'against', 'between', 'into', 'through', 
-                      'during', 'before', 'after', 'above', 'below', 'to', 'from', 'up', 'down', 
-                      'in', 'out', 'on', 'off', 'over', 'under', 'again', 'further', 'then', 
-                      'once', 'here', 'there', 'when', 'where', 'why', 'how', 'all', 'any', 
-                      'both', 'each', 'few', 'more', 'most', 'other', 'some', 'such', 'no', 
-                      'nor', 'not', 'only', 'own', 'same', 'so', 'than', 'too', 'very'}
-        
         words = normalized.split()
-        filtered_words = [word for word in words if word not in stop_words]
+        filtered_words = [word for word in words if word not in STOP_WORDS]
         
         return ' '.join(filtered_words)
     
-    def _cluster_into_themes(self, jobs):
+    @timed("cluster_themes")
+    def _cluster_into_themes(self, jobs, sampling=None):
         """
-        Cluster jobs into themes using TF-IDF and K-means.
+        Cluster jobs into themes using TF-IDF (or cached embeddings) and K-means.
         
         Args:
             jobs (list): List of jobs to cluster
+            sampling (dict, optional): Result of _stratified_sample when the jobs
+                come from a sample; its remaining statements are assigned to
+                the nearest theme
             
         Returns:
             list: List of themes with their associated jobs
@@ -292,15 +1014,27 @@ class JTBDAgent:
         
         # If we have very few statements, just return one theme with all jobs
         if len(statements) < 3:
-            return [{
+            theme = {
                 "name": "Primary Theme",
                 "description": "Main theme identified from limited data",
-                "jobs": jobs
-            }]
+                "jobs": jobs,
+                "job_count": len(jobs),
+                "total_frequency": sum(job["frequency"] for job in jobs)
+            }
+            if sampling:
+                self._assign_remaining([theme], sampling, [0] * len(sampling["remaining"]))
+            return [theme]
         
         # Vectorize the statements
-        vectorizer = TfidfVectorizer(max_features=100)
-        X = vectorizer.fit_transform(statements)
+        if self.embeddings is not None:
+            with timed("embed"):
+                X = self.embeddings.embed(statements)
+            transform = self.embeddings.embed
+        else:
+            with timed("tfidf"):
+                vectorizer = TfidfVectorizer(max_features=100)
+                X = vectorizer.fit_transform(statements)
+            transform = vectorizer.transform
         
         # Determine the number of clusters (themes)
         # In a real system, this would be determined more intelligently
@@ -308,23 +1042,9 @@ class JTBDAgent:
         n_clusters = max(2, n_clusters)  # At least 2 clusters
         
         # Cluster the statements
-        kmeans = KMeans(n_clusters=n_clusters, random_state=42)
-        clusters = kmeans.fit_predict(X)
-        
-        # Define stop words here
-        stop_words = {'i', 'me', 'my', 'myself', 'we', 'our', 'ours', 'ourselves', 'you', 'your', 
-                      'yours', 'yourself', 'yourselves', 'he', 'him', 'his', 'himself', 'she', 
-                      'her', 'hers', 'herself', 'it', 'its', 'itself', 'they', 'them', 'their', 
-                      'theirs', 'themselves', 'what', 'which', 'who', 'whom', 'this', 'that', 
-                      'these', 'those', 'am', 'is', 'are', 'was', 'were', 'be', 'been', 'being', 
-                      'have', 'has', 'had', 'having', 'do', 'does', 'did', 'doing', 'a', 'an', 
-                      'the', 'and', 'but', 'if', 'or', 'because', 'as', 'until', 'while', 'of', 
-                      'at', 'by', 'for', 'with', 'about', 'against', 'between', 'into', 'through', 
-                      'during', 'before', 'after', 'above', 'below', 'to', 'from', 'up', 'down', 
-                      'in', 'out', 'on', 'off', 'over', 'under', 'again', 'further', 'then', 
-                      'once', 'here', 'there', 'when', 'where', 'why', 'how', 'all', 'any', 
-                      'both', 'each', 'few', 'more', 'most', 'other', 'some', 'such', 'no', 
-                      'nor', 'not', 'only', 'own', 'same', 'so', 'than', 'too', 'very'}
+        with timed("kmeans"):
+            kmeans = KMeans(n_clusters=n_clusters, random_state=42)
+            clusters = kmeans.fit_predict(X)
         
         # Group jobs by cluster
         themes = []
@@ -340,11 +1060,12 @@ class JTBDAgent:
                 words = theme_text.split()
                 word_freq = Counter(words)
                 common_words = [word for word, count in word_freq.most_common(3) 
-                               if len(word) > 3 and word.lower() not in stop_words]
+                               if len(word) > 3 and word.lower() not in STOP_WORDS]
                 
                 theme_name = " ".join(common_words).title() if common_words else f"Theme {i+1}"
                 
                 themes.append({
+                    "cluster": i,
                     "name": theme_name,
                     "description": self._generate_theme_description(theme_jobs),
                     "jobs": theme_jobs,
@@ -352,8 +1073,47 @@ class JTBDAgent:
                     "total_frequency": sum(job["frequency"] for job in theme_jobs)
                 })
         
+        if sampling:
+            # Unsampled statements go to the nearest centroid in one vectorized pass
+            with timed("assign_remaining"):
+                remaining_statements = list(sampling["remaining"])
+                assigned_clusters = (
+                    kmeans.predict(transform(remaining_statements)) if remaining_statements else []
+                )
+            self._assign_remaining(themes, sampling, assigned_clusters)
+        
+        for theme in themes:
+            del theme["cluster"]
+        
         return themes
     
+    def _assign_remaining(self, themes, sampling, assigned_clusters):
+        """
+        Add unsampled entries to theme totals.
+        
+        Theme totals become the sampled frequencies plus the entries assigned
+        to the theme, scaled by the sample's jobs per entry.
+        
+        Args:
+            themes (list): Themes with a "cluster" index (or a single theme)
+            sampling (dict): Result of _stratified_sample
+            assigned_clusters (list): Cluster of each remaining statement, in order
+        """
+        sampled_occurrences = sum(
+            job.get("sample_frequency", job["frequency"]) for theme in themes for job in theme["jobs"]
+        )
+        jobs_per_entry = sampled_occurrences / sampling["sample_size"] if sampling["sample_size"] else 1.0
+        
+        assigned_entries = Counter()
+        for statement_count, cluster in zip(sampling["remaining"].values(), assigned_clusters):
+            assigned_entries[int(cluster)] += statement_count
+        
+        for theme in themes:
+            entries = assigned_entries[theme.get("cluster", 0)]
+            sampled_frequency = sum(job.get("sample_frequency", job["frequency"]) for job in theme["jobs"])
+            theme["assigned_entries"] = entries
+            theme["total_frequency"] = round(sampled_frequency + entries * jobs_per_entry)
+    
     def _generate_theme_description(self, jobs):
         """
         Generate a description for a theme based on its jobs.
@@ -412,44 +1172,65 @@ class JTBDAgent:
         
         return ranked_jobs
     
-    def _assess_reliability(self, research_data):
+    @timed("assess_reliability")
+    def _assess_reliability(self, research_data, sampling_fraction=None, stats=None):
         """
         Assess the reliability of the analysis based on data completeness.
         
         Args:
             research_data (dict): The research data
+            sampling_fraction (float, optional): Fraction of entries analyzed
+                in approximate mode
+            stats (dict, optional): Precomputed corpus statistics of the same
+                data, used instead of counting the entries again
             
         Returns:
             dict: Reliability assessment
         """
-        sources = research_data.get("sources", [])
-        entries = research_data.get("research_data", [])
-        
-        # Count entries per source to check for triangulation
-        source_counts = Counter()
-        for entry in entries:
-            source_counts[entry.get("source", "Unknown")] += 1
-        
-        # Check for patterns across sources
-        has_triangulation = len(source_counts) >= 2 and all(count >= 2 for count in source_counts.values())
+        if stats is not None:
+            source_count = stats["source_count"]
+            data_point_count = stats["entries"]
+            has_triangulation = stats["has_triangulation"]
+        else:
+            entries = research_data.get("research_data", [])
+            
+            # Count entries per source to check for triangulation
+            source_counts = Counter()
+            for entry in entries:
+                source_counts[entry.get("source", "Unknown")] += 1
+            
+            # Check for patterns across sources
+            has_triangulation = len(source_counts) >= 2 and all(count >= 2 for count in source_counts.values())
+            source_count = len(research_data.get("sources", []))
+            data_point_count = len(entries)
         
         # Determine reliability level
-        if len(sources) >= 3 and len(entries) >= 15 and has_triangulation:
+        if source_count >= 3 and data_point_count >= 15 and has_triangulation:
             reliability_level = "high"
-        elif len(sources) >= 2 and len(entries) >= 10:
+        elif source_count >= 2 and data_point_count >= 10:
             reliability_level = "medium"
         else:
             reliability_level = "low"
             
-        return {
+        reliability = {
             "level": reliability_level,
             "factors": {
-                "source_count": len(sources),
-                "data_point_count": len(entries),
+                "source_count": source_count,
+                "data_point_count": data_point_count,
                 "has_triangulation": has_triangulation
             },
             "description": self._get_reliability_description(reliability_level)
         }
+        
+        if sampling_fraction is not None:
+            reliability["factors"]["sampling_fraction"] = round(sampling_fraction, 4)
+            if sampling_fraction < 1:
+                reliability["description"] += (
+                    f" Job frequencies are estimated from a {sampling_fraction:.1%} sample"
+                    " and carry 95% confidence intervals."
+                )
+        
+        return reliability
     
     def _get_reliability_description(self, level):
         """
@@ -1,188 +1,526 @@
+import hashlib
 import logging
 import random
-from collections import Counter
+from services.cache import ResponseCache
+from services.metrics import timed
+from services.pipeline import Node
 
 logger = logging.getLogger(__name__)
 
+# Job types, in the order gaps are reported
+JOB_TYPES = ["functional", "social", "emotional"]
+
+# Templates use "{topic}" as their only placeholder
+BASE_GOAL_TEMPLATES = [
+    "Identify the key functional jobs users are trying to accomplish related to {topic}",
+    "Understand the emotional needs users have when engaging with {topic}",
+    "Discover the social context and implications of {topic} for users"
+]
+
+TOPIC_GOAL_TEMPLATES = [
+    "Identify the main pain points users experience with current {topic} solutions",
+    "Understand user expectations and desired outcomes when using {topic}",
+    "Discover unmet needs in the {topic} space that could inform innovation"
+]
+
+GAP_GOAL_TEMPLATE = "Expand understanding of {job_type} jobs related to {topic}"
+THEME_GOAL_TEMPLATE = "Gather more data about the '{theme}' theme to strengthen analysis"
+VALIDATION_GOAL = "Validate preliminary findings by gathering more diverse data"
+
+# Goals driven by the coverage of a partial analysis
+TRIANGULATION_GOAL_TEMPLATE = "Triangulate the '{theme}' theme with evidence from additional sources"
+DISCOVERY_GOAL_TEMPLATE = "Continue open-ended discovery on {topic}, as new jobs still emerge with each additional entry"
+QUANTIFY_GOAL_TEMPLATE = "Quantify how widespread the identified {topic} jobs are, as additional entries rarely reveal new ones"
+
+# Job types with fewer distinct jobs, or evidence from fewer sources, are gaps
+MIN_JOBS_PER_TYPE = 3
+MIN_SOURCES_PER_TYPE = 2
+
+# Maximum number of single-source themes given a triangulation goal
+MAX_TRIANGULATION_GOALS = 3
+
+# General JTBD interview questions
+GENERAL_QUESTION_TEMPLATES = [
+    "Can you tell me about the last time you used/experienced {topic}?",
+    "What were you trying to accomplish when you used {topic}?",
+    "What prompted you to look for a solution like {topic}?",
+    "What alternatives did you consider before choosing {topic}?",
+    "What does a successful outcome look like when you use {topic}?",
+    "What frustrations or challenges do you face when using {topic}?",
+    "How do you measure success when using {topic}?",
+    "How has using {topic} changed your routine or process?",
+    "If {topic} wasn't available, what would you do instead?",
+    "What improvement to {topic} would make the biggest difference for you?"
+]
+
+# Interview questions per job type
+JOB_QUESTION_TEMPLATES = {
+    "functional": [
+        "What specific tasks are you trying to complete with {topic}?",
+        "How do you know when {topic} has successfully helped you accomplish your goal?",
+        "What features or capabilities are most important to you when using {topic}?",
+        "What steps or processes related to {topic} take too much time or effort?",
+        "What problems does {topic} solve for you?"
+    ],
+    "emotional": [
+        "How do you feel before, during, and after using {topic}?",
+        "What worries or concerns do you have when using {topic}?",
+        "What aspects of {topic} give you confidence or peace of mind?",
+        "What emotions would you associate with your experience using {topic}?",
+        "What would make you feel more satisfied with your {topic} experience?"
+    ],
+    "social": [
+        "How does using {topic} impact how others perceive you?",
+        "Do you discuss your use of {topic} with others? What do you share?",
+        "How important is it that others know you use {topic}?",
+        "Has using {topic} affected your relationships or social interactions?",
+        "Are there social expectations around using {topic} in your community or workplace?"
+    ]
+}
+
+LIKERT_OPTIONS = ["Strongly disagree", "Disagree", "Neutral", "Agree", "Strongly agree"]
+
+# Survey questions asked on every plan, in order
+SURVEY_QUESTION_TEMPLATES = [
+    {
+        "question": "How often do you use {topic}?",
+        "type": "multiple_choice",
+        "options": ["Daily", "Weekly", "Monthly", "Rarely", "Never"]
+    },
+    {
+        "question": "What is your primary reason for using {topic}?",
+        "type": "multiple_choice",
+        "options": ["To save time", "To save money", "For convenience", "For quality", "Other (please specify)"]
+    },
+    {
+        "question": "How satisfied are you with your current {topic} solution?",
+        "type": "scale",
+        "options": ["Very dissatisfied", "Somewhat dissatisfied", "Neutral", "Somewhat satisfied", "Very satisfied"]
+    },
+    {
+        "question": "Which of the following best describes how you feel when using {topic}?",
+        "type": "multiple_choice",
+        "options": ["Frustrated", "Anxious", "Neutral", "Satisfied", "Delighted"]
+    },
+    {
+        "question": "How likely are you to recommend {topic} to a friend or colleague?",
+        "type": "scale",
+        "options": ["0 - Not at all likely", "1", "2", "3", "4", "5", "6", "7", "8", "9", "10 - Extremely likely"]
+    },
+    {"question": "{topic} helps me accomplish my goals efficiently.", "type": "likert", "options": LIKERT_OPTIONS},
+    {"question": "Using {topic} makes me feel confident.", "type": "likert", "options": LIKERT_OPTIONS},
+    {"question": "Others respect me for my choice to use {topic}.", "type": "likert", "options": LIKERT_OPTIONS},
+    {"question": "I often feel frustrated when using {topic}.", "type": "likert", "options": LIKERT_OPTIONS},
+    {"question": "Using {topic} saves me time compared to alternatives.", "type": "likert", "options": LIKERT_OPTIONS},
+    {"question": "What are you trying to accomplish when you use {topic}?", "type": "open_ended"},
+    {"question": "What is the most frustrating aspect of using {topic}?", "type": "open_ended"},
+    {"question": "How would you describe your ideal experience with {topic}?", "type": "open_ended"},
+    {"question": "What would make you switch from {topic} to an alternative?", "type": "open_ended"},
+    {
+        "question": "What other solutions have you tried instead of {topic}, and why did you choose {topic}?",
+        "type": "open_ended"
+    }
+]
+
+# Survey questions added for goals that mention a job type
+GOAL_SURVEY_QUESTION_TEMPLATES = {
+    "functional": {"question": "What tasks do you most commonly use {topic} for?", "type": "open_ended"},
+    "emotional": {"question": "How does using {topic} make you feel?", "type": "open_ended"},
+    "social": {
+        "question": "How important is it that others know you use {topic}?",
+        "type": "scale",
+        "options": ["Not at all important", "Slightly important", "Moderately important", "Very important", "Extremely important"]
+    }
+}
+
+METHOD_TEMPLATES = [
+    {
+        "method": "User Interviews",
+        "description": "One-on-one interviews with current or potential users of {topic} to deeply understand their needs, motivations, and pain points.",
+        "priority": "High"
+    },
+    {
+        "method": "Surveys",
+        "description": "Quantitative data collection to understand patterns across a larger user base for {topic}.",
+        "priority": "Medium"
+    },
+    {
+        "method": "Contextual Inquiry",
+        "description": "Observing users in their natural environment while they interact with {topic} to identify unspoken needs and workarounds.",
+        "priority": "Medium"
+    },
+    {
+        "method": "Diary Studies",
+        "description": "Having users document their experiences with {topic} over time to capture real-time feedback and evolving needs.",
+        "priority": "Low"
+    }
+]
+
+FOCUS_GROUP_TEMPLATE = {
+    "method": "Focus Groups",
+    "description": "Group discussions with 6-8 users to explore collective opinions and experiences with {topic}.",
+    "priority": "Medium"
+}
+
+# Methods added for the job type with the fewest jobs
+GAP_METHOD_TEMPLATES = {
+    "social": {
+        "method": "Social Media Analysis",
+        "description": "Analyzing how users discuss {topic} on social platforms to understand social context and influence.",
+        "priority": "High"
+    },
+    "emotional": {
+        "method": "Sentiment Analysis",
+        "description": "Analyzing user reviews and feedback to understand emotional responses to {topic}.",
+        "priority": "High"
+    }
+}
+
+# Number of general interview questions sampled per plan
+INTERVIEW_QUESTION_COUNT = 15
+
+# Format of stored plans and their keys; bumped when either changes (2: keyed by exact topic)
+PLAN_FORMAT = 2
+
+# Identifies the templates above; stored plans from other versions are regenerated
+PLAN_TEMPLATE_VERSION = hashlib.sha1(repr((
+    PLAN_FORMAT, BASE_GOAL_TEMPLATES, TOPIC_GOAL_TEMPLATES, GENERAL_QUESTION_TEMPLATES, JOB_QUESTION_TEMPLATES,
+    SURVEY_QUESTION_TEMPLATES, GOAL_SURVEY_QUESTION_TEMPLATES, METHOD_TEMPLATES, INTERVIEW_QUESTION_COUNT,
+    TRIANGULATION_GOAL_TEMPLATE, DISCOVERY_GOAL_TEMPLATE, QUANTIFY_GOAL_TEMPLATE
+)).encode("utf-8")).hexdigest()[:12]
+
+
+def compile_template(template):
+    """Split a template at its "{topic}" placeholders, so rendering is a join."""
+    return tuple(template.split("{topic}"))
+
+
+def compile_question(question):
+    """Compile the text of a question or method dict, keeping its other keys."""
+    text_key = "question" if "question" in question else "description"
+    return text_key, compile_template(question[text_key]), question
+
+
+def render_question(compiled, topic):
+    """Render a compiled question or method dict for a topic."""
+    text_key, parts, question = compiled
+    return {**question, text_key: topic.join(parts)}
+
+
 class ResearcherAgent:
     """
-    The Researcher Agent generates research plans when there is insufficient 
+    The Researcher Agent generates research plans when there is insufficient
     data to perform a reliable JTBD analysis.
+    
+    Plans are deterministic: they depend only on the topic and the gaps of
+    the existing analysis, so finished plans are cached per (topic, gaps).
+    Plans for topics without data depend on the topic alone and can also
+    be persisted in a plan store.
     """
     
-    def __init__(self):
-        """Initialize the Researcher Agent."""
-        pass
+    def __init__(self, plan_cache_size=1024, plan_store=None):
+        """
+        Initialize the Researcher Agent.
+        
+        Args:
+            plan_cache_size (int): Number of finished plans kept in memory
+            plan_store (MemoryPlanStore or SQLitePlanStore, optional): Store
+                serving and persisting plans for topics without data
+        """
+        # Question banks are compiled once; rendering a plan only joins strings
+        self.base_goals = [compile_template(template) for template in BASE_GOAL_TEMPLATES]
+        self.topic_goals = [compile_template(template) for template in TOPIC_GOAL_TEMPLATES]
+        self.general_questions = [compile_template(template) for template in GENERAL_QUESTION_TEMPLATES]
+        self.job_questions = {
+            job_type: [compile_template(template) for template in templates]
+            for job_type, templates in JOB_QUESTION_TEMPLATES.items()
+        }
+        self.survey_questions = [compile_question(question) for question in SURVEY_QUESTION_TEMPLATES]
+        self.goal_survey_questions = {
+            job_type: compile_question(question) for job_type, question in GOAL_SURVEY_QUESTION_TEMPLATES.items()
+        }
+        self.methods = [compile_question(method) for method in METHOD_TEMPLATES]
+        self.focus_group = compile_question(FOCUS_GROUP_TEMPLATE)
+        self.gap_methods = {
+            job_type: compile_question(method) for job_type, method in GAP_METHOD_TEMPLATES.items()
+        }
+        
+        self.plan_cache = ResponseCache(max_entries=plan_cache_size, name="research_plan")
+        self.plan_store = plan_store
     
-    def generate_research_plan(self, topic, existing_analysis=None):
+    @timed("research_plan")
+    def generate_research_plan(self, topic, existing_analysis=None, corpus_stats=None, base_plan=None):
         """
         Generate a research plan for the given topic.
         
+        Identical topics and gaps give identical plans, served from the
+        cache after the first call, so the returned dict must be treated as
+        read-only.
+        
         Args:
             topic (str): The topic to generate a research plan for
             existing_analysis (dict, optional): Existing partial analysis
-            
+            corpus_stats (dict, optional): Precomputed statistics of the topic's corpus
+            base_plan (dict, optional): Result of build_base_plan for the topic,
+                built ahead of time (e.g. while the analysis runs)
+        
         Returns:
             dict: Research plan with interview questions and survey questions
         """
+        gaps = self._gap_profile(existing_analysis, corpus_stats)
+        cache_key = (topic, tuple(gaps.items()) if gaps else None)
+        
+        research_plan = self.plan_cache.get(cache_key)
+        if research_plan is not None:
+            return research_plan
+        
+        # Plans for topics without data depend on the topic alone and may be stored
+        use_store = gaps is None and self.plan_store is not None
+        if use_store:
+            research_plan = self.plan_store.get(topic, PLAN_TEMPLATE_VERSION)
+        
+        if research_plan is None:
+            research_plan = self._build_plan(topic, gaps, cache_key, base_plan)
+            if use_store:
+                self.plan_store.put(topic, research_plan, PLAN_TEMPLATE_VERSION)
+        
+        self.plan_cache.put(cache_key, research_plan)
+        return research_plan
+    
+    def pipeline_nodes(self):
+        """
+        Pipeline nodes provided by the agent (see services.pipeline).
+        
+        "research_plan" plans research for the "topic" parameter alone (no
+        data); "gap_research_plan" targets the gaps of the "analysis" and
+        "corpus_stats" nodes and takes the "base_plan" node, which does not
+        depend on the analysis and so runs alongside it.
+        
+        Returns:
+            list: Node instances
+        """
+        return [
+            Node("base_plan", self.build_base_plan, params=("topic",)),
+            Node("research_plan", self.generate_research_plan, params=("topic",)),
+            Node("gap_research_plan", self._generate_gap_plan, inputs=("analysis", "corpus_stats", "base_plan"),
+                 params=("topic",)),
+        ]
+    
+    def _generate_gap_plan(self, topic, analysis, corpus_stats, base_plan):
+        """Generate the research plan addressing the gaps of a partial analysis."""
+        return self.generate_research_plan(topic, analysis, corpus_stats, base_plan)
+    
+    def build_plans(self, topics):
+        """
+        Generate the plans of topics without data and store them in bulk.
+        
+        Args:
+            topics (iterable): Topics to prebuild plans for
+            
+        Returns:
+            int: Number of plans stored
+            
+        Raises:
+            ValueError: If the agent has no plan store
+        """
+        if self.plan_store is None:
+            raise ValueError("Prebuilding research plans requires a plan store")
+        
+        plans = [(topic, self._build_plan(topic, None, (topic, None))) for topic in dict.fromkeys(topics)]
+        self.plan_store.put_many(plans, PLAN_TEMPLATE_VERSION)
+        return len(plans)
+    
+    @timed("research_plan_base")
+    def build_base_plan(self, topic):
+        """
+        Build the parts of a research plan that do not depend on existing data.
+        
+        These are the base and topic goals, the base methods and the survey
+        questions (which follow from the base goals), so they can be built
+        while an analysis is still running.
+        
+        Args:
+            topic (str): The topic to generate a research plan for
+            
+        Returns:
+            dict: "topic", "base_goals", "topic_goals", "survey_questions"
+                and "methods", to pass to generate_research_plan
+        """
+        base_goals = [topic.join(parts) for parts in self.base_goals]
+        
+        return {
+            "topic": topic,
+            "base_goals": base_goals,
+            "topic_goals": [topic.join(parts) for parts in self.topic_goals],
+            "survey_questions": self._generate_survey_questions(topic, base_goals),
+            "methods": [render_question(method, topic) for method in self.methods]
+        }
+    
+    def _build_plan(self, topic, gaps, cache_key, base_plan=None):
+        """
+        Generate a research plan.
+        
+        Args:
+            topic (str): The topic to generate a research plan for
+            gaps (dict, optional): Result of _gap_profile
+            cache_key (tuple): Cache key of the plan, also used as its seed
+            base_plan (dict, optional): Result of build_base_plan; built when omitted
+            
+        Returns:
+            dict: The research plan
+        """
         logger.info(f"Generating research plan for topic: {topic}")
         
-        # Determine research goals based on existing analysis
-        research_goals = self._determine_research_goals(topic, existing_analysis)
+        if base_plan is None:
+            base_plan = self.build_base_plan(topic)
         
-        # Generate interview questions
-        interview_questions = self._generate_interview_questions(topic, research_goals)
+        # Seeded from the topic and gaps, so the plan can be cached
+        rng = random.Random(hashlib.sha1(repr(cache_key).encode("utf-8")).hexdigest())
         
-        # Generate survey questions
-        survey_questions = self._generate_survey_questions(topic, research_goals)
+        # Determine research goals based on existing analysis
+        research_goals = self._determine_research_goals(topic, gaps, base_plan)
         
         # Create the research plan
-        research_plan = {
+        return {
             "topic": topic,
             "research_goals": research_goals,
-            "interview_questions": interview_questions,
-            "survey_questions": survey_questions,
-            "recommended_methods": self._recommend_research_methods(topic, existing_analysis),
-            "sample_size_recommendations": self._recommend_sample_sizes(existing_analysis)
+            "interview_questions": self._generate_interview_questions(topic, research_goals, rng),
+            "survey_questions": list(base_plan["survey_questions"]),
+            "recommended_methods": self._recommend_research_methods(topic, gaps, base_plan["methods"]),
+            "sample_size_recommendations": self._recommend_sample_sizes(gaps)
         }
+    
+    def _gap_profile(self, existing_analysis, corpus_stats=None):
+        """
+        Summarize what a plan depends on in the existing data.
         
-        return research_plan
+        When the analysis carries a coverage section (see
+        JTBDAgent._assess_coverage), gaps come from its coverage matrix and
+        saturation curve; otherwise from the lengths of its job lists and
+        themes.
+        
+        Args:
+            existing_analysis (dict, optional): Existing partial analysis
+            corpus_stats (dict, optional): Precomputed corpus statistics; take
+                precedence over the analysis' reliability factors
+        
+        Returns:
+            dict: Hashable gap values, or None without existing data
+        """
+        if not existing_analysis and not corpus_stats:
+            return None
+        
+        gaps = {}
+        
+        coverage = existing_analysis.get("coverage") if existing_analysis else None
+        if coverage:
+            by_job_type = coverage["by_job_type"]
+            by_theme = coverage["by_theme"]
+            sparsest_theme = min(by_theme, key=lambda x: x["entries"]) if by_theme else {}
+            
+            gaps["thin_job_types"] = tuple(
+                job_type for job_type in JOB_TYPES
+                if by_job_type[job_type]["jobs"] < MIN_JOBS_PER_TYPE
+                or by_job_type[job_type]["sources"] < MIN_SOURCES_PER_TYPE
+            )
+            gaps["sparsest_job_type"] = min(JOB_TYPES, key=lambda job_type: by_job_type[job_type]["entries"])
+            gaps["sparsest_theme"] = sparsest_theme.get("name", "")
+            gaps["single_source_themes"] = tuple(dict.fromkeys(
+                theme["name"] for theme in by_theme if theme["entries"] and theme["sources"] < 2
+            ))[:MAX_TRIANGULATION_GOALS]
+            gaps["saturated"] = coverage["saturation"]["saturated"]
+            gaps["reliability_level"] = existing_analysis.get("reliability", {}).get("level", "low")
+        
+        elif existing_analysis:
+            job_counts = {
+                job_type: len(existing_analysis.get(f"{job_type}_jobs", []))
+                for job_type in JOB_TYPES
+            }
+            themes = existing_analysis.get("themes", [])
+            sparsest_theme = min(themes, key=lambda x: x.get("job_count", 0)) if themes else {}
+            
+            gaps["thin_job_types"] = tuple(job_type for job_type in JOB_TYPES if job_counts[job_type] < MIN_JOBS_PER_TYPE)
+            gaps["sparsest_job_type"] = min(job_counts.items(), key=lambda x: x[1])[0]
+            gaps["sparsest_theme"] = sparsest_theme.get("name", "")
+            gaps["single_source_themes"] = ()
+            gaps["saturated"] = None
+            gaps["reliability_level"] = existing_analysis.get("reliability", {}).get("level", "low")
+        
+        if corpus_stats:
+            gaps["source_count"] = corpus_stats["source_count"]
+            gaps["data_point_count"] = corpus_stats["entries"]
+        else:
+            factors = existing_analysis.get("reliability", {}).get("factors", {})
+            gaps["source_count"] = factors.get("source_count", 0)
+            gaps["data_point_count"] = factors.get("data_point_count", 0)
+        
+        return gaps
     
-    def _determine_research_goals(self, topic, existing_analysis):
+    def _determine_research_goals(self, topic, gaps, base_plan):
         """
         Determine the goals for the research plan.
         
         Args:
             topic (str): The topic for the research
-            existing_analysis (dict, optional): Existing partial analysis
-            
+            gaps (dict, optional): Result of _gap_profile
+            base_plan (dict): Result of build_base_plan
+        
         Returns:
             list: Research goals
         """
-        goals = []
-        
         # Base goals that apply to any research project
-        base_goals = [
-            f"Identify the key functional jobs users are trying to accomplish related to {topic}",
-            f"Understand the emotional needs users have when engaging with {topic}",
-            f"Discover the social context and implications of {topic} for users"
-        ]
-        
-        goals.extend(base_goals)
+        goals = list(base_plan["base_goals"])
         
         # If we have existing analysis, add specific goals to address gaps
-        if existing_analysis:
-            # Check which job types have less data
-            job_types = ["functional", "social", "emotional"]
+        if gaps and "thin_job_types" in gaps:
+            for job_type in gaps["thin_job_types"]:
+                goals.append(GAP_GOAL_TEMPLATE.format(job_type=job_type, topic=topic))
             
-            for job_type in job_types:
-                jobs = existing_analysis.get(f"{job_type}_jobs", [])
-                
-                if not jobs or len(jobs) < 3:
-                    goals.append(f"Expand understanding of {job_type} jobs related to {topic}")
+            if gaps["reliability_level"] == "low":
+                goals.append(VALIDATION_GOAL)
             
-            # Check reliability if available
-            reliability = existing_analysis.get("reliability", {})
-            reliability_level = reliability.get("level", "low")
+            for theme in gaps["single_source_themes"]:
+                goals.append(TRIANGULATION_GOAL_TEMPLATE.format(theme=theme))
             
-            if reliability_level == "low":
-                goals.append(f"Validate preliminary findings by gathering more diverse data")
+            if gaps["sparsest_theme"] and gaps["sparsest_theme"] not in gaps["single_source_themes"]:
+                goals.append(THEME_GOAL_TEMPLATE.format(theme=gaps["sparsest_theme"]))
             
-            # Look for additional goals based on themes
-            themes = existing_analysis.get("themes", [])
-            if themes:
-                # Find the theme with the fewest jobs
-                min_jobs_theme = min(themes, key=lambda x: x.get("job_count", 0))
-                theme_name = min_jobs_theme.get("name", "")
-                
-                if theme_name:
-                    goals.append(f"Gather more data about the '{theme_name}' theme to strengthen analysis")
+            # A flat saturation curve calls for measuring jobs rather than finding more
+            if gaps["saturated"] is False:
+                goals.append(DISCOVERY_GOAL_TEMPLATE.format(topic=topic))
+            elif gaps["saturated"]:
+                goals.append(QUANTIFY_GOAL_TEMPLATE.format(topic=topic))
         
         # Add some specific goals based on the topic
-        topic_specific_goals = [
-            f"Identify the main pain points users experience with current {topic} solutions",
-            f"Understand user expectations and desired outcomes when using {topic}",
-            f"Discover unmet needs in the {topic} space that could inform innovation"
-        ]
-        
-        goals.extend(topic_specific_goals)
+        goals.extend(base_plan["topic_goals"])
         
         return goals
     
-    def _generate_interview_questions(self, topic, research_goals):
+    def _generate_interview_questions(self, topic, research_goals, rng):
         """
         Generate interview questions based on the topic and research goals.
         
         Args:
             topic (str): The topic for the research
             research_goals (list): The research goals
-            
+            rng (random.Random): Seeded generator for question selection
+        
         Returns:
             list: Interview questions
         """
-        # General JTBD interview questions
-        general_questions = [
-            f"Can you tell me about the last time you used/experienced {topic}?",
-            f"What were you trying to accomplish when you used {topic}?",
-            f"What prompted you to look for a solution like {topic}?",
-            f"What alternatives did you consider before choosing {topic}?",
-            f"What does a successful outcome look like when you use {topic}?",
-            f"What frustrations or challenges do you face when using {topic}?",
-            f"How do you measure success when using {topic}?",
-            f"How has using {topic} changed your routine or process?",
-            f"If {topic} wasn't available, what would you do instead?",
-            f"What improvement to {topic} would make the biggest difference for you?"
-        ]
-        
-        # Functional job questions
-        functional_questions = [
-            f"What specific tasks are you trying to complete with {topic}?",
-            f"How do you know when {topic} has successfully helped you accomplish your goal?",
-            f"What features or capabilities are most important to you when using {topic}?",
-            f"What steps or processes related to {topic} take too much time or effort?",
-            f"What problems does {topic} solve for you?"
-        ]
-        
-        # Emotional job questions
-        emotional_questions = [
-            f"How do you feel before, during, and after using {topic}?",
-            f"What worries or concerns do you have when using {topic}?",
-            f"What aspects of {topic} give you confidence or peace of mind?",
-            f"What emotions would you associate with your experience using {topic}?",
-            f"What would make you feel more satisfied with your {topic} experience?"
-        ]
-        
-        # Social job questions
-        social_questions = [
-            f"How does using {topic} impact how others perceive you?",
-            f"Do you discuss your use of {topic} with others? What do you share?",
-            f"How important is it that others know you use {topic}?",
-            f"Has using {topic} affected your relationships or social interactions?",
-            f"Are there social expectations around using {topic} in your community or workplace?"
+        # Select a subset of all questions, plus a few for the first goals' job types
+        all_questions = self.general_questions + [
+            parts for job_type in ["functional", "emotional", "social"] for parts in self.job_questions[job_type]
         ]
+        selected_questions = rng.sample(all_questions, min(INTERVIEW_QUESTION_COUNT, len(all_questions)))
         
-        # Combine and select questions
-        all_questions = general_questions + functional_questions + emotional_questions + social_questions
-        
-        # Select a subset of questions (about 10-15)
-        selected_count = min(15, len(all_questions))
-        selected_questions = random.sample(all_questions, selected_count)
-        
-        # Add some goal-specific questions
         for goal in research_goals[:2]:  # Just use the first couple of goals
-            goal_lower = goal.lower()
-            
-            if "functional" in goal_lower:
-                selected_questions.extend(random.sample(functional_questions, 2))
-            elif "emotional" in goal_lower:
-                selected_questions.extend(random.sample(emotional_questions, 2))
-            elif "social" in goal_lower:
-                selected_questions.extend(random.sample(social_questions, 2))
-        
-        # Remove duplicates and sort
-        unique_questions = list(dict.fromkeys(selected_questions))
+            job_type = self._goal_job_type(goal)
+            if job_type:
+                selected_questions.extend(rng.sample(self.job_questions[job_type], 2))
         
-        return unique_questions
+        # Remove duplicates, keeping the first occurrence
+        return list(dict.fromkeys(topic.join(parts) for parts in selected_questions))
     
     def _generate_survey_questions(self, topic, research_goals):
         """
@@ -191,206 +529,78 @@ class ResearcherAgent:
         Args:
             topic (str): The topic for the research
             research_goals (list): The research goals
-            
+        
         Returns:
             list: Survey questions
         """
-        survey_questions = []
-        
-        # Multiple choice questions
-        multiple_choice_questions = [
-            {
-                "question": f"How often do you use {topic}?",
-                "type": "multiple_choice",
-                "options": ["Daily", "Weekly", "Monthly", "Rarely", "Never"]
-            },
-            {
-                "question": f"What is your primary reason for using {topic}?",
-                "type": "multiple_choice",
-                "options": ["To save time", "To save money", "For convenience", "For quality", "Other (please specify)"]
-            },
-            {
-                "question": f"How satisfied are you with your current {topic} solution?",
-                "type": "scale",
-                "options": ["Very dissatisfied", "Somewhat dissatisfied", "Neutral", "Somewhat satisfied", "Very satisfied"]
-            },
-            {
-                "question": f"Which of the following best describes how you feel when using {topic}?",
-                "type": "multiple_choice",
-                "options": ["Frustrated", "Anxious", "Neutral", "Satisfied", "Delighted"]
-            },
-            {
-                "question": f"How likely are you to recommend {topic} to a friend or colleague?",
-                "type": "scale",
-                "options": ["0 - Not at all likely", "1", "2", "3", "4", "5", "6", "7", "8", "9", "10 - Extremely likely"]
-            }
-        ]
-        
-        # Likert scale questions
-        likert_questions = [
-            {
-                "question": f"{topic} helps me accomplish my goals efficiently.",
-                "type": "likert",
-                "options": ["Strongly disagree", "Disagree", "Neutral", "Agree", "Strongly agree"]
-            },
-            {
-                "question": f"Using {topic} makes me feel confident.",
-                "type": "likert",
-                "options": ["Strongly disagree", "Disagree", "Neutral", "Agree", "Strongly agree"]
-            },
-            {
-                "question": f"Others respect me for my choice to use {topic}.",
-                "type": "likert",
-                "options": ["Strongly disagree", "Disagree", "Neutral", "Agree", "Strongly agree"]
-            },
-            {
-                "question": f"I often feel frustrated when using {topic}.",
-                "type": "likert",
-                "options": ["Strongly disagree", "Disagree", "Neutral", "Agree", "Strongly agree"]
-            },
-            {
-                "question": f"Using {topic} saves me time compared to alternatives.",
-                "type": "likert",
-                "options": ["Strongly disagree", "Disagree", "Neutral", "Agree", "Strongly agree"]
-            }
-        ]
-        
-        # Open-ended questions
-        open_ended_questions = [
-            {
-                "question": f"What are you trying to accomplish when you use {topic}?",
-                "type": "open_ended"
-            },
-            {
-                "question": f"What is the most frustrating aspect of using {topic}?",
-                "type": "open_ended"
-            },
-            {
-                "question": f"How would you describe your ideal experience with {topic}?",
-                "type": "open_ended"
-            },
-            {
-                "question": f"What would make you switch from {topic} to an alternative?",
-                "type": "open_ended"
-            },
-            {
-                "question": f"What other solutions have you tried instead of {topic}, and why did you choose {topic}?",
-                "type": "open_ended"
-            }
-        ]
-        
-        # Combine all questions and add them to the survey
-        survey_questions.extend(multiple_choice_questions)
-        survey_questions.extend(likert_questions)
-        survey_questions.extend(open_ended_questions)
+        survey_questions = [render_question(question, topic) for question in self.survey_questions]
         
         # Add goal-specific questions
         for goal in research_goals[:3]:  # Just use a few goals
-            goal_lower = goal.lower()
-            
-            if "functional" in goal_lower:
-                survey_questions.append({
-                    "question": f"What tasks do you most commonly use {topic} for?",
-                    "type": "open_ended"
-                })
-            elif "emotional" in goal_lower:
-                survey_questions.append({
-                    "question": f"How does using {topic} make you feel?",
-                    "type": "open_ended"
-                })
-            elif "social" in goal_lower:
-                survey_questions.append({
-                    "question": f"How important is it that others know you use {topic}?",
-                    "type": "scale",
-                    "options": ["Not at all important", "Slightly important", "Moderately important", "Very important", "Extremely important"]
-                })
+            job_type = self._goal_job_type(goal)
+            if job_type:
+                survey_questions.append(render_question(self.goal_survey_questions[job_type], topic))
         
         return survey_questions
     
-    def _recommend_research_methods(self, topic, existing_analysis):
+    def _goal_job_type(self, goal):
+        """Return the first job type a goal mentions (functional, emotional, social), or None."""
+        goal_lower = goal.lower()
+        for job_type in ["functional", "emotional", "social"]:
+            if job_type in goal_lower:
+                return job_type
+        return None
+    
+    def _recommend_research_methods(self, topic, gaps, base_methods):
         """
         Recommend research methods based on the topic and existing analysis.
         
         Args:
             topic (str): The topic for the research
-            existing_analysis (dict, optional): Existing partial analysis
-            
+            gaps (dict, optional): Result of _gap_profile
+            base_methods (list): Basic methods rendered for the topic, not modified
+        
         Returns:
             list: Recommended research methods
         """
         # Basic research methods
-        methods = [
-            {
-                "method": "User Interviews",
-                "description": f"One-on-one interviews with current or potential users of {topic} to deeply understand their needs, motivations, and pain points.",
-                "priority": "High"
-            },
-            {
-                "method": "Surveys",
-                "description": f"Quantitative data collection to understand patterns across a larger user base for {topic}.",
-                "priority": "Medium"
-            },
-            {
-                "method": "Contextual Inquiry",
-                "description": f"Observing users in their natural environment while they interact with {topic} to identify unspoken needs and workarounds.",
-                "priority": "Medium"
-            },
-            {
-                "method": "Diary Studies",
-                "description": f"Having users document their experiences with {topic} over time to capture real-time feedback and evolving needs.",
-                "priority": "Low"
-            }
-        ]
+        methods = [dict(method) for method in base_methods]
         
         # If we have existing analysis, adjust priorities
-        if existing_analysis:
-            reliability = existing_analysis.get("reliability", {})
-            level = reliability.get("level", "low")
-            
-            if level == "low":
+        if gaps and "thin_job_types" in gaps:
+            if gaps["reliability_level"] == "low":
                 # Recommend more in-depth methods
                 for method in methods:
                     if method["method"] == "User Interviews" or method["method"] == "Contextual Inquiry":
                         method["priority"] = "High"
                 
                 # Add focus groups as a method
-                methods.append({
-                    "method": "Focus Groups",
-                    "description": f"Group discussions with 6-8 users to explore collective opinions and experiences with {topic}.",
-                    "priority": "Medium"
-                })
+                methods.append(render_question(self.focus_group, topic))
             
-            # Check which job types need more focus
-            job_counts = {
-                "functional": len(existing_analysis.get("functional_jobs", [])),
-                "social": len(existing_analysis.get("social_jobs", [])),
-                "emotional": len(existing_analysis.get("emotional_jobs", []))
-            }
-            
-            min_job_type = min(job_counts.items(), key=lambda x: x[1])
+            # Discovery methods lead until the saturation curve flattens, then surveys do
+            if gaps["saturated"] is not None:
+                lead_methods = ["Surveys"] if gaps["saturated"] else ["User Interviews", "Contextual Inquiry"]
+                for method in methods:
+                    if method["method"] in lead_methods:
+                        method["priority"] = "High"
             
-            if min_job_type[0] == "social":
-                methods.append({
-                    "method": "Social Media Analysis",
-                    "description": f"Analyzing how users discuss {topic} on social platforms to understand social context and influence.",
-                    "priority": "High"
-                })
-            elif min_job_type[0] == "emotional":
-                methods.append({
-                    "method": "Sentiment Analysis",
-                    "description": f"Analyzing user reviews and feedback to understand emotional responses to {topic}.",
-                    "priority": "High"
-                })
+            # Add methods for the job types that need more focus; coverage
+            # identifies every thin job type, job list lengths only the sparsest
+            focus_job_types = gaps["thin_job_types"] if gaps["saturated"] is not None else (gaps["sparsest_job_type"],)
+            for job_type in focus_job_types:
+                gap_method = self.gap_methods.get(job_type)
+                if gap_method:
+                    methods.append(render_question(gap_method, topic))
         
         return methods
     
-    def _recommend_sample_sizes(self, existing_analysis):
+    def _recommend_sample_sizes(self, gaps):
         """
         Recommend sample sizes for different research methods.
         
         Args:
-            existing_analysis (dict, optional): Existing partial analysis
-            
+            gaps (dict, optional): Result of _gap_profile
+        
         Returns:
             dict: Recommended sample sizes
         """
@@ -413,13 +623,10 @@ class ResearcherAgent:
             }
         }
         
-        # Adjust based on existing analysis if available
-        if existing_analysis:
-            reliability = existing_analysis.get("reliability", {})
-            factors = reliability.get("factors", {})
-            
-            current_sources = factors.get("source_count", 0)
-            current_data_points = factors.get("data_point_count", 0)
+        # Adjust based on the existing data if available
+        if gaps:
+            current_sources = gaps["source_count"]
+            current_data_points = gaps["data_point_count"]
             
             # If we already have some data, adjust the recommendations
             if current_sources > 0:
@@ -434,4 +641,4 @@ class ResearcherAgent:
                 recommendations["surveys"]["ideal"] = max(150, 300 - current_data_points)
                 recommendations["surveys"]["justification"] += f" Currently have {current_data_points} data points."
         
-        return recommendations 
\ No newline at end of file
+        return recommendations
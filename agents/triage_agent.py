@@ -1,7 +1,10 @@
 import os
 import logging
 import json
+import re
 from pathlib import Path
+from services.metrics import timed, record_corpus_size
+from utils.corpus_stats import CorpusStatsStore
 
 logger = logging.getLogger(__name__)
 
@@ -11,15 +14,24 @@ class TriageAgent:
     based on data availability for the requested topic.
     """
     
-    def __init__(self):
-        """Initialize the Triage Agent."""
-        self.data_directory = Path("data")
+    def __init__(self, data_directory="data", corpus_stats=None):
+        """
+        Initialize the Triage Agent.
+        
+        Args:
+            data_directory (str): Directory holding the research data files
+            corpus_stats (CorpusStatsStore, optional): Shared corpus statistics;
+                a store for `data_directory` is created when omitted
+        """
+        self.data_directory = Path(data_directory)
+        self.corpus_stats = corpus_stats or CorpusStatsStore(data_directory)
         
         # Create data directory if it doesn't exist
         if not os.path.exists(self.data_directory):
             os.makedirs(self.data_directory)
             logger.info(f"Created data directory at {self.data_directory}")
     
+    @timed("triage")
     def triage(self, user_query):
         """
         Process the user query and determine data completeness.
@@ -33,17 +45,83 @@ class TriageAgent:
         # Extract the topic from the user query
         topic = self._extract_topic(user_query)
         
+        return self.triage_topic(topic, user_query)
+    
+    def triage_topic(self, topic, user_query=None):
+        """
+        Triage an already resolved topic.
+        
+        Args:
+            topic (str): The topic
+            user_query (str, optional): The query the topic came from
+            
+        Returns:
+            dict: Triage result containing topic and data completeness assessment
+        """
         # Check data completeness for the topic
         data_completeness = self._check_data_completeness(topic)
         
         logger.info(f"Triage result for '{topic}': Data completeness = {data_completeness}")
         
         return {
-            "query": user_query,
+            "query": user_query if user_query is not None else topic,
             "topic": topic,
             "data_completeness": data_completeness
         }
     
+    def triage_many(self, user_query):
+        """
+        Process a query that mentions several topics, e.g. a comparison.
+        
+        Args:
+            user_query (str): The user's query about one or more topics
+            
+        Returns:
+            dict: Triage result containing each topic and its data completeness
+        """
+        topics = []
+        for topic in self._extract_topics(user_query):
+            data_completeness = self._check_data_completeness(topic)
+            logger.info(f"Triage result for '{topic}': Data completeness = {data_completeness}")
+            topics.append({
+                "topic": topic,
+                "data_completeness": data_completeness
+            })
+        
+        return {
+            "query": user_query,
+            "topics": topics
+        }
+    
+    def _extract_topics(self, user_query):
+        """
+        Extract every topic mentioned in a comparison query.
+        
+        Topics are separated by "vs", "versus", "compared to/with" or commas.
+        "and" is only treated as a separator when the query asks for a
+        comparison or lists topics with commas, since it is common inside
+        topic names.
+        
+        Args:
+            user_query (str): The user's query
+            
+        Returns:
+            list: The extracted topics, in order and without duplicates
+        """
+        topic_text = self._extract_topic(user_query)
+        
+        comparison_prefix = re.match(r'^(compare|comparing|comparison of|comparison between|between)\s+', topic_text, re.IGNORECASE)
+        if comparison_prefix:
+            topic_text = topic_text[comparison_prefix.end():]
+        
+        separators = r'\s+(?:vs\.?|versus|compared to|compared with)\s+|\s*,\s*'
+        if comparison_prefix or "," in topic_text:
+            separators += r'|\s+and\s+'
+        
+        topics = [part.strip() for part in re.split(separators, topic_text, flags=re.IGNORECASE)]
+        
+        return list(dict.fromkeys(topic for topic in topics if topic))
+    
     def _extract_topic(self, user_query):
         """
         Extract the main topic from the user query.
@@ -77,32 +155,19 @@ class TriageAgent:
         Returns:
             str: Data completeness assessment ("complete", "partial", or "none")
         """
-        # Normalized topic name for file matching
-        normalized_topic = topic.lower().replace(" ", "_")
-        
-        # Look for matching data files
-        data_files = list(self.data_directory.glob(f"*{normalized_topic}*.json"))
+        # Corpus statistics are cached per version of the data files
+        with timed("triage_load"):
+            stats = self.corpus_stats.get(topic)
         
-        if not data_files:
+        if stats is None:
             return "none"
         
-        # Check the completeness of the data in the files
-        total_sources = 0
-        total_entries = 0
-        
-        for file_path in data_files:
-            try:
-                with open(file_path, 'r') as file:
-                    data = json.load(file)
-                    
-                    # Count sources and entries
-                    sources = data.get("sources", [])
-                    total_sources += len(sources)
-                    
-                    entries = data.get("research_data", [])
-                    total_entries += len(entries)
-            except Exception as e:
-                logger.error(f"Error reading data file {file_path}: {e}")
+        # Sources are summed over the topic's files, so a source listed by
+        # several files counts once per file
+        total_sources = stats["listed_source_count"]
+        total_entries = stats["entries"]
+        
+        record_corpus_size(total_entries)
         
         # Determine completeness based on the amount of data
         # This is a simplified heuristic and should be adjusted for real-world use
@@ -111,4 +176,4 @@ class TriageAgent:
         elif total_sources >= 1 and total_entries >= 5:
             return "partial"
         else:
-            return "none" 
\ No newline at end of file
+            return "none"
@@ -1,9 +1,23 @@
+import os
 import logging
 import traceback
-from fastapi import FastAPI, HTTPException
+from typing import Optional
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 from pydantic import BaseModel
 from main import JTBDMultiAgentSystem
+from agents.jtbd_agent import MemoryBudgetExceeded, resolve_fields
+from contextlib import asynccontextmanager
+from starlette.concurrency import run_in_threadpool
+from services.cache import ResponseCache
+from services.metrics import registry, StageTimings, collect_timings
+from services.profiling import Profiler
+from services.job_queue import JobManager, MemoryJobStore, SQLiteJobStore, COMPLETED, FAILED
+from services.serialization import EncodedPayload, dumps, negotiate_encoding
+from services.single_flight import SingleFlight
+from services.warmup import WarmupManager
+from utils.pagination import paginate_response
 import uvicorn
 
 # Setup logging
@@ -23,11 +37,67 @@ except Exception as e:
     logger.error(traceback.format_exc())
     raise
 
+# Serialized /process responses, keyed on the resolved topic and corpus fingerprint
+response_cache = ResponseCache(
+    max_entries=int(os.getenv("JTBD_RESPONSE_CACHE_SIZE", "256")),
+    ttl_seconds=float(os.getenv("JTBD_RESPONSE_CACHE_TTL")) if os.getenv("JTBD_RESPONSE_CACHE_TTL") else None
+)
+
+# Coalesces identical concurrent /process requests into one computation
+request_flights = SingleFlight()
+
+registry.callback_counter(
+    "jtbd_coalesced_requests_total",
+    "Requests that joined an identical in-flight computation",
+    ("path",),
+    lambda: {("async",): request_flights.coalesced, ("threaded",): jtbd_system.flights.coalesced}
+)
+
+# Opt-in profiling via the X-JTBD-Profile header, plus optional random sampling
+profiler = Profiler(
+    output_directory=os.getenv("JTBD_PROFILE_DIR", "profiles"),
+    max_per_minute=int(os.getenv("JTBD_PROFILE_MAX_PER_MINUTE", "6")),
+    sample_rate=float(os.getenv("JTBD_PROFILE_SAMPLE_RATE", "0"))
+)
+
+# Background jobs for long-running analyses; set JTBD_JOB_DB to persist them in SQLite
+job_db_path = os.getenv("JTBD_JOB_DB")
+job_manager = JobManager(
+    jtbd_system,
+    store=SQLiteJobStore(job_db_path) if job_db_path else MemoryJobStore(),
+    max_workers=int(os.getenv("JTBD_JOB_WORKERS", "2")),
+    result_ttl=float(os.getenv("JTBD_JOB_RESULT_TTL", "3600"))
+)
+
+# Optional warm-up of known topics; enable with JTBD_WARMUP=1
+warmup_manager = None
+if os.getenv("JTBD_WARMUP", "0").lower() in ("1", "true", "yes"):
+    warmup_topics = os.getenv("JTBD_WARMUP_TOPICS", "")
+    warmup_manager = WarmupManager(
+        jtbd_system,
+        # warm_topic is defined with the routes below
+        warm_fn=lambda triage_result: warm_topic(triage_result),
+        topics=[topic.strip() for topic in warmup_topics.split(",") if topic.strip()] or None,
+        interval=float(os.getenv("JTBD_WARMUP_INTERVAL", "30"))
+    )
+
+@asynccontextmanager
+async def lifespan(app):
+    """Start background services on startup and stop them on shutdown."""
+    job_manager.recover()
+    if warmup_manager:
+        warmup_manager.start()
+    yield
+    if warmup_manager:
+        warmup_manager.stop()
+    job_manager.shutdown()
+
 # Create FastAPI app
 app = FastAPI(
     title="JTBD Multi-Agent System API",
     description="API for processing user queries using the Jobs To Be Done framework",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -48,29 +118,434 @@ class QueryRequest(BaseModel):
 async def root():
     return {"message": "JTBD Multi-Agent System API. Use /process endpoint to submit queries."}
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Expose pipeline metrics in the Prometheus text format.
+    
+    Returns:
+        PlainTextResponse: Stage duration histograms, route and cache counters
+    """
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/ready")
+async def ready():
+    """
+    Readiness check reporting warm-up progress.
+    
+    Returns 503 until the initial warm-up pass has finished, so load
+    balancers only route traffic to warm instances. Always ready when
+    warm-up is disabled.
+    
+    Returns:
+        JSONResponse: Readiness and warm-up status
+    """
+    if warmup_manager is None:
+        return {"ready": True, "warmup": {"enabled": False}}
+    
+    status = warmup_manager.status()
+    return JSONResponse(
+        status_code=200 if status["ready"] else 503,
+        content={"ready": status["ready"], "warmup": {"enabled": True, **status}}
+    )
+
 @app.post("/process")
-async def process_query(request: QueryRequest):
+async def process_query(
+    request: QueryRequest,
+    http_request: Request,
+    fields: Optional[str] = Query(None, description="Comma-separated analysis sections to include"),
+    limit: Optional[int] = Query(None, ge=1, description="Maximum number of jobs per job list"),
+    cursor: Optional[str] = Query(None, description="Cursor from a previous page's pagination block"),
+    job_refs: bool = Query(False, description="Reference jobs by id instead of embedding copies"),
+    timings: bool = Query(False, description="Include per-stage timings in the response"),
+    approximate: bool = Query(False, description="Analyze a stratified sample and estimate frequencies")
+):
     """
     Process a user query through the JTBD Multi-Agent System.
     
     Args:
         request: QueryRequest containing the user's query
+        fields: Comma-separated analysis sections to build and return
+        limit: Page size for each job list
+        cursor: Opaque cursor for the next page of job lists
+        job_refs: Whether job lists hold job ids with jobs listed once under "jobs"
+        timings: Whether to add a "timings" block with per-stage durations
+        approximate: Whether to cluster a sample of the data, reporting
+            estimated frequencies with confidence intervals
+        
+    An X-JTBD-Profile header ("cprofile" or "sample") bypasses the cache
+    and profiles the computation; the written files are named in the
+    X-JTBD-Profile response header.
         
     Returns:
-        dict: Response from the appropriate agent(s)
+        Response: JSON response from the appropriate agent(s), compressed
+        when the client accepts it
     """
     try:
+        requested_fields = parse_fields(fields)
+        profile_mode = parse_profile_mode(http_request.headers.get("x-jtbd-profile"))
+        profile_paths = None
+        
         logger.info(f"Processing query: {request.query}")
-        # Process the query using the JTBD Multi-Agent System
-        result = jtbd_system.process_query(request.query)
+        
+        stage_timings = StageTimings()
+        with collect_timings(stage_timings):
+            triage_result = await run_in_threadpool(jtbd_system.triage_agent.triage, request.query)
+            
+            # Responses are cached already serialized, so hits skip encoding
+            cache_key = jtbd_system.analysis_key(triage_result, requested_fields, approximate) + (limit, cursor, job_refs)
+            payload = None if profile_mode else response_cache.get(cache_key)
+            
+            if profile_mode:
+                stage_timings.notes["cache"] = "bypass"
+                payload, profile_paths = await run_in_threadpool(
+                    profiler.run, profile_mode, triage_result["topic"],
+                    compute_payload, triage_result, requested_fields, limit, cursor, job_refs, approximate
+                )
+            elif payload is None:
+                stage_timings.notes["cache"] = "miss"
+                # Identical concurrent requests await the same computation
+                payload = await request_flights.do_async(
+                    cache_key, build_payload, cache_key, triage_result, requested_fields, limit, cursor, job_refs,
+                    approximate
+                )
+            else:
+                stage_timings.notes["cache"] = "hit"
+                logger.info(f"Serving cached response for topic: {triage_result['topic']}")
+        
+        stage_timings.flush()
+        if timings:
+            payload = payload.with_extra("timings", stage_timings.as_dict())
+        
         logger.info("Query processed successfully")
-        return result
+        response = json_response(payload, http_request)
+        if profile_mode:
+            response.headers["X-JTBD-Profile"] = (
+                ", ".join(path.name for path in profile_paths) if profile_paths else "rate-limited"
+            )
+        return response
+    
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    except MemoryBudgetExceeded as e:
+        logger.warning(str(e))
+        raise HTTPException(status_code=503, detail=str(e))
     
     except Exception as e:
         logger.error(f"Error processing query: {str(e)}")
         logger.error(traceback.format_exc())
         raise HTTPException(status_code=500, detail=f"Error processing query: {str(e)}")
 
+async def build_payload(cache_key, triage_result, fields, limit, cursor, job_refs, approximate=False):
+    """
+    Process a triaged query off the event loop and cache the encoded response.
+    
+    Args:
+        cache_key (tuple): Key to store the response under
+        triage_result (dict): Result of TriageAgent.triage
+        fields (list, optional): Analysis sections to build
+        limit (int, optional): Page size for each job list
+        cursor (str, optional): Cursor for the next page of job lists
+        job_refs (bool): Whether to reference jobs by id
+        approximate (bool): Whether to analyze a sample of the data
+        
+    Returns:
+        EncodedPayload: The serialized response
+    """
+    profile_mode = profiler.automatic_mode()
+    if profile_mode:
+        payload, _ = await run_in_threadpool(
+            profiler.run, profile_mode, triage_result["topic"],
+            compute_payload, triage_result, fields, limit, cursor, job_refs, approximate
+        )
+    else:
+        payload = await run_in_threadpool(
+            compute_payload, triage_result, fields, limit, cursor, job_refs, approximate
+        )
+    response_cache.put(cache_key, payload)
+    return payload
+
+def compute_payload(triage_result, fields=None, limit=None, cursor=None, job_refs=False, approximate=False):
+    """Process a triaged query and serialize the paginated response."""
+    # Process the query using the JTBD Multi-Agent System
+    result = jtbd_system.process_triage_result(triage_result, fields=fields, approximate=approximate)
+    result = paginate_response(result, limit=limit, cursor=cursor, job_refs=job_refs)
+    return EncodedPayload(result)
+
+def warm_topic(triage_result):
+    """Compute and cache the default /process response for a triaged topic."""
+    cache_key = jtbd_system.analysis_key(triage_result) + (None, None, False)
+    if cache_key not in response_cache:
+        response_cache.put(cache_key, compute_payload(triage_result))
+
+def json_response(payload, http_request):
+    """
+    Build a JSON response from an encoded payload, negotiating compression.
+    
+    Args:
+        payload (EncodedPayload): The serialized response body
+        http_request (Request): The incoming request
+        
+    Returns:
+        Response: The (possibly compressed) JSON response
+    """
+    encoding = negotiate_encoding(http_request.headers.get("accept-encoding"))
+    body, applied_encoding = payload.encoded(encoding)
+    
+    headers = {"Vary": "Accept-Encoding"}
+    if applied_encoding:
+        headers["Content-Encoding"] = applied_encoding
+    
+    return Response(content=body, media_type="application/json", headers=headers)
+
+def parse_fields(fields):
+    """
+    Split a comma-separated fields parameter, or return None for all fields.
+    
+    Raises:
+        ValueError: If an unknown analysis section is requested
+    """
+    if not fields:
+        return None
+    fields = [field.strip() for field in fields.split(",") if field.strip()]
+    resolve_fields(fields)
+    return fields
+
+def parse_profile_mode(header):
+    """Map an X-JTBD-Profile header value to a profiling mode, or None."""
+    if not header or header.lower() in ("0", "false", "no"):
+        return None
+    if header.lower() in ("1", "true", "yes"):
+        return "cprofile"
+    return header.lower()
+
+@app.post("/process/stream")
+async def process_query_stream(
+    request: QueryRequest,
+    fields: Optional[str] = Query(None, description="Comma-separated analysis sections to include"),
+    approximate: bool = Query(False, description="Analyze a stratified sample and estimate frequencies")
+):
+    """
+    Process a user query, streaming each stage as a Server-Sent Event.
+    
+    Events are emitted in order as "triage", "jobs", "themes", "analysis"
+    and "research_plan" (depending on the route), followed by a final
+    "result" event carrying the same payload as /process. Failures are
+    reported as an "error" event since the response has already started.
+    
+    Args:
+        request: QueryRequest containing the user's query
+        fields: Comma-separated analysis sections to build and return
+        approximate: Whether to cluster a sample of the data, reporting
+            estimated frequencies with confidence intervals
+        
+    Returns:
+        StreamingResponse: A text/event-stream of stage events
+    """
+    # Validated before the stream starts, so bad requests still get a 400
+    try:
+        requested_fields = parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    def event_stream():
+        try:
+            logger.info(f"Streaming query: {request.query}")
+            for stage, payload in jtbd_system.process_query_stages(
+                request.query, fields=requested_fields, approximate=approximate
+            ):
+                yield format_sse(stage, payload)
+            logger.info("Streamed query processed successfully")
+        
+        except Exception as e:
+            logger.error(f"Error streaming query: {str(e)}")
+            logger.error(traceback.format_exc())
+            yield format_sse("error", {"detail": f"Error processing query: {str(e)}"})
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def format_sse(event, data):
+    """Format a single Server-Sent Event."""
+    return f"event: {event}\ndata: {dumps(data).decode('utf-8')}\n\n"
+
+@app.post("/compare")
+async def compare_topics(request: QueryRequest, http_request: Request):
+    """
+    Process a query comparing several topics, e.g. "compare X vs Y".
+    
+    Args:
+        request: QueryRequest containing the user's comparison query
+        
+    Returns:
+        Response: JSON with per-topic results and the shared-theme comparison
+    """
+    try:
+        logger.info(f"Processing comparison query: {request.query}")
+        result = await run_in_threadpool(jtbd_system.process_multi_topic_query, request.query)
+        logger.info("Comparison query processed successfully")
+        return json_response(EncodedPayload(result), http_request)
+    
+    except Exception as e:
+        logger.error(f"Error processing comparison query: {str(e)}")
+        logger.error(traceback.format_exc())
+        raise HTTPException(status_code=500, detail=f"Error processing comparison query: {str(e)}")
+
+@app.post("/segments")
+async def segment_topic(
+    request: QueryRequest,
+    http_request: Request,
+    by: Optional[str] = Query(None, description="Demographic dimension: age_band, gender or experience_level")
+):
+    """
+    Break the themes and jobs of a query's topic down by demographic segment.
+    
+    Args:
+        request: QueryRequest containing the user's query
+        by: Dimension to segment by; all dimensions when omitted
+        
+    Returns:
+        Response: JSON with per-segment theme shares and top jobs
+    """
+    try:
+        logger.info(f"Processing segment query: {request.query}")
+        result = await run_in_threadpool(jtbd_system.process_segments, request.query, by)
+        return json_response(EncodedPayload(result), http_request)
+    
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    except MemoryBudgetExceeded as e:
+        logger.warning(str(e))
+        raise HTTPException(status_code=503, detail=str(e))
+    
+    except Exception as e:
+        logger.error(f"Error processing segment query: {str(e)}")
+        logger.error(traceback.format_exc())
+        raise HTTPException(status_code=500, detail=f"Error processing segment query: {str(e)}")
+
+@app.get("/topics/{topic}/jobs/similar")
+async def similar_jobs(
+    topic: str,
+    http_request: Request,
+    q: str = Query(..., min_length=1, description="Statement to find similar jobs for"),
+    limit: int = Query(10, ge=1, le=100, description="Maximum number of jobs returned")
+):
+    """
+    Find the jobs most similar to a statement.
+    
+    Args:
+        topic: The topic to search, or "all" for every topic
+        q: The statement
+        limit: Maximum number of jobs returned
+        
+    Returns:
+        Response: JSON with the most similar jobs and their scores
+    """
+    try:
+        result = await run_in_threadpool(jtbd_system.similar_jobs, topic, q, limit)
+    
+    except MemoryBudgetExceeded as e:
+        logger.warning(str(e))
+        raise HTTPException(status_code=503, detail=str(e))
+    
+    except Exception as e:
+        logger.error(f"Error finding similar jobs: {str(e)}")
+        logger.error(traceback.format_exc())
+        raise HTTPException(status_code=500, detail=f"Error finding similar jobs: {str(e)}")
+    
+    if result is None:
+        raise HTTPException(status_code=404, detail="No research data found for the specified topic")
+    
+    return json_response(EncodedPayload(result), http_request)
+
+@app.post("/jobs", status_code=202)
+async def create_job(
+    request: QueryRequest,
+    fields: Optional[str] = Query(None, description="Comma-separated analysis sections to include"),
+    approximate: bool = Query(False, description="Analyze a stratified sample and estimate frequencies")
+):
+    """
+    Queue a query for background processing and return its job id right away.
+    
+    Args:
+        request: QueryRequest containing the user's query
+        fields: Comma-separated analysis sections to build and return
+        approximate: Whether to cluster a sample of the data, reporting
+            estimated frequencies with confidence intervals
+        
+    Returns:
+        dict: The job id, its status and where to poll for status and result
+    """
+    try:
+        requested_fields = parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    job = job_manager.submit(request.query, fields=requested_fields, approximate=approximate)
+    
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "status_url": f"/jobs/{job['id']}",
+        "result_url": f"/jobs/{job['id']}/result"
+    }
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """
+    Get the status and progress of a background job.
+    
+    Args:
+        job_id: The job id returned by POST /jobs
+        
+    Returns:
+        dict: Job status, current stage and progress (0-1)
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    
+    return {
+        "job_id": job["id"],
+        "query": job["query"],
+        "status": job["status"],
+        "stage": job["stage"],
+        "progress": job["progress"],
+        "error": job["error"],
+        "created_at": job["created_at"],
+        "updated_at": job["updated_at"],
+        "finished_at": job["finished_at"]
+    }
+
+@app.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: str, http_request: Request):
+    """
+    Get the result of a completed background job.
+    
+    Args:
+        job_id: The job id returned by POST /jobs
+        http_request: The incoming request, used for compression negotiation
+        
+    Returns:
+        Response: The same JSON /process would have returned
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    
+    if job["status"] == FAILED:
+        raise HTTPException(status_code=500, detail=f"Error processing query: {job['error']}")
+    
+    if job["status"] != COMPLETED:
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}")
+    
+    return json_response(EncodedPayload.from_body(job["result"]), http_request)
+
 if __name__ == "__main__":
     # Run the FastAPI app with uvicorn
     logger.info("Starting API server on port 8002")
@@ -0,0 +1,144 @@
+"""
+Benchmark job type classification: keyword rules against a trained model.
+
+Writes a seeded labeled corpus with TestDataGenerator (or reads the data
+files of --data-dir), trains a model on part of it and reports, on the
+held-out entries, each classifier's accuracy (types exactly the label),
+recall (label among the types) and throughput. The rule loop is the
+per-statement keyword matching the agent used before batching. Run from
+the repository root:
+
+    python -m bench.classifier --entries 100000
+"""
+import sys
+import json
+import time
+import logging
+import argparse
+import tempfile
+from pathlib import Path
+from agents.jtbd_agent import JOB_TYPE_INDICATORS
+from utils.data_generator import TestDataGenerator
+from utils.job_classifier import (
+    KeywordClassifier, TrainedClassifier, read_labeled_entries, holdout_split, evaluate_classifier
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ENTRIES = 100000
+DEFAULT_TOPIC = "benchmark workspace"
+DEFAULT_SEED = 42
+
+
+class RuleLoop:
+    """Keyword rules applied one statement at a time, as a baseline."""
+
+    def predict(self, statements, contexts):
+        predictions = []
+        for statement, context in zip(statements, contexts):
+            text = statement.lower() + " " + context.lower()
+            job_types = [
+                job_type for job_type, indicators in JOB_TYPE_INDICATORS.items()
+                if any(indicator in text for indicator in indicators)
+            ]
+            predictions.append(job_types or ["functional"])
+        return predictions
+
+
+def time_predictions(classifier, statements, contexts, repeat):
+    """Return the best entries per second of a classifier over the statements."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        classifier.predict(statements, contexts)
+        best = min(best, time.perf_counter() - start)
+    return len(statements) / best if best else float("inf")
+
+
+def run_benchmark(data_directory, holdout, seed, repeat):
+    """
+    Train a model on the labeled entries of a directory and compare classifiers.
+
+    Args:
+        data_directory (str): Directory holding labeled data files
+        holdout (float): Share of entries held out for evaluation
+        seed (int): Seed of the holdout split
+        repeat (int): Timing repetitions (the best is reported)
+
+    Returns:
+        list: One result row per classifier
+    """
+    statements, contexts, labels = read_labeled_entries(data_directory)
+    train, test = holdout_split(len(labels), holdout, seed)
+    held_out = ([statements[i] for i in test], [contexts[i] for i in test], [labels[i] for i in test])
+
+    with tempfile.TemporaryDirectory() as model_directory:
+        start = time.perf_counter()
+        model = TrainedClassifier.train(
+            [statements[i] for i in train], [contexts[i] for i in train], [labels[i] for i in train],
+            Path(model_directory) / "job_types.npz"
+        )
+        model.types  # Load the model before timing
+        train_seconds = time.perf_counter() - start
+
+        classifiers = [
+            ("rule loop", RuleLoop()),
+            ("keyword batch", KeywordClassifier(JOB_TYPE_INDICATORS)),
+            ("trained batch", model)
+        ]
+        rows = []
+        for name, classifier in classifiers:
+            scores = evaluate_classifier(classifier, *held_out)
+            rows.append({
+                "classifier": name,
+                "entries": len(test),
+                "accuracy": scores["accuracy"],
+                "recall": scores["recall"],
+                "entries_per_second": time_predictions(classifier, held_out[0], held_out[1], repeat),
+            })
+
+    logger.info(f"Trained on {len(train)} entries in {train_seconds:.2f}s")
+    return rows
+
+
+def print_rows(rows):
+    """Print benchmark rows as a table."""
+    columns = list(rows[0].keys())
+    print(" ".join(f"{column:>18}" for column in columns))
+    for row in rows:
+        print(" ".join(
+            f"{row[column]:>18.3f}" if isinstance(row[column], float) else f"{row[column]:>18}"
+            for column in columns
+        ))
+
+
+def main():
+    """Run the classifier benchmark from the command line."""
+    parser = argparse.ArgumentParser(description="Benchmark keyword rules against a trained job type model")
+    parser.add_argument("--data-dir", help="Use the labeled data files of this directory instead of generating")
+    parser.add_argument("--entries", type=int, default=DEFAULT_ENTRIES, help="Entries of the generated corpus")
+    parser.add_argument("--holdout", type=float, default=0.2, help="Share of entries held out for evaluation")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="Seed of the corpus and holdout split")
+    parser.add_argument("--repeat", type=int, default=3, help="Timing repetitions")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, stream=sys.stdout, format="%(message)s")
+    logging.getLogger("utils").setLevel(logging.WARNING)
+
+    if args.data_dir:
+        rows = run_benchmark(args.data_dir, args.holdout, args.seed, args.repeat)
+    else:
+        with tempfile.TemporaryDirectory() as data_directory:
+            TestDataGenerator(data_directory).write_corpus(DEFAULT_TOPIC, args.entries, seed=args.seed)
+            rows = run_benchmark(data_directory, args.holdout, args.seed, args.repeat)
+
+    print_rows(rows)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(rows, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
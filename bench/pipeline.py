@@ -0,0 +1,238 @@
+"""
+Benchmark the analysis pipeline on synthetic corpora of increasing size.
+
+For each size a seeded corpus is written with TestDataGenerator, then
+process_query is run against it in a fresh process, so the reported peak
+memory belongs to that size alone. Stage durations come from the same
+instrumentation that feeds /metrics. Run from the repository root:
+
+    python -m bench.pipeline --sizes 1000 10000 100000 1000000 --output results.json
+
+Results written with --output can be passed to --compare on a later
+commit to print the relative change per size.
+"""
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+import subprocess
+import tempfile
+import multiprocessing
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from main import JTBDMultiAgentSystem
+from services.metrics import StageTimings, collect_timings
+from utils.data_generator import TestDataGenerator
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000]
+DEFAULT_TOPIC = "benchmark workspace"
+DEFAULT_SEED = 42
+
+
+def peak_rss_mb():
+    """Return the peak resident set size of this process in MB, if known."""
+    if resource is None:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(peak / divisor, 1)
+
+
+def time_pipeline(data_directory, topic, repeat):
+    """
+    Time process_query against a corpus; runs in a dedicated process.
+
+    Args:
+        data_directory (str): Directory holding the generated corpus
+        topic (str): Topic of the corpus
+        repeat (int): Number of runs (the fastest is reported)
+
+    Returns:
+        dict: Route, total and per-stage durations, and memory use
+    """
+    logging.getLogger().setLevel(logging.WARNING)
+
+    system = JTBDMultiAgentSystem(data_directory)
+    query = f"What are the jobs to be done for {topic}?"
+    route = system.triage_agent.triage(query)["data_completeness"]
+    baseline_rss_mb = peak_rss_mb()
+
+    runs = []
+    for _ in range(repeat):
+        timings = StageTimings()
+        with collect_timings(timings):
+            system.process_query(query)
+        runs.append(timings.as_dict())
+
+    best = min(runs, key=lambda run: run["total_ms"])
+    return {
+        "route": route,
+        "total_ms": best["total_ms"],
+        "stages_ms": best["stages_ms"],
+        "baseline_rss_mb": baseline_rss_mb,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def run_size(entries_count, topic, seed, repeat, data_format="json"):
+    """
+    Generate a corpus of `entries_count` entries and benchmark it.
+
+    Args:
+        entries_count (int): Number of research entries
+        topic (str): Topic of the corpus
+        seed (int): Generator seed
+        repeat (int): Number of pipeline runs
+        data_format (str): Corpus file format, "json" or "jsonl"
+
+    Returns:
+        dict: One result row
+    """
+    with tempfile.TemporaryDirectory(prefix="jtbd-bench-") as data_directory:
+        start_time = time.perf_counter()
+        TestDataGenerator(data_directory).write_corpus(topic, entries_count, data_format, seed=seed)
+        generate_seconds = time.perf_counter() - start_time
+        corpus_bytes = sum(path.stat().st_size for path in Path(data_directory).iterdir())
+
+        # A fresh process per size keeps peak memory figures independent
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            row = executor.submit(time_pipeline, data_directory, topic, repeat).result()
+
+    return {
+        "entries": entries_count,
+        "corpus_mb": round(corpus_bytes / (1024 * 1024), 2),
+        "generate_s": round(generate_seconds, 3),
+        **row
+    }
+
+
+def run_benchmark(sizes, topic=DEFAULT_TOPIC, seed=DEFAULT_SEED, repeat=1, data_format="json"):
+    """
+    Benchmark the pipeline at each corpus size.
+
+    Args:
+        sizes (list): Corpus sizes in entries
+        topic (str): Topic of the generated corpora
+        seed (int): Generator seed
+        repeat (int): Pipeline runs per size
+        data_format (str): Corpus file format, "json" or "jsonl"
+
+    Returns:
+        dict: Run metadata and one result row per size
+    """
+    results = []
+    for entries_count in sizes:
+        logger.info(f"Benchmarking {entries_count} entries")
+        results.append(run_size(entries_count, topic, seed, repeat, data_format))
+
+    return {
+        "benchmark": "pipeline",
+        "commit": git_commit(),
+        "created_at": time.time(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "topic": topic,
+        "seed": seed,
+        "repeat": repeat,
+        "format": data_format,
+        "results": results,
+    }
+
+
+def git_commit():
+    """Return the current git commit, or None outside a checkout."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(report):
+    """Print total time, memory and per-stage durations for each size."""
+    stages = sorted({stage for row in report["results"] for stage in row["stages_ms"]})
+    columns = ["entries", "route", "total_ms", "peak_rss_mb", *stages]
+
+    print(" ".join(f"{column:>18}" for column in columns))
+    for row in report["results"]:
+        values = [row["entries"], row["route"], row["total_ms"], row["peak_rss_mb"]]
+        values += [row["stages_ms"].get(stage, 0.0) for stage in stages]
+        print(" ".join(
+            f"{value:>18.1f}" if isinstance(value, float) else f"{str(value):>18}" for value in values
+        ))
+
+
+def print_comparison(report, baseline):
+    """
+    Print the change in total time and peak memory against a baseline report.
+
+    Args:
+        report (dict): Results of this run
+        baseline (dict): Results loaded from an earlier --output file
+    """
+    baseline_rows = {row["entries"]: row for row in baseline["results"]}
+    print(f"\nCompared with {baseline.get('commit') or 'baseline'}:")
+
+    for row in report["results"]:
+        previous = baseline_rows.get(row["entries"])
+        if previous is None:
+            continue
+
+        changes = []
+        for metric in ["total_ms", "peak_rss_mb"]:
+            if row[metric] and previous[metric]:
+                changes.append(f"{metric} {(row[metric] - previous[metric]) / previous[metric] * 100:+.1f}%")
+        print(f"{row['entries']:>10} entries: {', '.join(changes)}")
+
+
+def add_arguments(parser):
+    """Add the benchmark's options to an argument parser."""
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Corpus sizes in entries")
+    parser.add_argument("--topic", default=DEFAULT_TOPIC, help="Topic of the generated corpora")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="Data generator seed")
+    parser.add_argument("--repeat", type=int, default=1, help="Pipeline runs per size (the fastest is reported)")
+    parser.add_argument("--format", choices=["json", "jsonl"], default="json", help="Corpus file format")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--compare", help="Results file from an earlier run to compare against")
+
+
+def run_from_args(args):
+    """Run the benchmark for parsed command line arguments."""
+    report = run_benchmark(args.sizes, args.topic, args.seed, args.repeat, args.format)
+    print_results(report)
+
+    if args.compare:
+        with open(args.compare, "r") as file:
+            print_comparison(report, json.load(file))
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+def main():
+    """Run the pipeline benchmark from the command line."""
+    parser = argparse.ArgumentParser(description="Benchmark the analysis pipeline on synthetic corpora")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    run_from_args(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Benchmark response serialization and compression.
+
+Compares FastAPI's default path (jsonable_encoder + stdlib json) with the
+fast path in services.serialization, and reports payload sizes for each
+content coding. Run from the repository root:
+
+    python -m bench.serialization --scale 1 10 100
+"""
+import sys
+import json
+import timeit
+import logging
+import argparse
+from fastapi.encoders import jsonable_encoder
+from main import JTBDMultiAgentSystem
+from services.serialization import dumps, compress, SUPPORTED_ENCODINGS, orjson
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUERY = "What are the jobs to be done for online grocery shopping?"
+
+
+def stdlib_encode(result):
+    """Encode the way FastAPI does for a plain dict return value."""
+    return json.dumps(jsonable_encoder(result)).encode("utf-8")
+
+
+def scale_analysis(analysis, factor):
+    """
+    Build a larger analysis by cloning every job `factor` times.
+
+    Cloned statements get a numeric suffix so they stay distinct, which
+    keeps compression ratios realistic.
+
+    Args:
+        analysis (dict): A JTBD analysis
+        factor (int): Number of copies of each job
+
+    Returns:
+        dict: The scaled analysis
+    """
+    if factor <= 1:
+        return analysis
+
+    def clone_jobs(jobs):
+        return [
+            {**job, "id": f"{job['id']}-{copy}", "statement": f"{job['statement']} ({copy})"}
+            for copy in range(factor)
+            for job in jobs
+        ]
+
+    scaled = dict(analysis)
+    for field in ["functional_jobs", "social_jobs", "emotional_jobs"]:
+        scaled[field] = clone_jobs(analysis.get(field, []))
+    scaled["themes"] = [
+        {**theme, "jobs": clone_jobs(theme["jobs"])} for theme in analysis.get("themes", [])
+    ]
+
+    return scaled
+
+
+def time_encoder(encoder, result, repeat):
+    """Return the best per-call time of an encoder in milliseconds."""
+    timer = timeit.Timer(lambda: encoder(result))
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1000
+
+
+def run_benchmark(query, scales, repeat):
+    """
+    Benchmark serialization of the response to `query` at several scales.
+
+    Args:
+        query (str): Query whose response is serialized
+        scales (list): Job multiplication factors
+        repeat (int): Timing repetitions (the best is reported)
+
+    Returns:
+        list: One result row per scale
+    """
+    system = JTBDMultiAgentSystem()
+    base_result = system.process_query(query)
+
+    rows = []
+    for scale in scales:
+        result = scale_analysis(base_result, scale)
+
+        body = dumps(result)
+        row = {
+            "scale": scale,
+            "stdlib_ms": time_encoder(stdlib_encode, result, repeat),
+            "fast_ms": time_encoder(dumps, result, repeat),
+            "stdlib_bytes": len(stdlib_encode(result)),
+            "fast_bytes": len(body),
+        }
+        for encoding in SUPPORTED_ENCODINGS:
+            row[f"{encoding}_bytes"] = len(compress(body, encoding))
+            row[f"{encoding}_ms"] = time_encoder(lambda r: compress(body, encoding), result, repeat)
+
+        rows.append(row)
+
+    return rows
+
+
+def print_rows(rows):
+    """Print benchmark rows as a table."""
+    columns = list(rows[0].keys())
+    print(" ".join(f"{column:>14}" for column in columns))
+    for row in rows:
+        print(" ".join(
+            f"{row[column]:>14.3f}" if isinstance(row[column], float) else f"{row[column]:>14}"
+            for column in columns
+        ))
+
+
+def main():
+    """Run the serialization benchmark from the command line."""
+    parser = argparse.ArgumentParser(description="Benchmark API response serialization")
+    parser.add_argument("--query", default=DEFAULT_QUERY, help="Query whose response is serialized")
+    parser.add_argument("--scale", type=int, nargs="+", default=[1, 10, 100], help="Job multiplication factors")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing repetitions")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, stream=sys.stdout)
+
+    rows = run_benchmark(args.query, args.scale, args.repeat)
+
+    print(f"Fast encoder: {'orjson' if orjson else 'stdlib json (orjson not installed)'}")
+    print_rows(rows)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(rows, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,21 @@
+import os
 import sys
 import json
 import logging
 import argparse
 from main import JTBDMultiAgentSystem
-from utils.data_generator import TestDataGenerator
+from agents.researcher_agent import ResearcherAgent
+from services.plan_store import SQLitePlanStore
+from utils.data_generator import TestDataGenerator, generate_corpora
+from utils.corpus_stats import SEGMENT_DIMENSIONS
+from utils.job_classifier import (
+    KeywordClassifier, TrainedClassifier, HASHED_FEATURES, MAX_NGRAM, MODELS_DIRECTORY, DEFAULT_MODEL_FILE,
+    read_labeled_entries, holdout_split, evaluate_classifier
+)
+from agents.jtbd_agent import JOB_TYPE_INDICATORS
+from bench import pipeline as pipeline_bench
+from services.metrics import StageTimings, collect_timings, enable_memory_tracking
+from services.profiling import Profiler
 
 # Setup logging
 logging.basicConfig(
@@ -25,46 +37,192 @@ def parse_args():
     # Query parser
     query_parser = subparsers.add_parser("query", help="Process a user query")
     query_parser.add_argument("text", type=str, help="The query text to process")
+    query_parser.add_argument("--profile", nargs="?", const="cprofile", choices=["cprofile", "sample"],
+                              help="Profile the query and write .pstats/.collapsed files")
+    query_parser.add_argument("--profile-dir", default="profiles", help="Directory for profile files")
+    query_parser.add_argument("--trace-memory", action="store_true", help="Report peak/retained memory per stage")
+    
+    # Compare parser
+    compare_parser = subparsers.add_parser("compare", help="Compare several topics, e.g. \"X vs Y\"")
+    compare_parser.add_argument("text", type=str, help="The comparison query text to process")
+    
+    # Segments parser
+    segments_parser = subparsers.add_parser("segments", help="Break a topic's themes down by demographic segment")
+    segments_parser.add_argument("text", type=str, help="The query text to process")
+    segments_parser.add_argument("--by", choices=SEGMENT_DIMENSIONS, help="Dimension to segment by (default: all)")
     
     # Generate data parser
     generate_parser = subparsers.add_parser("generate", help="Generate test data")
-    generate_parser.add_argument("topic", type=str, help="The topic to generate data for")
+    generate_parser.add_argument("topic", type=str, nargs="+", help="The topic(s) to generate data for")
     generate_parser.add_argument("--complete", action="store_true", help="Generate complete data")
     generate_parser.add_argument("--partial", action="store_true", help="Generate partial data")
+    generate_parser.add_argument("--seed", type=int, help="Seed for reproducible data")
+    generate_parser.add_argument("--entries", type=int, help="Write a large complete dataset with this many entries per topic")
+    generate_parser.add_argument("--format", choices=["jsonl", "json"], default="jsonl", help="File format for --entries")
+    generate_parser.add_argument("--workers", type=int, help="Worker processes for --entries (default: CPU count)")
+    generate_parser.add_argument("--data-dir", default="data", help="Directory to write data files to")
+    
+    # Research plan parser
+    plans_parser = subparsers.add_parser("plans", help="Prebuild research plans for topics without data")
+    plans_parser.add_argument("topic", type=str, nargs="*", help="The topic(s) to build plans for")
+    plans_parser.add_argument("--file", help="File with one topic per line")
+    plans_parser.add_argument("--db", default=os.getenv("JTBD_PLAN_DB", "plans.db"), help="SQLite plan database")
+    
+    # Classifier training parser
+    train_parser = subparsers.add_parser("train-classifier",
+                                         help="Train the job type model on the labeled entries of the data files")
+    train_parser.add_argument("--data-dir", default="data", help="Directory holding the labeled data files")
+    train_parser.add_argument("--output", help=f"Model file (default: <data-dir>/{MODELS_DIRECTORY}/{DEFAULT_MODEL_FILE})")
+    train_parser.add_argument("--holdout", type=float, default=0.2, help="Share of entries held out for evaluation")
+    train_parser.add_argument("--seed", type=int, default=42, help="Seed of the holdout split")
+    train_parser.add_argument("--features", type=int, default=HASHED_FEATURES, help="Hashed feature dimensions")
+    train_parser.add_argument("--ngrams", type=int, default=MAX_NGRAM, help="Longest word n-gram used as a feature")
+    
+    # Benchmark parser
+    bench_parser = subparsers.add_parser("bench", help="Benchmark the pipeline on synthetic corpora")
+    pipeline_bench.add_arguments(bench_parser)
     
     return parser.parse_args()
 
-def process_query(query_text):
-    """Process a user query."""
+def process_query(query_text, profile=None, profile_dir="profiles", trace_memory=False):
+    """Process a user query, optionally under the profiler or with memory tracking."""
     system = JTBDMultiAgentSystem()
-    result = system.process_query(query_text)
+    if trace_memory:
+        enable_memory_tracking()
+    
+    timings = StageTimings()
+    with collect_timings(timings):
+        if profile:
+            profiler = Profiler(output_directory=profile_dir)
+            topic = system.triage_agent.triage(query_text)["topic"]
+            result, profile_paths = profiler.run(profile, topic, system.process_query, query_text)
+        else:
+            result = system.process_query(query_text)
     
     # Pretty print the result
     print("\n===== JTBD Multi-Agent System Result =====")
     print(f"Query: {query_text}")
     print("\nResult:")
     print(json.dumps(result, indent=2))
+    
+    if profile:
+        print("\nProfile written to:")
+        for path in profile_paths:
+            print(f"  {path}")
+    
+    if trace_memory:
+        print("\nMemory by stage (peak / retained MB):")
+        for stage, usage in timings.as_dict().get("memory_bytes", {}).items():
+            print(f"  {stage:<24} {usage['peak'] / 2 ** 20:>8.2f} / {usage['retained'] / 2 ** 20:.2f}")
+
+def compare_topics(query_text):
+    """Process a query comparing several topics."""
+    system = JTBDMultiAgentSystem()
+    result = system.process_multi_topic_query(query_text)
+    
+    print("\n===== JTBD Multi-Agent System Comparison =====")
+    print(f"Query: {query_text}")
+    print("\nResult:")
+    print(json.dumps(result, indent=2))
 
-def generate_data(topic, complete=False, partial=False):
+def segment_topic(query_text, dimension=None):
+    """Break a query's topic down by demographic segment."""
+    system = JTBDMultiAgentSystem()
+    result = system.process_segments(query_text, dimension)
+    
+    print("\n===== JTBD Multi-Agent System Segments =====")
+    print(f"Query: {query_text}")
+    print("\nResult:")
+    print(json.dumps(result, indent=2))
+
+def generate_data(topic, complete=False, partial=False, seed=None, data_directory="data"):
     """Generate test data for a topic."""
     if not complete and not partial:
         complete = True  # Default to complete if neither is specified
     
-    generator = TestDataGenerator()
+    generator = TestDataGenerator(data_directory, seed=seed)
     data = generator.generate_data(topic, complete=complete, partial=partial)
     
     print(f"\nGenerated {'complete' if complete else 'partial'} test data for topic: {topic}")
-    print(f"Data saved to: data/{topic.lower().replace(' ', '_')}_{('complete' if complete else 'partial')}.json")
+    print(f"Data saved to: {data_directory}/{topic.lower().replace(' ', '_')}_{('complete' if complete else 'partial')}.json")
+
+def generate_large_data(topics, entries_count, seed=None, data_format="jsonl", max_workers=None, data_directory="data"):
+    """Write large seeded datasets for several topics in parallel."""
+    file_paths = generate_corpora(topics, entries_count, seed, data_directory, data_format, max_workers)
+    
+    print(f"\nGenerated {entries_count} entries per topic (seed: {seed})")
+    for file_path in file_paths:
+        print(f"Data saved to: {file_path}")
+
+def build_plans(topics, topics_file=None, db_path="plans.db"):
+    """Generate research plans for many topics and store them in a plan database."""
+    if topics_file:
+        with open(topics_file, "r") as file:
+            topics = list(topics) + [line.strip() for line in file if line.strip()]
+    
+    if not topics:
+        print("No topics given. Pass topics or --file.")
+        return
+    
+    store = SQLitePlanStore(db_path)
+    count = ResearcherAgent(plan_store=store).build_plans(topics)
+    
+    print(f"\nStored research plans for {count} topics in {db_path} ({len(store)} plans in total)")
+
+def train_classifier(data_directory="data", output=None, holdout=0.2, seed=42, n_features=HASHED_FEATURES,
+                     max_ngram=MAX_NGRAM):
+    """Train the job type model and compare it with the keyword rules on held-out entries."""
+    statements, contexts, labels = read_labeled_entries(data_directory)
+    if len(set(labels)) < 2:
+        print(f"Need labeled entries of at least two job types in {data_directory}; found {len(labels)} entries.")
+        return
+    
+    train, test = holdout_split(len(labels), holdout, seed)
+    output = output or os.path.join(data_directory, MODELS_DIRECTORY, DEFAULT_MODEL_FILE)
+    model = TrainedClassifier.train(
+        [statements[i] for i in train], [contexts[i] for i in train], [labels[i] for i in train], output,
+        n_features=n_features, max_ngram=max_ngram
+    )
+    
+    print(f"\nTrained on {len(train)} labeled entries; model saved to {output}")
+    if len(test):
+        held_out = ([statements[i] for i in test], [contexts[i] for i in test], [labels[i] for i in test])
+        for name, classifier in [("keyword rules", KeywordClassifier(JOB_TYPE_INDICATORS)), ("trained model", model)]:
+            scores = evaluate_classifier(classifier, *held_out)
+            print(f"  {name:<14} accuracy {scores['accuracy']:.3f}, recall {scores['recall']:.3f} "
+                  f"on {len(test)} held-out entries")
+    print("Set JTBD_JOB_CLASSIFIER=trained to classify statements with it.")
 
 def main():
     """Main function for the CLI."""
     args = parse_args()
     
     if args.command == "query":
-        process_query(args.text)
+        process_query(args.text, args.profile, args.profile_dir, args.trace_memory)
+    
+    elif args.command == "compare":
+        compare_topics(args.text)
+    
+    elif args.command == "segments":
+        segment_topic(args.text, args.by)
     
     elif args.command == "generate":
-        generate_data(args.topic, args.complete, args.partial)
+        if args.entries:
+            generate_large_data(args.topic, args.entries, args.seed, args.format, args.workers, args.data_dir)
+        else:
+            for topic in args.topic:
+                generate_data(topic, args.complete, args.partial, args.seed, args.data_dir)
+    
+    elif args.command == "plans":
+        logging.getLogger().setLevel(logging.WARNING)
+        build_plans(args.topic, args.file, args.db)
+    
+    elif args.command == "train-classifier":
+        train_classifier(args.data_dir, args.output, args.holdout, args.seed, args.features, args.ngrams)
+    
+    elif args.command == "bench":
+        logging.getLogger().setLevel(logging.WARNING)
+        pipeline_bench.run_from_args(args)
     
     else:
         print("Please specify a command. Use --help for more information.")
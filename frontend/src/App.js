@@ -6,16 +6,55 @@ import Header from './components/Header';
 import Footer from './components/Footer';
 import './App.css';
 
+// Read a text/event-stream response, calling onEvent(event, data) per event
+const readEventStream = async (response, onEvent) => {
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) {
+      break;
+    }
+    buffer += decoder.decode(value, { stream: true });
+
+    let boundary = buffer.indexOf('\n\n');
+    while (boundary !== -1) {
+      const rawEvent = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+
+      let event = 'message';
+      const dataLines = [];
+      rawEvent.split('\n').forEach((line) => {
+        if (line.startsWith('event:')) {
+          event = line.slice(6).trim();
+        } else if (line.startsWith('data:')) {
+          dataLines.push(line.slice(5).trim());
+        }
+      });
+      if (dataLines.length > 0) {
+        onEvent(event, JSON.parse(dataLines.join('\n')));
+      }
+
+      boundary = buffer.indexOf('\n\n');
+    }
+  }
+};
+
 function App() {
   const [results, setResults] = useState(null);
+  const [stages, setStages] = useState({});
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState(null);
 
   const handleSearch = async (query) => {
     setLoading(true);
     setError(null);
+    setResults(null);
+    setStages({});
     try {
-      const response = await fetch('/process', {
+      const response = await fetch('/process/stream', {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
@@ -27,8 +66,16 @@ function App() {
         throw new Error(`API error: ${response.status}`);
       }
 
-      const data = await response.json();
-      setResults(data);
+      // Render each stage as soon as the backend emits it
+      await readEventStream(response, (event, data) => {
+        if (event === 'result') {
+          setResults(data);
+        } else if (event === 'error') {
+          throw new Error(data.detail);
+        } else {
+          setStages((previous) => ({ ...previous, [event]: data }));
+        }
+      });
     } catch (err) {
       console.error('Error fetching results:', err);
       setError('An error occurred while processing your request. Please try again.');
@@ -55,6 +102,7 @@ function App() {
         <Container className="jtbd-container">
           <ResultsPanel 
             results={results} 
+            stages={stages} 
             loading={loading} 
             error={error} 
           />
@@ -4,7 +4,60 @@ import ThemeSection from './ThemeSection';
 import JobsSection from './JobsSection';
 import ResearchPlan from './ResearchPlan';
 
-const ResultsPanel = ({ results, loading, error }) => {
+const StageSpinner = ({ label }) => (
+  <div className="text-center my-4">
+    <Spinner animation="border" size="sm" role="status" variant="primary" className="me-2" />
+    <span className="text-muted">{label}</span>
+  </div>
+);
+
+const ResultsPanel = ({ results, stages, loading, error }) => {
+  // Render partial results while the remaining stages are still streaming in
+  if (loading && !error && stages?.triage) {
+    const { triage, jobs, themes, research_plan: researchPlan } = stages;
+    const hasData = triage.data_completeness !== 'none';
+    const needsResearch = triage.data_completeness !== 'complete';
+
+    return (
+      <div>
+        <h2 className="mb-4">
+          {hasData ? 'Analysis' : 'Research Plan'} for: {triage.topic}
+          {hasData && (
+            <Badge 
+              bg={needsResearch ? 'warning' : 'success'} 
+              text={needsResearch ? 'dark' : undefined} 
+              className="ms-2 reliability-badge"
+            >
+              {needsResearch ? 'Partial Analysis' : 'Complete Analysis'}
+            </Badge>
+          )}
+        </h2>
+
+        {hasData && (
+          themes 
+            ? <ThemeSection themes={themes.themes} /> 
+            : <StageSpinner label="Clustering themes..." />
+        )}
+        {hasData && (
+          jobs 
+            ? (
+              <JobsSection 
+                functionalJobs={jobs.functional_jobs}
+                socialJobs={jobs.social_jobs}
+                emotionalJobs={jobs.emotional_jobs}
+              />
+            ) 
+            : <StageSpinner label="Extracting jobs..." />
+        )}
+        {needsResearch && (
+          researchPlan 
+            ? <ResearchPlan researchPlan={researchPlan} topic={triage.topic} /> 
+            : <StageSpinner label="Generating research plan..." />
+        )}
+      </div>
+    );
+  }
+
   if (loading) {
     return (
       <div className="text-center mt-5">
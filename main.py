@@ -1,12 +1,29 @@
 import os
 import sys
 import logging
+import threading
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from dotenv import load_dotenv
 
 # Import agents
 from agents.triage_agent import TriageAgent
-from agents.jtbd_agent import JTBDAgent
+from agents.jtbd_agent import JTBDAgent, ANALYSIS_FIELDS, JOB_LIST_FIELDS
 from agents.researcher_agent import ResearcherAgent
+from services.cache import ResponseCache
+from services.plan_store import SQLitePlanStore
+from services.metrics import (
+    QUERIES, StageTimings, collect_timings, enable_memory_tracking, iterate_with_timings, memory_tracking_enabled, timed
+)
+from services.single_flight import SingleFlight
+from services.job_index import INDEX_DIRECTORY, JobIndex
+from services.pipeline import Node, Pipeline
+from services.profiling import profiling_active
+from services.task_graph import InlineExecutor
+from utils.corpus import discover_topics, find_topic_files, corpus_fingerprint, normalize_topic
+from utils.corpus_stats import CorpusStatsStore, SEGMENT_DIMENSIONS
+from utils.embeddings import EmbeddingCache, HashingEncoder, create_embedding_cache
+from utils.job_classifier import create_job_classifier
 
 # Setup logging
 logging.basicConfig(
@@ -21,56 +38,642 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv()
 
+# Analysis sections the researcher agent reads on the partial route
+RESEARCH_PLAN_FIELDS = ["themes", *JOB_LIST_FIELDS, "reliability", "coverage"]
+
+# Pipeline node producing the response of each route
+ROUTE_TARGETS = {
+    "complete": "complete_response",
+    "partial": "partial_response",
+    "none": "none_response",
+}
+
+# Topic name that searches similar jobs across every topic
+ALL_TOPICS = "all"
+
+# Upper bound on worker processes used for multi-topic queries
+MAX_TOPIC_WORKERS = int(os.getenv("JTBD_MAX_TOPIC_WORKERS", "4"))
+
+# Threads running the tasks of a route concurrently (shared by all queries)
+TASK_WORKERS = int(os.getenv("JTBD_TASK_WORKERS", "4"))
+
+# Note returned with analyses of partial data
+PARTIAL_DATA_NOTE = "The data is not sufficient to be fully reliable. Additional research is recommended."
+
+# Estimated memory an analysis may use before it streams its corpus (or is rejected)
+MEMORY_BUDGET_MB = float(os.getenv("JTBD_MEMORY_BUDGET_MB", "0"))
+MEMORY_BUDGET_ACTION = os.getenv("JTBD_MEMORY_BUDGET_ACTION", "downgrade")
+
+# SQLite database persisting research plans of topics without data; unset keeps them in memory only
+PLAN_DB_PATH = os.getenv("JTBD_PLAN_DB")
+
+# Statement vectors clustered into themes: "tfidf", or embeddings cached on disk
+# with "hashing" (hashed character n-grams) or "spacy" (JTBD_EMBEDDING_MODEL, installed locally)
+EMBEDDING_BACKEND = os.getenv("JTBD_EMBEDDINGS", "tfidf")
+EMBEDDING_MODEL = os.getenv("JTBD_EMBEDDING_MODEL")
+
+# Job type classification: "keyword" rules, or "trained" with a model from
+# `cli.py train-classifier` (JTBD_JOB_CLASSIFIER_MODEL, data/.models/job_types.npz by default)
+JOB_CLASSIFIER = os.getenv("JTBD_JOB_CLASSIFIER", "keyword")
+JOB_CLASSIFIER_MODEL = os.getenv("JTBD_JOB_CLASSIFIER_MODEL")
+
+# Per-stage tracemalloc accounting; slows analyses and runs route tasks serially, so off by default
+if os.getenv("JTBD_TRACE_MEMORY", "0").lower() in ("1", "true", "yes"):
+    enable_memory_tracking()
+
 class JTBDMultiAgentSystem:
     """Main class for the JTBD Multi-Agent System."""
     
-    def __init__(self):
-        """Initialize the multi-agent system."""
+    def __init__(self, data_directory="data"):
+        """
+        Initialize the multi-agent system.
+        
+        Args:
+            data_directory (str): Directory holding the research data files
+        """
         logger.info("Initializing JTBD Multi-Agent System")
+        self.data_directory = str(data_directory)
+        
+        # Corpus statistics shared by triage, reliability and research plans
+        self.corpus_stats = CorpusStatsStore(data_directory)
         
         # Initialize agents
-        self.triage_agent = TriageAgent()
-        self.jtbd_agent = JTBDAgent()
-        self.researcher_agent = ResearcherAgent()
+        self.triage_agent = TriageAgent(data_directory, corpus_stats=self.corpus_stats)
+        self.jtbd_agent = JTBDAgent(
+            data_directory,
+            memory_budget=int(MEMORY_BUDGET_MB * 2 ** 20) or None,
+            memory_budget_action=MEMORY_BUDGET_ACTION,
+            corpus_stats=self.corpus_stats,
+            embeddings=create_embedding_cache(EMBEDDING_BACKEND, data_directory, EMBEDDING_MODEL),
+            job_classifier=create_job_classifier(JOB_CLASSIFIER, data_directory, JOB_CLASSIFIER_MODEL)
+        )
+        self.researcher_agent = ResearcherAgent(plan_store=SQLitePlanStore(PLAN_DB_PATH) if PLAN_DB_PATH else None)
+        
+        # Worker pool for multi-topic queries, created on first use
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        
+        # Thread pool for the tasks of a route, created on first use
+        self._task_executor = None
+        self._task_executor_lock = threading.Lock()
+        
+        # Coalesces concurrent analyses of the same topic and data
+        self.flights = SingleFlight()
+        
+        # Segment aggregates per topic and corpus version, for every dimension at once
+        self.segment_cache = ResponseCache(max_entries=64, name="segments")
+        
+        # Index of job vectors for similarity search, created on first use
+        self._job_index = None
+        self._job_index_lock = threading.Lock()
+        
+        # Stages of every route as one graph of nodes provided by the agents
+        self.pipeline = Pipeline()
+        for provider in (self.jtbd_agent, self.researcher_agent, self):
+            self.pipeline.add_provider(provider)
     
-    def process_query(self, user_query):
+    def process_query(self, user_query, fields=None, approximate=False):
         """
         Process a user query through the multi-agent system.
         
         Args:
             user_query (str): The user's query about a topic
+            fields (iterable, optional): Sections of ANALYSIS_FIELDS to build;
+                all sections are built when omitted
+            approximate (bool): Analyze a sample of the data, see JTBDAgent._extract
             
         Returns:
             dict: The response from the appropriate agent(s)
         """
         logger.info(f"Processing query: {user_query}")
         
-        # Step 1: Triage the query
-        triage_result = self.triage_agent.triage(user_query)
+        with collect_timings(), timed("process_query"):
+            # Step 1: Triage the query
+            triage_result = self.triage_agent.triage(user_query)
+            
+            # Steps 2-3: Route based on data completeness
+            return self.process_triage_result(triage_result, fields, approximate)
+    
+    def process_triage_result(self, triage_result, fields=None, approximate=False):
+        """
+        Route an already triaged query to the appropriate agent(s).
+        
+        Lets callers inspect the resolved topic (e.g. to consult a cache)
+        before paying for the analysis. Concurrent calls for the same topic,
+        data and fields share a single computation, so the returned dict
+        must be treated as read-only.
         
-        # Step 2: Check data completeness
+        Args:
+            triage_result (dict): Result of TriageAgent.triage
+            fields (iterable, optional): Analysis sections to build
+            approximate (bool): Whether to analyze a sample of the data
+            
+        Returns:
+            dict: The response from the appropriate agent(s)
+        """
+        # Check data completeness
         data_completeness = triage_result.get("data_completeness", "none")
         topic = triage_result.get("topic", "")
         
-        # Step 3: Route to appropriate agent based on data completeness
-        if data_completeness == "complete":
-            logger.info(f"Complete data found for topic: {topic}. Routing to JTBD Agent.")
-            return self.jtbd_agent.analyze(topic, full_analysis=True)
+        # Route to appropriate agent based on data completeness
+        with timed("route"):
+            return self.flights.do(
+                self.analysis_key(triage_result, fields, approximate),
+                self._route, topic, data_completeness, fields, approximate
+            )
+    
+    def analysis_key(self, triage_result, fields=None, approximate=False):
+        """
+        Key identifying the response to a triaged query.
         
-        elif data_completeness == "partial":
-            logger.info(f"Partial data found for topic: {topic}. Routing to JTBD Agent with research suggestions.")
-            jtbd_analysis = self.jtbd_agent.analyze(topic, full_analysis=False)
-            research_suggestions = self.researcher_agent.generate_research_plan(topic, jtbd_analysis)
+        Two queries with the same key produce the same response: the same
+        resolved topic and route, unchanged data files, the same fields and
+        the same (exact or approximate) mode.
+        
+        Args:
+            triage_result (dict): Result of TriageAgent.triage
+            fields (iterable, optional): Analysis sections to build
+            approximate (bool): Whether the analysis is approximate
+            
+        Returns:
+            tuple: Hashable key
+        """
+        topic = triage_result.get("topic", "")
+        return (
+            topic,
+            triage_result.get("data_completeness", "none"),
+            self.corpus_fingerprint(topic),
+            tuple(sorted(fields)) if fields is not None else None,
+            approximate
+        )
+    
+    def corpus_fingerprint(self, topic):
+        """
+        Fingerprint the research data files for a topic.
+        
+        Args:
+            topic (str): The resolved topic
+            
+        Returns:
+            str: Digest that changes whenever the topic's data files change
+        """
+        return corpus_fingerprint(find_topic_files(self.triage_agent.data_directory, topic))
+    
+    def process_segments(self, user_query, dimension=None):
+        """
+        Break a topic's themes and jobs down by demographic segment.
+        
+        Segments of every dimension are computed together and cached per
+        corpus version, so switching dimension or segment is a lookup.
+        
+        Args:
+            user_query (str): The user's query about a topic
+            dimension (str, optional): One of SEGMENT_DIMENSIONS; all
+                dimensions are returned when omitted
             
-            return {
-                "jtbd_analysis": jtbd_analysis,
-                "research_suggestions": research_suggestions,
-                "note": "The data is not sufficient to be fully reliable. Additional research is recommended."
+        Returns:
+            dict: Result of JTBDAgent.analyze_segments, limited to `dimension`
+            
+        Raises:
+            ValueError: If the dimension is unknown
+        """
+        if dimension is not None and dimension not in SEGMENT_DIMENSIONS:
+            raise ValueError(f"Unknown segment dimension: {dimension}")
+        
+        topic = self.triage_agent.triage(user_query)["topic"]
+        key = (topic, self.corpus_fingerprint(topic))
+        
+        segments = self.segment_cache.get(key)
+        if segments is None:
+            segments = self.flights.do(("segments",) + key, self._run_pipeline, "segments", topic, key[1],
+                                       approximate=False)
+            self.segment_cache.put(key, segments)
+        
+        if dimension is None or "segments" not in segments:
+            return segments
+        return {**segments, "segments": {dimension: segments["segments"][dimension]}}
+    
+    def similar_jobs(self, topic, query, limit=10):
+        """
+        Find the jobs most similar to a statement, in one topic or across all.
+        
+        Jobs are looked up in a persistent IVF index (see JobIndex) of
+        their statement embeddings. A topic is indexed the first time it
+        is searched and re-indexed whenever its data files change. The
+        topic must name a discovered topic, so a fragment such as "grocery"
+        is not indexed as a topic of its own.
+        
+        Args:
+            topic (str): The topic (matched like its data file names), or ALL_TOPICS
+            query (str): Statement to find similar jobs for
+            limit (int): Maximum number of jobs returned
+            
+        Returns:
+            dict: "query", "topic" and the "results" with their similarity
+                "score", or None if the topic has no research data
+        """
+        data_directory = self.triage_agent.data_directory
+        discovered = discover_topics(data_directory)
+        topics = discovered
+        if topic != ALL_TOPICS:
+            topics = [name for name in discovered if normalize_topic(name) == normalize_topic(topic)]
+            if not topics:
+                return None
+            topic = topics[0]
+        
+        index, embeddings = self._get_job_index()
+        # Also drops topics indexed under other names or whose data was removed
+        index.retain_topics(discovered)
+        for name in topics:
+            data_files = find_topic_files(data_directory, name)
+            if not data_files:
+                return None
+            fingerprint = corpus_fingerprint(data_files)
+            if index.fingerprint(name) != fingerprint:
+                self.flights.do(("job_index", normalize_topic(name), fingerprint),
+                                self._index_topic, index, embeddings, name, fingerprint)
+        
+        with timed("similar_jobs"):
+            results = index.search(embeddings.embed([query])[0], None if topic == ALL_TOPICS else topic, limit)
+        
+        # The index keys jobs by normalized topic; report the discovered names
+        names = {normalize_topic(name): name for name in topics}
+        for job in results:
+            job["topic"] = names.get(job["topic"], job["topic"])
+        
+        return {"query": query, "topic": topic, "results": results}
+    
+    def _index_topic(self, index, embeddings, topic, fingerprint):
+        """Add a topic's jobs, extracted by the pipeline, to the job index."""
+        jobs = self._run_pipeline("extraction", topic, fingerprint, approximate=False)["jobs"]
+        with timed("index_jobs"):
+            index.add_topic(topic, fingerprint, jobs, embeddings.embed([job["statement"] for job in jobs]))
+    
+    def _get_job_index(self):
+        """
+        Get the job index and the embeddings it holds, creating them on first use.
+        
+        The index uses the clustering embeddings when they are enabled and
+        hashed n-gram embeddings otherwise; TF-IDF vectors are fitted per
+        corpus, so they can't be compared across topics or restarts.
+        
+        Returns:
+            tuple: (JobIndex, EmbeddingCache)
+        """
+        with self._job_index_lock:
+            if self._job_index is None:
+                embeddings = self.jtbd_agent.embeddings or EmbeddingCache(HashingEncoder(), self.data_directory)
+                index = JobIndex(
+                    Path(self.data_directory) / INDEX_DIRECTORY / embeddings.encoder.name,
+                    embeddings.encoder.dimensions
+                )
+                self._job_index = (index, embeddings)
+            return self._job_index
+    
+    def process_multi_topic_query(self, user_query):
+        """
+        Process a query that compares several topics.
+        
+        Each topic is routed independently in a separate worker process, so
+        wall-clock time tracks the slowest topic rather than the sum. The
+        analyzed topics are then compared on themes shared across them.
+        
+        Args:
+            user_query (str): The user's query, e.g. "compare X vs Y"
+            
+        Returns:
+            dict: Per-topic results and the cross-topic theme comparison
+        """
+        logger.info(f"Processing multi-topic query: {user_query}")
+        
+        triage_result = self.triage_agent.triage_many(user_query)
+        topics = triage_result["topics"]
+        
+        if len(topics) == 1:
+            results = {topics[0]["topic"]: self._route(topics[0]["topic"], topics[0]["data_completeness"])}
+        else:
+            executor = self._get_executor()
+            futures = {
+                entry["topic"]: executor.submit(
+                    _route_topic, entry["topic"], entry["data_completeness"], self.data_directory
+                )
+                for entry in topics
             }
+            results = {topic: future.result() for topic, future in futures.items()}
+        
+        # Only topics with research data take part in the comparison
+        analyses = {}
+        for topic, result in results.items():
+            analysis = result.get("jtbd_analysis", result)
+            if "themes" in analysis:
+                analyses[topic] = analysis
+        
+        return {
+            "query": user_query,
+            "topics": topics,
+            "results": results,
+            "comparison": self.jtbd_agent.compare_topics(analyses)
+        }
+    
+    def process_query_stages(self, user_query, fields=None, approximate=False):
+        """
+        Process a user query, yielding partial results as each stage completes.
+        
+        The triage result is yielded first, followed by the extracted jobs,
+        themes and research plan where the route produces them, each as
+        its pipeline node completes (see _route_node_stages). The last
+        stage is always ("result", ...) carrying what `process_query` returns.
+        If an identical query is already in flight, only its result is yielded.
+        
+        Args:
+            user_query (str): The user's query about a topic
+            fields (iterable, optional): Analysis sections to build
+            approximate (bool): Whether to analyze a sample of the data
+            
+        Yields:
+            tuple: (stage name, stage payload)
+        """
+        timings = StageTimings()
+        try:
+            yield from iterate_with_timings(self._query_stages(user_query, fields, approximate), timings)
+        finally:
+            timings.flush()
+    
+    def _query_stages(self, user_query, fields=None, approximate=False):
+        """Triage and route a query, yielding each stage (see process_query_stages)."""
+        logger.info(f"Processing query with staged results: {user_query}")
+        
+        triage_result = self.triage_agent.triage(user_query)
+        yield "triage", triage_result
+        
+        data_completeness = triage_result.get("data_completeness", "none")
+        topic = triage_result.get("topic", "")
+        
+        # Callers joining an identical in-flight query only get the result
+        yield from self.flights.do_stages(
+            self.analysis_key(triage_result, fields, approximate),
+            self._route_node_stages, topic, data_completeness, fields, approximate
+        )
+    
+    def route_stage_count(self, data_completeness, fields=None):
+        """
+        Number of stages process_query_stages yields for a route.
+        
+        Counts the stages of the nodes the route's pipeline target depends
+        on, selected like _route_node_stages does, so projected fields that
+        skip stages are accounted for. Stages of outputs that turn out empty
+        (e.g. no jobs extracted) are still counted.
+        
+        Args:
+            data_completeness (str): "complete", "partial" or "none"
+            fields (iterable, optional): Analysis sections to build
+            
+        Returns:
+            int: Stage count, including triage and the final result
+        """
+        route, params = self._resolve_route(data_completeness, fields)
+        target = ROUTE_TARGETS[route]
+        stages = {
+            self._node_stage_name(route, target, name, params["analysis_fields"])
+            for name in self.pipeline.node_names([target], params)
+        }
+        return 1 + len(stages - {None})
+    
+    def _route(self, topic, data_completeness, fields=None, approximate=False):
+        """
+        Route a topic to the appropriate agent(s) based on data completeness.
+        
+        Each route's response is a node of the pipeline (see ROUTE_TARGETS),
+        so only the stages it depends on run, independent stages (e.g. the
+        analysis and the data-independent parts of the research plan) run
+        concurrently, and memoized stages are reused across routes.
+        
+        Args:
+            topic (str): The resolved topic
+            data_completeness (str): "complete", "partial" or "none"
+            fields (iterable, optional): Analysis sections to build
+            approximate (bool): Whether to analyze a sample of the data
+            
+        Returns:
+            dict: The response from the appropriate agent(s)
+        """
+        route, params = self._route_params(topic, data_completeness, fields, approximate)
+        return self._run_pipeline(ROUTE_TARGETS[route], topic, self.corpus_fingerprint(topic), **params)
+    
+    def _route_node_stages(self, topic, data_completeness, fields=None, approximate=False):
+        """
+        Route a topic like `_route`, yielding each stage as its pipeline node completes.
+        
+        Nodes are mapped to stages by _node_stage_name: the extracted jobs
+        and themes as the agent stages them (see JTBDAgent.node_stage),
+        then the partial route's projected analysis and the research plan
+        where the route has them.
+        
+        Args:
+            topic (str): The resolved topic
+            data_completeness (str): "complete", "partial" or "none"
+            fields (iterable, optional): Analysis sections to build
+            approximate (bool): Whether to analyze a sample of the data
+            
+        Yields:
+            tuple: (stage name, stage payload), ending with ("result", response)
+        """
+        route, params = self._route_params(topic, data_completeness, fields, approximate)
+        target = ROUTE_TARGETS[route]
+        
+        for name, output in self.pipeline.iter_run(
+            [target], self._get_task_executor(), {"topic": topic, **params}, version=self.corpus_fingerprint(topic)
+        ):
+            stage = self._node_stage_name(route, target, name, params["analysis_fields"])
+            if stage in ("jobs", "themes"):
+                # Empty job lists and themes (e.g. without data) are skipped
+                staged = self.jtbd_agent.node_stage(name, output, params["analysis_fields"])
+                if staged is not None:
+                    yield staged
+            elif stage == "analysis":
+                yield stage, self._project(output, params["fields"])
+            elif stage is not None:
+                yield stage, output
+    
+    def _node_stage_name(self, route, target, name, analysis_fields):
+        """
+        Stage a pipeline node of a route is streamed as.
+        
+        Args:
+            route (str): "complete", "partial" or "none"
+            target (str): The route's pipeline target, streamed as "result"
+            name (str): The node name
+            analysis_fields (iterable, optional): Analysis sections being built
+            
+        Returns:
+            str: The stage name, or None if the node is not a stage
+        """
+        if name == target:
+            return "result"
+        if name == "analysis":
+            return "analysis" if route == "partial" else None
+        if name in ("research_plan", "gap_research_plan"):
+            return "research_plan"
+        return self.jtbd_agent.node_stage_name(name, analysis_fields)
+    
+    def _route_params(self, topic, data_completeness, fields=None, approximate=False):
+        """
+        Count and log the routing of a topic, resolving its route (see _resolve_route).
+        
+        Args:
+            topic (str): The resolved topic
+            data_completeness (str): "complete", "partial" or "none"
+            fields (iterable, optional): Analysis sections to build
+            approximate (bool): Whether to analyze a sample of the data
+            
+        Returns:
+            tuple: (route name, pipeline run parameters besides the topic)
+        """
+        QUERIES.inc(route=data_completeness)
+        route, params = self._resolve_route(data_completeness, fields, approximate)
         
-        else:  # No data
+        if route == "complete":
+            logger.info(f"Complete data found for topic: {topic}. Routing to JTBD Agent.")
+        elif route == "partial":
+            logger.info(f"Partial data found for topic: {topic}. Routing to JTBD Agent with research suggestions.")
+        else:
             logger.info(f"No data found for topic: {topic}. Routing to Researcher Agent.")
-            return self.researcher_agent.generate_research_plan(topic)
+        
+        return route, params
+    
+    def _resolve_route(self, data_completeness, fields=None, approximate=False):
+        """
+        Resolve a route and the pipeline parameters of its response.
+        
+        Args:
+            data_completeness (str): "complete", "partial" or "none"
+            fields (iterable, optional): Analysis sections to build
+            approximate (bool): Whether to analyze a sample of the data
+            
+        Returns:
+            tuple: (route name, pipeline run parameters besides the topic)
+        """
+        route = data_completeness if data_completeness in ROUTE_TARGETS else "none"
+        fields = frozenset(fields) if fields is not None else None
+        
+        # The research plan is driven by the job lists, themes, reliability
+        # and coverage, so those are always built on the partial route
+        analysis_fields = fields
+        if route == "partial" and fields is not None:
+            analysis_fields = fields | set(RESEARCH_PLAN_FIELDS)
+        
+        return route, {
+            "full_analysis": route == "complete", "fields": fields, "analysis_fields": analysis_fields,
+            "approximate": approximate
+        }
+    
+    def _run_pipeline(self, target, topic, fingerprint, **params):
+        """
+        Compute one pipeline output for a topic.
+        
+        Args:
+            target (str): Name of the node to compute
+            topic (str): The resolved topic
+            fingerprint (str): Fingerprint of the topic's data files, so
+                memoized outputs of older data are not reused
+            **params: Further run parameters of the nodes
+            
+        Returns:
+            The node's output
+        """
+        return self.pipeline.run(
+            [target], self._get_task_executor(), {"topic": topic, **params}, version=fingerprint
+        )[target]
+    
+    def pipeline_nodes(self):
+        """
+        Pipeline nodes assembling the response of each route (see ROUTE_TARGETS).
+        
+        Returns:
+            list: Node instances
+        """
+        return [
+            Node("complete_response", lambda analysis: analysis, inputs=("analysis",)),
+            Node("partial_response", self._partial_response, inputs=("analysis", "gap_research_plan"),
+                 params=("fields",)),
+            Node("none_response", lambda research_plan: research_plan, inputs=("research_plan",)),
+        ]
+    
+    def _partial_response(self, analysis, gap_research_plan, fields=None):
+        """Combine a partial analysis, restricted to the requested fields, with its research plan."""
+        return {
+            "jtbd_analysis": self._project(analysis, fields),
+            "research_suggestions": gap_research_plan,
+            "note": PARTIAL_DATA_NOTE
+        }
+    
+    def _project(self, analysis, fields):
+        """
+        Drop analysis sections that were built for internal use but not requested.
+        
+        Args:
+            analysis (dict): The JTBD analysis
+            fields (iterable, optional): The requested sections, or None for all
+            
+        Returns:
+            dict: The analysis restricted to the requested sections
+        """
+        if fields is None or "error" in analysis:
+            return analysis
+        
+        return {
+            key: value for key, value in analysis.items()
+            if key in fields or key not in ANALYSIS_FIELDS
+        }
+    
+    def _get_task_executor(self):
+        """
+        Get the thread pool that runs route tasks, creating it on first use.
+        
+        Tasks run inline on the calling thread instead while the query is
+        profiled, which only sees that thread, or while memory is tracked,
+        whose per-stage peaks are process-wide and so must not overlap.
+        
+        Returns:
+            Executor: The shared ThreadPoolExecutor, or an InlineExecutor
+        """
+        if profiling_active() or memory_tracking_enabled():
+            return InlineExecutor()
+        
+        with self._task_executor_lock:
+            if self._task_executor is None:
+                self._task_executor = ThreadPoolExecutor(max_workers=TASK_WORKERS, thread_name_prefix="jtbd-task")
+            return self._task_executor
+    
+    def _get_executor(self):
+        """
+        Get the process pool used for multi-topic queries, creating it on first use.
+        
+        The pool is kept for the lifetime of the system so worker start-up
+        (and the sklearn import it implies) is only paid once. It is sized
+        by MAX_TOPIC_WORKERS and the CPU count rather than by the first
+        query, which would cap every later, larger query.
+        
+        Returns:
+            ProcessPoolExecutor: The shared executor
+        """
+        with self._executor_lock:
+            if self._executor is None:
+                max_workers = min(MAX_TOPIC_WORKERS, os.cpu_count() or 1)
+                self._executor = ProcessPoolExecutor(max_workers=max_workers)
+                logger.info(f"Started topic worker pool with {max_workers} processes")
+            return self._executor
+
+
+# Per-process system used by topic workers
+_worker_system = None
+
+def _route_topic(topic, data_completeness, data_directory="data"):
+    """Route a single topic inside a worker process."""
+    global _worker_system
+    if _worker_system is None or _worker_system.data_directory != data_directory:
+        _worker_system = JTBDMultiAgentSystem(data_directory)
+    return _worker_system._route(topic, data_completeness)
 
 def main():
     """Main function to run the JTBD Multi-Agent System."""
@@ -0,0 +1,92 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from services.metrics import CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """
+    Thread-safe LRU cache for serialized responses.
+
+    Keys are expected to include the corpus fingerprint, so entries for
+    changed data are never served; they simply age out of the cache.
+    """
+
+    def __init__(self, max_entries=128, ttl_seconds=None, name="response"):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries (int): Maximum number of cached responses
+            ttl_seconds (float, optional): Lifetime of an entry, or None for no expiry
+            name (str): Cache name used to label hit/miss metrics
+        """
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """
+        Look up a cached value.
+
+        Args:
+            key: Hashable cache key
+
+        Returns:
+            The cached value, or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None and self.ttl_seconds is not None:
+                if time.monotonic() - entry[0] > self.ttl_seconds:
+                    del self._entries[key]
+                    entry = None
+
+            if entry is None:
+                self.misses += 1
+                CACHE_REQUESTS.inc(cache=self.name, result="miss")
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            CACHE_REQUESTS.inc(cache=self.name, result="hit")
+            return entry[1]
+
+    def __contains__(self, key):
+        """Whether a live entry exists for `key`, without touching hit/miss stats."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False
+            return self.ttl_seconds is None or time.monotonic() - entry[0] <= self.ttl_seconds
+
+    def put(self, key, value):
+        """
+        Store a value, evicting the least recently used entry if full.
+
+        Args:
+            key: Hashable cache key
+            value: The value to cache
+        """
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Remove all cached entries."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,331 @@
+import os
+import json
+import logging
+import threading
+from pathlib import Path
+import numpy as np
+from sklearn.cluster import KMeans
+from utils.corpus import normalize_topic
+
+logger = logging.getLogger(__name__)
+
+# Subdirectory of the data directory holding job indexes, one per encoder
+INDEX_DIRECTORY = ".job_index"
+
+# Upper bound on inverted lists; an index has about sqrt(rows) of them
+MAX_LISTS = 256
+
+# Inverted lists scanned per query
+DEFAULT_PROBES = 8
+
+# The coarse quantizer is retrained once the index has grown this many times
+# past the rows it was trained on
+RETRAIN_GROWTH = 4
+
+# Vectors sampled to train the coarse quantizer
+TRAINING_SAMPLE_SIZE = 20000
+
+# Share of stale rows (of replaced topic versions) above which the files are compacted
+MAX_STALE_FRACTION = 0.5
+
+
+class JobIndex:
+    """
+    Persistent inverted-file (IVF) index of job vectors across topics.
+
+    Vectors are grouped into lists by their nearest centroid; a query
+    scores the centroids, then only the rows of the closest lists. Rows
+    are appended as topics are indexed, and a topic whose data changed is
+    re-indexed with its old rows marked stale. The files, in one directory:
+
+    - vectors.f32: float32 rows, memory-mapped for queries
+    - lists.i32: inverted list of each row
+    - jobs.jsonl: the job of each row (topic, corpus fingerprint, id, ...)
+    - centroids.npy: the coarse quantizer
+    - index.json: row count, indexed topic versions and training size,
+      written last so rows past the count (e.g. after a crash) are ignored
+
+    Writes are serialized with a lock; one process should write an index.
+    """
+
+    def __init__(self, directory, dimensions):
+        """
+        Open (and create if needed) an index.
+
+        Args:
+            directory (str): Directory holding the index files
+            dimensions (int): Length of the indexed vectors
+        """
+        self.directory = Path(directory)
+        self.dimensions = dimensions
+        self._lock = threading.Lock()
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._load()
+
+    def fingerprint(self, topic):
+        """Corpus fingerprint a topic was indexed at, or None if it is not indexed."""
+        with self._lock:
+            return self._topics.get(normalize_topic(topic))
+
+    def add_topic(self, topic, fingerprint, jobs, vectors):
+        """
+        Index the jobs of a topic, replacing those of older versions of its data.
+
+        Args:
+            topic (str): The topic
+            fingerprint (str): Fingerprint of the topic's data files
+            jobs (list): Jobs extracted from the data
+            vectors (numpy.ndarray): L2-normalized vector of each job's statement
+        """
+        key = normalize_topic(topic)
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32).reshape(-1, self.dimensions)
+        records = [
+            {
+                "topic": key,
+                "fingerprint": fingerprint,
+                "id": job["id"],
+                "statement": job["statement"],
+                "type": job["type"],
+                "frequency": job["frequency"]
+            }
+            for job in jobs
+        ]
+
+        with self._lock:
+            if self._topics.get(key) == fingerprint:
+                return
+
+            self._live[self._row_topics == key] = False
+            self._topics[key] = fingerprint
+
+            self._append(self.directory / "vectors.f32", vectors.tobytes())
+            self._append(self.directory / "jobs.jsonl", "".join(json.dumps(record) + "\n" for record in records).encode())
+            self._jobs.extend(records)
+            self._row_topics = np.concatenate([self._row_topics, np.full(len(records), key, dtype=object)])
+            self._live = np.concatenate([self._live, np.ones(len(records), dtype=bool)])
+            self._map_vectors()
+
+            if len(self._jobs) and (1 - self._live.mean()) > MAX_STALE_FRACTION:
+                self._compact()
+            elif self._centroids is None or len(self._jobs) > RETRAIN_GROWTH * self._trained_rows:
+                self._train()
+            else:
+                assigned = self._assign(vectors)
+                self._append(self.directory / "lists.i32", assigned.tobytes())
+                self._lists = np.concatenate([self._lists, assigned])
+
+            self._write_manifest()
+            self._build_lists()
+
+    def retain_topics(self, topics):
+        """
+        Drop the jobs of indexed topics that are not among `topics`.
+
+        Args:
+            topics (iterable): Topics to keep, e.g. those with data files
+        """
+        keep = {normalize_topic(topic) for topic in topics}
+
+        with self._lock:
+            dropped = [key for key in self._topics if key not in keep]
+            if not dropped:
+                return
+
+            for key in dropped:
+                del self._topics[key]
+                self._live[self._row_topics == key] = False
+
+            if len(self._jobs) and (1 - self._live.mean()) > MAX_STALE_FRACTION:
+                self._compact()
+
+            self._write_manifest()
+            self._build_lists()
+            logger.info(f"Dropped {len(dropped)} topics without data from the job index")
+
+    def search(self, vector, topic=None, limit=10, probes=DEFAULT_PROBES):
+        """
+        Find the indexed jobs closest to a vector.
+
+        With a topic, rows of other topics are dropped from each list before
+        ranking, and further lists are probed, `probes` at a time and
+        nearest first, until `limit` jobs of the topic are found or every
+        list has been scanned.
+
+        Args:
+            vector (numpy.ndarray): L2-normalized query vector
+            topic (str, optional): Only return jobs of this topic
+            limit (int): Maximum number of results
+            probes (int): Inverted lists scanned (per round, with a topic)
+
+        Returns:
+            list: Jobs with their cosine "score", most similar first
+        """
+        vector = np.asarray(vector, dtype=np.float32)
+
+        with self._lock:
+            if self._centroids is None:
+                return []
+
+            key = normalize_topic(topic) if topic is not None else None
+            nearest_lists = np.argsort(self._centroids @ vector)[::-1]
+
+            candidates = []
+            found = 0
+            for start in range(0, len(nearest_lists), probes):
+                for i in nearest_lists[start:start + probes]:
+                    list_rows = self._order[self._offsets[i]:self._offsets[i + 1]]
+                    list_rows = list_rows[self._live[list_rows]]
+                    if key is not None:
+                        list_rows = list_rows[self._row_topics[list_rows] == key]
+                    candidates.append(list_rows)
+                    found += len(list_rows)
+                if key is None or found >= limit:
+                    break
+            rows = np.concatenate(candidates) if candidates else np.empty(0, dtype=np.int64)
+
+            # Sorted rows read the memory-mapped vectors sequentially
+            rows = np.sort(rows)
+            scores = self._vectors[rows] @ vector
+            best = np.argpartition(scores, -limit)[-limit:] if len(scores) > limit else np.arange(len(scores))
+            best = best[np.argsort(scores[best])[::-1]]
+
+            return [
+                {
+                    **{field: value for field, value in self._jobs[rows[i]].items() if field != "fingerprint"},
+                    "score": round(float(scores[i]), 4)
+                }
+                for i in best
+            ]
+
+    def __len__(self):
+        """Number of current (not stale) indexed jobs."""
+        with self._lock:
+            return int(self._live.sum())
+
+    def _load(self):
+        """Load the index, ignoring rows written after the last manifest."""
+        manifest = self._read_manifest()
+        rows = manifest["rows"]
+        self._topics = manifest["topics"]
+        self._trained_rows = manifest["trained_rows"]
+
+        # Drop rows of an interrupted write, so later appends stay aligned
+        self._jobs = []
+        jobs_path = self.directory / "jobs.jsonl"
+        if jobs_path.exists():
+            with open(jobs_path, "rb") as file:
+                self._jobs = [json.loads(file.readline()) for _ in range(rows)]
+                end = file.tell()
+            self._truncate(jobs_path, end)
+        self._truncate(self.directory / "vectors.f32", rows * 4 * self.dimensions)
+        self._truncate(self.directory / "lists.i32", rows * 4)
+
+        centroids_path = self.directory / "centroids.npy"
+        self._centroids = np.load(centroids_path) if self._trained_rows and centroids_path.exists() else None
+        self._lists = (
+            np.fromfile(self.directory / "lists.i32", dtype=np.int32) if self._centroids is not None
+            else np.empty(0, dtype=np.int32)
+        )
+
+        self._row_topics = np.array([job["topic"] for job in self._jobs], dtype=object)
+        self._live = np.array(
+            [self._topics.get(job["topic"]) == job["fingerprint"] for job in self._jobs], dtype=bool
+        )
+        self._map_vectors()
+        self._build_lists()
+
+    def _train(self):
+        """Train the coarse quantizer on current rows and reassign every row."""
+        live_rows = np.flatnonzero(self._live)
+        if not len(live_rows):
+            self._centroids = None
+            self._lists = np.empty(0, dtype=np.int32)
+            self._trained_rows = 0
+            self._replace(self.directory / "lists.i32", b"")
+            return
+
+        rng = np.random.default_rng(42)
+        sample = np.sort(rng.choice(live_rows, size=min(len(live_rows), TRAINING_SAMPLE_SIZE), replace=False))
+        n_lists = int(min(MAX_LISTS, max(1, np.sqrt(len(live_rows)))))
+
+        kmeans = KMeans(n_clusters=n_lists, n_init=1, random_state=42).fit(self._vectors[sample])
+        self._centroids = kmeans.cluster_centers_.astype(np.float32)
+        self._lists = self._assign(self._vectors)
+        self._trained_rows = len(self._jobs)
+
+        self._replace(self.directory / "lists.i32", self._lists.tobytes())
+        with open(self.directory / "centroids.npy.tmp", "wb") as file:
+            np.save(file, self._centroids)
+        os.replace(self.directory / "centroids.npy.tmp", self.directory / "centroids.npy")
+        logger.info(f"Trained job index with {n_lists} lists on {len(sample)} of {len(live_rows)} jobs")
+
+    def _compact(self):
+        """Rewrite the files without stale rows and retrain."""
+        live_rows = np.flatnonzero(self._live)
+        vectors = np.asarray(self._vectors[live_rows])
+        self._jobs = [self._jobs[row] for row in live_rows]
+        self._row_topics = self._row_topics[live_rows]
+        self._live = np.ones(len(live_rows), dtype=bool)
+
+        self._vectors = None
+        self._replace(self.directory / "vectors.f32", vectors.tobytes())
+        self._write_jobs(self._jobs)
+        self._map_vectors()
+        self._train()
+
+    def _assign(self, vectors):
+        """Nearest centroid of each vector, in chunks to bound memory."""
+        chunks = [
+            np.argmax(np.asarray(vectors[start:start + 65536]) @ self._centroids.T, axis=1).astype(np.int32)
+            for start in range(0, len(vectors), 65536)
+        ]
+        return np.concatenate(chunks) if chunks else np.empty(0, dtype=np.int32)
+
+    def _build_lists(self):
+        """Order rows by inverted list, with each list's offsets into that order."""
+        self._order = np.argsort(self._lists, kind="stable")
+        n_lists = len(self._centroids) if self._centroids is not None else 0
+        self._offsets = np.searchsorted(self._lists[self._order], np.arange(n_lists + 1))
+
+    def _map_vectors(self):
+        """Memory-map the vector file."""
+        rows = len(self._jobs)
+        self._vectors = (
+            np.memmap(self.directory / "vectors.f32", dtype=np.float32, mode="r", shape=(rows, self.dimensions))
+            if rows else np.empty((0, self.dimensions), dtype=np.float32)
+        )
+
+    def _read_manifest(self):
+        """Read index.json, or an empty manifest."""
+        try:
+            with open(self.directory / "index.json", "r") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {"rows": 0, "topics": {}, "trained_rows": 0}
+
+    def _write_manifest(self):
+        """Atomically write index.json, committing the rows written so far."""
+        manifest = {"rows": len(self._jobs), "topics": self._topics, "trained_rows": self._trained_rows}
+        self._replace(self.directory / "index.json", json.dumps(manifest).encode())
+
+    def _write_jobs(self, jobs):
+        """Atomically rewrite jobs.jsonl."""
+        self._replace(self.directory / "jobs.jsonl", "".join(json.dumps(job) + "\n" for job in jobs).encode())
+
+    def _append(self, path, data):
+        """Append bytes to a file."""
+        with open(path, "ab") as file:
+            file.write(data)
+
+    def _replace(self, path, data):
+        """Atomically replace a file's contents."""
+        temporary_path = path.with_name(path.name + ".tmp")
+        with open(temporary_path, "wb") as file:
+            file.write(data)
+        os.replace(temporary_path, path)
+
+    def _truncate(self, path, size):
+        """Truncate a file to `size` bytes if it is longer."""
+        if path.exists() and path.stat().st_size > size:
+            os.truncate(path, size)
@@ -0,0 +1,295 @@
+import json
+import time
+import uuid
+import logging
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from services.serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+# Job lifecycle states
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+# Columns stored for each job, in table order
+JOB_COLUMNS = [
+    "id", "query", "fields", "approximate", "status", "stage", "progress", "error",
+    "result", "created_at", "updated_at", "finished_at"
+]
+
+
+class MemoryJobStore:
+    """In-process job store; jobs are lost when the process exits."""
+
+    def __init__(self):
+        """Initialize the store."""
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def create(self, job):
+        """Add a new job record."""
+        with self._lock:
+            self._jobs[job["id"]] = dict(job)
+
+    def update(self, job_id, **changes):
+        """Update fields of an existing job record."""
+        with self._lock:
+            if job_id in self._jobs:
+                self._jobs[job_id].update(changes)
+
+    def get(self, job_id):
+        """Get a copy of a job record, or None if unknown."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def unfinished(self):
+        """Get all jobs that are queued or running."""
+        with self._lock:
+            return [dict(job) for job in self._jobs.values() if job["status"] in (QUEUED, RUNNING)]
+
+    def purge_finished_before(self, cutoff):
+        """Delete finished jobs older than `cutoff`; returns the number removed."""
+        with self._lock:
+            expired = [
+                job_id for job_id, job in self._jobs.items()
+                if job["finished_at"] is not None and job["finished_at"] < cutoff
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
+            return len(expired)
+
+
+class SQLiteJobStore:
+    """
+    SQLite-backed job store so queued jobs and results survive restarts.
+    """
+
+    def __init__(self, path):
+        """
+        Open (and create if needed) the job database.
+
+        Args:
+            path (str): Path of the SQLite database file
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.row_factory = sqlite3.Row
+
+        with self._lock, self._connection:
+            self._connection.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    query TEXT NOT NULL,
+                    fields TEXT,
+                    approximate INTEGER NOT NULL DEFAULT 0,
+                    status TEXT NOT NULL,
+                    stage TEXT,
+                    progress REAL NOT NULL DEFAULT 0,
+                    error TEXT,
+                    result BLOB,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    finished_at REAL
+                )
+            """)
+            self._connection.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status)")
+            
+            # Databases created before approximate jobs lack the column
+            columns = [row["name"] for row in self._connection.execute("PRAGMA table_info(jobs)")]
+            if "approximate" not in columns:
+                self._connection.execute("ALTER TABLE jobs ADD COLUMN approximate INTEGER NOT NULL DEFAULT 0")
+
+    def create(self, job):
+        """Add a new job record."""
+        row = self._to_row(job)
+        placeholders = ", ".join("?" for _ in JOB_COLUMNS)
+        with self._lock, self._connection:
+            self._connection.execute(
+                f"INSERT INTO jobs ({', '.join(JOB_COLUMNS)}) VALUES ({placeholders})",
+                [row[column] for column in JOB_COLUMNS]
+            )
+
+    def update(self, job_id, **changes):
+        """Update fields of an existing job record."""
+        row = self._to_row(changes)
+        assignments = ", ".join(f"{column} = ?" for column in row)
+        with self._lock, self._connection:
+            self._connection.execute(
+                f"UPDATE jobs SET {assignments} WHERE id = ?",
+                [*row.values(), job_id]
+            )
+
+    def get(self, job_id):
+        """Get a job record, or None if unknown."""
+        with self._lock:
+            row = self._connection.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._from_row(row) if row else None
+
+    def unfinished(self):
+        """Get all jobs that are queued or running."""
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT * FROM jobs WHERE status IN (?, ?) ORDER BY created_at", (QUEUED, RUNNING)
+            ).fetchall()
+        return [self._from_row(row) for row in rows]
+
+    def purge_finished_before(self, cutoff):
+        """Delete finished jobs older than `cutoff`; returns the number removed."""
+        with self._lock, self._connection:
+            cursor = self._connection.execute(
+                "DELETE FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?", (cutoff,)
+            )
+        return cursor.rowcount
+
+    def _to_row(self, job):
+        """Convert job fields to column values."""
+        row = dict(job)
+        if "fields" in row and row["fields"] is not None:
+            row["fields"] = json.dumps(list(row["fields"]))
+        return row
+
+    def _from_row(self, row):
+        """Convert a database row to a job record."""
+        job = dict(row)
+        if job["fields"] is not None:
+            job["fields"] = json.loads(job["fields"])
+        job["approximate"] = bool(job["approximate"])
+        return job
+
+
+class JobManager:
+    """
+    Runs queries as background jobs on a local worker pool.
+
+    Jobs are recorded in a store (in-memory or SQLite) with their status,
+    current pipeline stage and progress. Results are stored serialized and
+    kept for `result_ttl` seconds after the job finishes.
+    """
+
+    def __init__(self, system, store=None, max_workers=2, result_ttl=3600):
+        """
+        Initialize the job manager.
+
+        Args:
+            system (JTBDMultiAgentSystem): System used to process queries
+            store (optional): MemoryJobStore or SQLiteJobStore; in-memory by default
+            max_workers (int): Number of worker threads
+            result_ttl (float): Seconds to keep finished jobs and their results
+        """
+        self.system = system
+        self.store = store or MemoryJobStore()
+        self.result_ttl = result_ttl
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="jtbd-job")
+
+    def recover(self):
+        """
+        Re-queue jobs left unfinished by a previous process.
+
+        Returns:
+            int: The number of re-queued jobs
+        """
+        jobs = self.store.unfinished()
+        for job in jobs:
+            self.store.update(job["id"], status=QUEUED, stage=None, progress=0.0, updated_at=time.time())
+            self._executor.submit(self._run, job["id"], job["query"], job["fields"], job["approximate"])
+
+        if jobs:
+            logger.info(f"Re-queued {len(jobs)} unfinished jobs")
+        return len(jobs)
+
+    def submit(self, query, fields=None, approximate=False):
+        """
+        Queue a query for background processing.
+
+        Args:
+            query (str): The user's query
+            fields (list, optional): Analysis sections to build
+            approximate (bool): Whether to analyze a sample of the data
+
+        Returns:
+            dict: The new job record
+        """
+        self.purge_expired()
+
+        now = time.time()
+        job = {
+            "id": uuid.uuid4().hex,
+            "query": query,
+            "fields": fields,
+            "approximate": approximate,
+            "status": QUEUED,
+            "stage": None,
+            "progress": 0.0,
+            "error": None,
+            "result": None,
+            "created_at": now,
+            "updated_at": now,
+            "finished_at": None,
+        }
+        self.store.create(job)
+        self._executor.submit(self._run, job["id"], query, fields, approximate)
+
+        logger.info(f"Queued job {job['id']} for query: {query}")
+        return job
+
+    def get(self, job_id):
+        """
+        Get a job record, treating expired jobs as unknown.
+
+        Args:
+            job_id (str): The job id
+
+        Returns:
+            dict: The job record, or None
+        """
+        job = self.store.get(job_id)
+        if job and job["finished_at"] is not None and time.time() - job["finished_at"] > self.result_ttl:
+            return None
+        return job
+
+    def purge_expired(self):
+        """Delete finished jobs whose results have outlived the TTL."""
+        removed = self.store.purge_finished_before(time.time() - self.result_ttl)
+        if removed:
+            logger.info(f"Purged {removed} expired jobs")
+
+    def shutdown(self, wait=False):
+        """Stop accepting work; queued jobs stay recorded for recovery."""
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _run(self, job_id, query, fields, approximate=False):
+        """Process a job, recording stage progress as it goes."""
+        self.store.update(job_id, status=RUNNING, updated_at=time.time())
+
+        try:
+            expected_stages = None
+            completed_stages = 0
+            for stage, payload in self.system.process_query_stages(query, fields=fields, approximate=approximate):
+                completed_stages += 1
+                if stage == "triage":
+                    expected_stages = self.system.route_stage_count(payload["data_completeness"], fields)
+
+                if stage == "result":
+                    now = time.time()
+                    self.store.update(
+                        job_id, status=COMPLETED, stage=stage, progress=1.0,
+                        result=dumps(payload), updated_at=now, finished_at=now
+                    )
+                else:
+                    progress = completed_stages / expected_stages if expected_stages else 0.0
+                    self.store.update(job_id, stage=stage, progress=round(progress, 3), updated_at=time.time())
+
+            logger.info(f"Job {job_id} completed")
+
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {str(e)}")
+            now = time.time()
+            self.store.update(
+                job_id, status=FAILED, error=str(e), updated_at=now, finished_at=now
+            )
@@ -0,0 +1,458 @@
+import time
+import logging
+import threading
+import contextvars
+import tracemalloc
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Default histogram buckets for stage durations, in seconds
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Histogram buckets for stage memory, in bytes
+MEMORY_BUCKETS = tuple(2 ** power for power in range(20, 34, 2))
+
+# Upper bounds (exclusive) of the corpus size buckets used as a label
+SIZE_BUCKETS = [(100, "0-99"), (1000, "100-999"), (10000, "1k-9.9k"), (100000, "10k-99k")]
+
+
+def size_bucket(corpus_size):
+    """
+    Map a corpus size (number of research entries) to a label value.
+
+    Args:
+        corpus_size (int, optional): Number of entries, or None if unknown
+
+    Returns:
+        str: Size bucket label
+    """
+    if corpus_size is None:
+        return "unknown"
+
+    for upper_bound, label in SIZE_BUCKETS:
+        if corpus_size < upper_bound:
+            return label
+
+    return "100k+"
+
+
+def _escape_label_value(value):
+    """Escape a label value for the Prometheus text format."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values):
+    """Format label pairs in Prometheus text format."""
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape_label_value(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class Counter:
+    """A monotonically increasing counter with labels."""
+
+    def __init__(self, name, description, label_names=()):
+        """Initialize the counter."""
+        self.name = name
+        self.description = description
+        self.label_names = tuple(label_names)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        """Increment the counter for the given label values."""
+        key = tuple(labels.get(name, "") for name in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        """Render the counter in Prometheus text format."""
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.label_names, key)} {value}")
+        return lines
+
+
+class Histogram:
+    """A cumulative histogram with labels."""
+
+    def __init__(self, name, description, label_names=(), buckets=DEFAULT_BUCKETS):
+        """Initialize the histogram."""
+        self.name = name
+        self.description = description
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        """Record an observation for the given label values."""
+        key = tuple(labels.get(name, "") for name in self.label_names)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+
+            for index, upper_bound in enumerate(self.buckets):
+                if value <= upper_bound:
+                    series["counts"][index] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def render(self):
+        """Render the histogram in Prometheus text format."""
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        label_names = self.label_names + ("le",)
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                for upper_bound, count in zip(self.buckets, series["counts"]):
+                    lines.append(f"{self.name}_bucket{_format_labels(label_names, key + (upper_bound,))} {count}")
+                lines.append(f"{self.name}_bucket{_format_labels(label_names, key + ('+Inf',))} {series['count']}")
+                lines.append(f"{self.name}_sum{_format_labels(self.label_names, key)} {series['sum']}")
+                lines.append(f"{self.name}_count{_format_labels(self.label_names, key)} {series['count']}")
+        return lines
+
+
+class CallbackCounter:
+    """A counter whose values are read from a callback at render time."""
+
+    def __init__(self, name, description, label_names, callback):
+        """
+        Initialize the counter.
+
+        Args:
+            name (str): Metric name
+            description (str): Help text
+            label_names (tuple): Label names
+            callback (callable): Returns a dict of label value tuples to values
+        """
+        self.name = name
+        self.description = description
+        self.label_names = tuple(label_names)
+        self.callback = callback
+
+    def render(self):
+        """Render the counter in Prometheus text format."""
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self.callback().items()):
+            lines.append(f"{self.name}{_format_labels(self.label_names, key)} {value}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds the process's metrics and renders them for Prometheus."""
+
+    def __init__(self):
+        """Initialize an empty registry."""
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name, description, label_names=()):
+        """Get or create a counter."""
+        return self._register(name, lambda: Counter(name, description, label_names))
+
+    def histogram(self, name, description, label_names=(), buckets=DEFAULT_BUCKETS):
+        """Get or create a histogram."""
+        return self._register(name, lambda: Histogram(name, description, label_names, buckets))
+
+    def callback_counter(self, name, description, label_names, callback):
+        """Register (or replace) a counter read from a callback."""
+        with self._lock:
+            self._metrics[name] = CallbackCounter(name, description, label_names, callback)
+            return self._metrics[name]
+
+    def render(self):
+        """
+        Render all metrics in Prometheus text exposition format.
+
+        Returns:
+            str: The metrics text
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def _register(self, name, factory):
+        """Get a metric by name, creating it with `factory` if needed."""
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = factory()
+            return self._metrics[name]
+
+
+# Process-wide registry and the pipeline metrics recorded into it
+registry = MetricsRegistry()
+
+STAGE_DURATION = registry.histogram(
+    "jtbd_stage_duration_seconds",
+    "Time spent in each pipeline stage",
+    ("stage", "size_bucket")
+)
+
+QUERIES = registry.counter(
+    "jtbd_queries_total",
+    "Queries routed, by data completeness route",
+    ("route",)
+)
+
+STAGE_MEMORY_PEAK = registry.histogram(
+    "jtbd_stage_memory_peak_bytes",
+    "Peak traced memory allocated during each pipeline stage (with memory tracking on)",
+    ("stage", "size_bucket"),
+    MEMORY_BUCKETS
+)
+
+STAGE_MEMORY_RETAINED = registry.histogram(
+    "jtbd_stage_memory_retained_bytes",
+    "Traced memory still allocated when each pipeline stage ends (with memory tracking on)",
+    ("stage", "size_bucket"),
+    MEMORY_BUCKETS
+)
+
+CACHE_REQUESTS = registry.counter(
+    "jtbd_cache_requests_total",
+    "Cache lookups by cache and result",
+    ("cache", "result")
+)
+
+
+class StageTimings:
+    """
+    Per-request collection of stage durations.
+
+    Durations are accumulated while the request runs and written to the
+    stage histogram, labelled with the corpus size bucket, by `flush`.
+    """
+
+    def __init__(self):
+        """Start a new collection."""
+        self.started_at = time.perf_counter()
+        self.stages = {}
+        self.memory = {}
+        self.corpus_size = None
+        self.notes = {}
+        self._lock = threading.Lock()
+        self._flushed = False
+
+    def add(self, stage, seconds):
+        """Accumulate time spent in a stage."""
+        with self._lock:
+            self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def add_memory(self, stage, peak_bytes, retained_bytes):
+        """Record memory use of a stage; peaks keep the maximum, retained bytes add up."""
+        with self._lock:
+            previous = self.memory.get(stage, {"peak": 0, "retained": 0})
+            self.memory[stage] = {
+                "peak": max(previous["peak"], peak_bytes),
+                "retained": previous["retained"] + retained_bytes
+            }
+
+    def flush(self):
+        """Record the collected durations (and memory use) in the stage histograms (once)."""
+        with self._lock:
+            if self._flushed:
+                return
+            self._flushed = True
+            stages = dict(self.stages)
+            memory = dict(self.memory)
+
+        bucket = size_bucket(self.corpus_size)
+        for stage, seconds in stages.items():
+            STAGE_DURATION.observe(seconds, stage=stage, size_bucket=bucket)
+
+        for stage, usage in memory.items():
+            STAGE_MEMORY_PEAK.observe(usage["peak"], stage=stage, size_bucket=bucket)
+            STAGE_MEMORY_RETAINED.observe(usage["retained"], stage=stage, size_bucket=bucket)
+
+        if memory:
+            logger.info("Stage memory (peak/retained MB): " + ", ".join(
+                f"{stage} {usage['peak'] / 2 ** 20:.1f}/{usage['retained'] / 2 ** 20:.1f}"
+                for stage, usage in memory.items()
+            ))
+
+    def as_dict(self):
+        """
+        Summarize the timings for inclusion in a response.
+
+        Returns:
+            dict: Total and per-stage durations in milliseconds
+        """
+        with self._lock:
+            stages = {stage: round(seconds * 1000, 3) for stage, seconds in self.stages.items()}
+            memory = {stage: dict(usage) for stage, usage in self.memory.items()}
+
+        summary = {
+            "total_ms": round((time.perf_counter() - self.started_at) * 1000, 3),
+            "stages_ms": stages,
+            "corpus_size": self.corpus_size,
+            "size_bucket": size_bucket(self.corpus_size),
+            **self.notes
+        }
+        if memory:
+            summary["memory_bytes"] = memory
+        return summary
+
+
+_current_timings = contextvars.ContextVar("jtbd_stage_timings", default=None)
+
+# Per-thread stack of open stage memory frames, for nested stages
+_memory_frames = threading.local()
+
+
+def enable_memory_tracking(frames=1):
+    """
+    Start tracemalloc so stages also record peak and retained memory.
+
+    tracemalloc slows allocation-heavy code noticeably and counts every
+    thread's allocations, so figures are only precise when one analysis
+    runs at a time.
+
+    Args:
+        frames (int): Traceback depth stored per allocation
+    """
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+        logger.info("Memory tracking enabled")
+
+
+def memory_tracking_enabled():
+    """Whether stages record memory (see enable_memory_tracking)."""
+    return tracemalloc.is_tracing()
+
+
+def _enter_memory_stage():
+    """Open a memory frame for a stage, starting a fresh traced peak."""
+    stack = getattr(_memory_frames, "stack", None)
+    if stack is None:
+        stack = _memory_frames.stack = []
+
+    current, peak = tracemalloc.get_traced_memory()
+    if stack:
+        # Keep the enclosing stage's peak before resetting it for this one
+        stack[-1]["peak"] = max(stack[-1]["peak"], peak)
+    tracemalloc.reset_peak()
+
+    frame = {"start": current, "peak": current}
+    stack.append(frame)
+    return frame
+
+
+def _exit_memory_stage(frame):
+    """Close a memory frame; returns (peak bytes, retained bytes) above its start."""
+    stack = _memory_frames.stack
+    current, peak = tracemalloc.get_traced_memory()
+    stack.remove(frame)
+
+    frame_peak = max(frame["peak"], peak)
+    if stack:
+        stack[-1]["peak"] = max(stack[-1]["peak"], frame_peak)
+
+    return frame_peak - frame["start"], current - frame["start"]
+
+
+def current_timings():
+    """Get the StageTimings collecting for the current context, if any."""
+    return _current_timings.get()
+
+
+@contextmanager
+def collect_timings(timings=None):
+    """
+    Collect stage timings for the code run inside the block.
+
+    If a collection is already active and no `timings` is given, the
+    active one is reused and left for its owner to flush. Otherwise a
+    new collection is flushed to the histograms when the block exits.
+
+    Args:
+        timings (StageTimings, optional): Collection to activate
+
+    Yields:
+        StageTimings: The active collection
+    """
+    active = _current_timings.get()
+    if timings is None and active is not None:
+        yield active
+        return
+
+    owned = timings is None
+    timings = timings or StageTimings()
+    token = _current_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _current_timings.reset(token)
+        if owned:
+            timings.flush()
+
+
+def iterate_with_timings(iterator, timings):
+    """
+    Iterate a generator with `timings` active during each step.
+
+    Generators may be resumed from different threads or contexts (e.g. a
+    streaming response), so the collection is activated per step rather
+    than around the whole iteration.
+
+    Args:
+        iterator: The generator to drive
+        timings (StageTimings): Collection to activate
+
+    Yields:
+        The generator's items
+    """
+    while True:
+        with collect_timings(timings):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+
+@contextmanager
+def timed(stage):
+    """
+    Time a pipeline stage; usable as a context manager or a decorator.
+
+    The duration goes to the active StageTimings, or straight to the
+    stage histogram when no collection is active. With memory tracking
+    enabled, the stage's peak and retained traced memory are recorded
+    the same way.
+
+    Args:
+        stage (str): Stage name
+    """
+    memory_frame = _enter_memory_stage() if tracemalloc.is_tracing() else None
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start_time
+        memory = _exit_memory_stage(memory_frame) if memory_frame else None
+
+        timings = _current_timings.get()
+        if timings is not None:
+            timings.add(stage, elapsed)
+            if memory:
+                timings.add_memory(stage, *memory)
+        else:
+            STAGE_DURATION.observe(elapsed, stage=stage, size_bucket="unknown")
+            if memory:
+                STAGE_MEMORY_PEAK.observe(memory[0], stage=stage, size_bucket="unknown")
+                STAGE_MEMORY_RETAINED.observe(memory[1], stage=stage, size_bucket="unknown")
+
+
+def record_corpus_size(corpus_size):
+    """Record the number of research entries for the active collection."""
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.corpus_size = corpus_size
@@ -0,0 +1,236 @@
+import logging
+from services.cache import ResponseCache
+from services.metrics import timed
+from services.task_graph import TaskGraph
+
+logger = logging.getLogger(__name__)
+
+
+class Node:
+    """
+    A pipeline stage producing one named output.
+
+    A node's callable receives the outputs of its input nodes and the run
+    parameters it declares as keyword arguments, named after the node or
+    parameter. Inputs may be given as a callable of the run parameters,
+    for stages whose dependencies vary with the request (e.g. requested
+    analysis sections); inputs it leaves out are simply not passed.
+    """
+
+    def __init__(self, name, fn, inputs=(), params=(), memoize=False):
+        """
+        Declare a node.
+
+        Args:
+            name (str): Unique node name, also the name of its output
+            fn (callable): Computes the output
+            inputs (tuple or callable, optional): Names of the nodes whose
+                outputs are passed to `fn`, or a callable mapping the run
+                parameters to those names
+            params (tuple, optional): Names of the run parameters passed to `fn`
+            memoize (bool): Cache the output per data version, parameters
+                and inputs; outputs must then be treated as read-only
+        """
+        self.name = name
+        self.fn = fn
+        self.inputs = inputs
+        self.params = tuple(params)
+        self.memoize = memoize
+
+    def input_names(self, params):
+        """Names of the input nodes for a run with `params`."""
+        return tuple(self.inputs(params) if callable(self.inputs) else self.inputs)
+
+
+class Pipeline:
+    """
+    A declarative graph of nodes, run on demand for a set of target outputs.
+
+    Only the nodes the targets depend on are run, independent nodes run
+    concurrently on a TaskGraph, and each node is timed as "node_<name>".
+    Memoized nodes are keyed by the data version, their parameters and the
+    keys of their inputs, so a memoized output also spares every node
+    upstream of it.
+    """
+
+    def __init__(self, nodes=(), memo_size=256):
+        """
+        Initialize the pipeline.
+
+        Args:
+            nodes (iterable, optional): Nodes to add
+            memo_size (int): Number of memoized node outputs kept (LRU)
+        """
+        self.nodes = {}
+        self.memo = ResponseCache(max_entries=memo_size, name="pipeline")
+        for node in nodes:
+            self.add(node)
+
+    def add(self, node):
+        """
+        Add a node.
+
+        Raises:
+            ValueError: If a node with the same name exists
+        """
+        if node.name in self.nodes:
+            raise ValueError(f"Duplicate pipeline node: {node.name}")
+        self.nodes[node.name] = node
+
+    def add_provider(self, provider):
+        """Add the nodes of a provider exposing `pipeline_nodes()`, e.g. an agent."""
+        for node in provider.pipeline_nodes():
+            self.add(node)
+
+    def run(self, targets, executor, params=None, version=None):
+        """
+        Compute target outputs.
+
+        Args:
+            targets (iterable): Names of the nodes whose outputs are wanted
+            executor (concurrent.futures.Executor): Executor running the nodes
+            params (dict, optional): Run parameters; values must be hashable
+            version (hashable, optional): Version of the underlying data, part
+                of every memo key
+
+        Returns:
+            dict: Target name to output
+
+        Raises:
+            ValueError: If a node is unknown or the graph has a cycle
+            Exception: The first exception raised by a node
+        """
+        values = dict(self.iter_run(targets, executor, params, version))
+        return {target: values[target] for target in targets}
+
+    def iter_run(self, targets, executor, params=None, version=None):
+        """
+        Compute target outputs, yielding every node output as it is available.
+
+        Memoized outputs are yielded first, in dependency order, followed by
+        the outputs of the nodes that run, as each finishes. Outputs of
+        nodes spared by a memoized output downstream are not yielded.
+
+        Args:
+            targets (iterable): Names of the nodes whose outputs are wanted
+            executor (concurrent.futures.Executor): Executor running the nodes
+            params (dict, optional): Run parameters; values must be hashable
+            version (hashable, optional): Version of the underlying data, part
+                of every memo key
+
+        Yields:
+            tuple: (node name, output)
+
+        Raises:
+            ValueError: If a node is unknown or the graph has a cycle
+            Exception: The first exception raised by a node
+        """
+        params = params or {}
+        targets = list(targets)
+        values, order = self._plan(targets, params, version)
+        yield from values.items()
+
+        graph = TaskGraph()
+        for node, key, input_names in order:
+            graph.add(
+                node.name, self._run_node, node, key,
+                inputs={name: name for name in input_names if name not in values},
+                **{name: values[name] for name in input_names if name in values},
+                **{name: params[name] for name in node.params}
+            )
+        yield from graph.iter_run(executor)
+
+    def node_names(self, targets, params=None):
+        """
+        Names of the nodes a run computes for the targets, ignoring memoized outputs.
+
+        Args:
+            targets (iterable): Names of the target nodes
+            params (dict, optional): Run parameters deciding variable inputs
+
+        Returns:
+            list: Node names in dependency order, ending with the targets
+
+        Raises:
+            ValueError: If a node is unknown or the graph has a cycle
+        """
+        order, _ = self._resolve(targets, params or {})
+        return [node.name for node in order]
+
+    def _resolve(self, targets, params):
+        """
+        Resolve the nodes the targets depend on.
+
+        Returns:
+            tuple: ([node] in dependency order, {node name: input names})
+        """
+        inputs = {}
+        order = []
+        visiting = set()
+
+        def visit(name):
+            if name in visiting:
+                raise ValueError(f"Pipeline cycle through node: {name}")
+            if name in inputs:
+                return
+            node = self.nodes.get(name)
+            if node is None:
+                raise ValueError(f"Unknown pipeline node: {name}")
+
+            visiting.add(name)
+            inputs[name] = node.input_names(params)
+            for input_name in inputs[name]:
+                visit(input_name)
+            visiting.discard(name)
+            order.append(node)
+
+        for target in targets:
+            visit(target)
+
+        return order, inputs
+
+    def _plan(self, targets, params, version):
+        """
+        Resolve the nodes to run for the targets.
+
+        Returns:
+            tuple: (memoized outputs by node name, [(node, memo key, input
+                names)]), both in dependency order
+        """
+        order, inputs = self._resolve(targets, params)
+
+        # Inputs precede their nodes, so their keys are known
+        keys = {}
+        for node in order:
+            keys[node.name] = (
+                node.name,
+                version,
+                tuple(params[param] for param in node.params),
+                tuple(keys[input_name] for input_name in inputs[node.name])
+            )
+
+        # Walk back from the targets; a memoized output spares its inputs
+        values = {}
+        needed = set(targets)
+        for node in reversed(order):
+            if node.name not in needed:
+                continue
+            cached = self.memo.get(keys[node.name]) if node.memoize else None
+            if cached is not None:
+                values[node.name] = cached[0]
+            else:
+                needed.update(inputs[node.name])
+
+        values = {node.name: values[node.name] for node in order if node.name in values}
+        return values, [
+            (node, keys[node.name] if node.memoize else None, inputs[node.name])
+            for node in order if node.name in needed and node.name not in values
+        ]
+
+    def _run_node(self, node, key, **kwargs):
+        """Run a node, timing it and memoizing its output."""
+        with timed(f"node_{node.name}"):
+            value = node.fn(**kwargs)
+        if key is not None:
+            self.memo.put(key, (value,))
+        return value
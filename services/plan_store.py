@@ -0,0 +1,99 @@
+import json
+import time
+import logging
+import sqlite3
+import threading
+from services.serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryPlanStore:
+    """In-process plan store; plans are lost when the process exits."""
+
+    def __init__(self):
+        """Initialize the store."""
+        self._plans = {}
+        self._lock = threading.Lock()
+
+    def get(self, topic, version):
+        """Get the plan stored for a topic and template version, or None."""
+        with self._lock:
+            entry = self._plans.get(topic)
+        if entry is None or entry[0] != version:
+            return None
+        return entry[1]
+
+    def put_many(self, plans, version):
+        """Store plans given as (topic, plan) pairs, replacing existing ones."""
+        with self._lock:
+            for topic, plan in plans:
+                self._plans[topic] = (version, plan)
+
+    def put(self, topic, plan, version):
+        """Store the plan for a topic, replacing any existing one."""
+        self.put_many([(topic, plan)], version)
+
+    def __len__(self):
+        """Number of stored plans."""
+        with self._lock:
+            return len(self._plans)
+
+
+class SQLitePlanStore:
+    """
+    SQLite-backed plan store, so research plans survive restarts.
+
+    Plans are keyed by the exact topic, since the plan text is rendered
+    with it, making a lookup a single primary key read. Each plan records the template version it was generated
+    with; plans from other versions are not served and get replaced.
+    """
+
+    def __init__(self, path):
+        """
+        Open (and create if needed) the plan database.
+
+        Args:
+            path (str): Path of the SQLite database file
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+
+        with self._lock, self._connection:
+            self._connection.execute("""
+                CREATE TABLE IF NOT EXISTS research_plans (
+                    topic TEXT PRIMARY KEY,
+                    version TEXT NOT NULL,
+                    plan BLOB NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            """)
+
+    def get(self, topic, version):
+        """Get the plan stored for a topic and template version, or None."""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT plan FROM research_plans WHERE topic = ? AND version = ?",
+                (topic, version)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put_many(self, plans, version):
+        """Store plans given as (topic, plan) pairs in one transaction, replacing existing ones."""
+        now = time.time()
+        rows = [(topic, version, dumps(plan), now) for topic, plan in plans]
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO research_plans (topic, version, plan, created_at) VALUES (?, ?, ?, ?)",
+                rows
+            )
+
+    def put(self, topic, plan, version):
+        """Store the plan for a topic, replacing any existing one."""
+        self.put_many([(topic, plan)], version)
+
+    def __len__(self):
+        """Number of stored plans."""
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM research_plans").fetchone()[0]
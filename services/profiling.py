@@ -0,0 +1,212 @@
+import re
+import sys
+import time
+import uuid
+import random
+import logging
+import cProfile
+import threading
+import contextvars
+from collections import Counter, deque
+from pathlib import Path
+from services.metrics import registry, collect_timings
+from utils.corpus import normalize_topic
+
+logger = logging.getLogger(__name__)
+
+# Profiling modes: "cprofile" writes .pstats plus sampled stacks, "sample"
+# only runs the low-overhead stack sampler
+PROFILE_MODES = ("cprofile", "sample")
+
+PROFILES = registry.counter(
+    "jtbd_profiles_total",
+    "Profiling requests by mode and outcome",
+    ("mode", "result")
+)
+
+# Set while a computation is profiled, so it keeps its work on the profiled thread
+_profiling = contextvars.ContextVar("jtbd_profiling", default=False)
+
+
+def profiling_active():
+    """Whether the current context is being profiled by Profiler.run."""
+    return _profiling.get()
+
+
+class StackSampler:
+    """
+    Samples the stack of one thread at a fixed interval.
+
+    Stacks are aggregated in the collapsed format used by flamegraph.pl,
+    speedscope and py-spy ("outer;inner;leaf count" per line), with frames
+    named "function (file:line)".
+    """
+
+    def __init__(self, thread_id, interval=0.005):
+        """
+        Initialize the sampler.
+
+        Args:
+            thread_id (int): Ident of the thread to sample
+            interval (float): Seconds between samples
+        """
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start sampling in a background thread."""
+        self._thread = threading.Thread(target=self._run, name="jtbd-stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop sampling and wait for the sampler thread."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def write(self, path):
+        """Write the collapsed stacks to `path`."""
+        with open(path, "w") as file:
+            for stack, count in self.stacks.most_common():
+                file.write(f"{stack} {count}\n")
+
+    def _run(self):
+        """Record the target thread's stack until stopped."""
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+
+            frames = []
+            while frame is not None:
+                code = frame.f_code
+                frames.append(f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(frames))] += 1
+
+
+class Profiler:
+    """
+    Opt-in, rate-limited profiling of individual queries.
+
+    A profile is taken when a caller asks for one, or at random for a
+    `sample_rate` fraction of computations. Either way at most
+    `max_per_minute` profiles are taken, so profiling can stay enabled in
+    production. Files are named after the topic and corpus size.
+
+    cProfile and the stack sampler only see the calling thread, so work
+    that would be handed to worker threads checks `profiling_active()` and
+    runs inline instead.
+    """
+
+    def __init__(self, output_directory="profiles", max_per_minute=6, sample_rate=0.0, interval=0.005):
+        """
+        Initialize the profiler.
+
+        Args:
+            output_directory (str): Directory to write profile files to
+            max_per_minute (int): Maximum number of profiles per minute
+            sample_rate (float): Fraction of computations profiled automatically
+            interval (float): Seconds between stack samples
+        """
+        self.output_directory = Path(output_directory)
+        self.max_per_minute = max_per_minute
+        self.sample_rate = sample_rate
+        self.interval = interval
+
+        self._recent = deque()
+        self._lock = threading.Lock()
+        # Only one cProfile profiler can be active per process
+        self._cprofile_lock = threading.Lock()
+
+    def automatic_mode(self):
+        """Return "sample" for the `sample_rate` fraction of calls, else None."""
+        if self.sample_rate and random.random() < self.sample_rate:
+            return "sample"
+        return None
+
+    def acquire(self):
+        """
+        Reserve a slot under the rate limit.
+
+        Returns:
+            bool: Whether a profile may be taken now
+        """
+        now = time.monotonic()
+        with self._lock:
+            while self._recent and now - self._recent[0] > 60:
+                self._recent.popleft()
+            if len(self._recent) >= self.max_per_minute:
+                return False
+            self._recent.append(now)
+            return True
+
+    def run(self, mode, topic, fn, *args, **kwargs):
+        """
+        Call `fn(*args, **kwargs)`, profiling it if the rate limit allows.
+
+        Args:
+            mode (str): "cprofile" or "sample"
+            topic (str): Topic used to name the profile files
+            fn (callable): The computation to profile
+
+        Returns:
+            tuple: (result, list of written file paths, or None if not profiled)
+        """
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profiling mode: {mode}")
+
+        use_cprofile = mode == "cprofile" and self._cprofile_lock.acquire(blocking=False)
+        if (mode == "cprofile" and not use_cprofile) or not self.acquire():
+            if use_cprofile:
+                self._cprofile_lock.release()
+            PROFILES.inc(mode=mode, result="rate_limited")
+            return fn(*args, **kwargs), None
+
+        profile = cProfile.Profile() if use_cprofile else None
+        sampler = StackSampler(threading.get_ident(), self.interval)
+
+        token = _profiling.set(True)
+        try:
+            with collect_timings() as timings:
+                sampler.start()
+                if profile:
+                    profile.enable()
+                try:
+                    result = fn(*args, **kwargs)
+                finally:
+                    if profile:
+                        profile.disable()
+                    sampler.stop()
+        finally:
+            _profiling.reset(token)
+            if use_cprofile:
+                self._cprofile_lock.release()
+
+        paths = self._save(topic, timings.corpus_size, profile, sampler)
+        PROFILES.inc(mode=mode, result="captured")
+        return result, paths
+
+    def _save(self, topic, corpus_size, profile, sampler):
+        """Write the profile files and return their paths."""
+        self.output_directory.mkdir(parents=True, exist_ok=True)
+        stem = "-".join([
+            time.strftime("%Y%m%d-%H%M%S"),
+            re.sub(r"[^a-z0-9_]+", "_", normalize_topic(topic or "unknown")),
+            f"{corpus_size if corpus_size is not None else 'unknown'}entries",
+            uuid.uuid4().hex[:6],
+        ])
+
+        paths = []
+        if profile:
+            paths.append(self.output_directory / f"{stem}.pstats")
+            profile.dump_stats(paths[-1])
+
+        paths.append(self.output_directory / f"{stem}.collapsed")
+        sampler.write(paths[-1])
+
+        logger.info(f"Wrote profile for '{topic}' to {', '.join(str(path) for path in paths)}")
+        return paths
@@ -0,0 +1,171 @@
+import gzip
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# orjson and brotli are optional; fall back to the standard library
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this are sent uncompressed
+MIN_COMPRESS_SIZE = 1024
+
+# Content codings we can produce, in order of preference
+SUPPORTED_ENCODINGS = (["br"] if brotli else []) + ["gzip"]
+
+
+def dumps(obj):
+    """
+    Serialize an object to compact UTF-8 JSON.
+
+    Args:
+        obj: JSON-compatible object (numpy scalars and arrays are accepted)
+
+    Returns:
+        bytes: The serialized JSON
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+
+    return json.dumps(obj, separators=(",", ":"), default=_json_default).encode("utf-8")
+
+
+def _json_default(obj):
+    """Convert numpy values for the stdlib encoder."""
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def compress(body, encoding):
+    """
+    Compress a body with the given content coding.
+
+    Args:
+        body (bytes): The body to compress
+        encoding (str): "br" or "gzip"
+
+    Returns:
+        bytes: The compressed body
+    """
+    if encoding == "br":
+        return brotli.compress(body, quality=5)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=6)
+
+    raise ValueError(f"Unsupported content encoding: {encoding}")
+
+
+def negotiate_encoding(accept_encoding):
+    """
+    Pick the best supported content coding from an Accept-Encoding header.
+
+    Args:
+        accept_encoding (str): The Accept-Encoding header value, may be empty
+
+    Returns:
+        str: "br", "gzip", or None for an uncompressed response
+    """
+    if not accept_encoding:
+        return None
+
+    accepted = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+
+    wildcard = accepted.get("*", 0.0)
+    for encoding in SUPPORTED_ENCODINGS:
+        if accepted.get(encoding, wildcard) > 0:
+            return encoding
+
+    return None
+
+
+class EncodedPayload:
+    """
+    A serialized JSON body with lazily computed compressed variants.
+
+    Storing these in the response cache means cache hits skip both
+    encoding and compression.
+    """
+
+    def __init__(self, obj):
+        """
+        Serialize an object into a payload.
+
+        Args:
+            obj: JSON-compatible object
+        """
+        self.body = dumps(obj)
+        self._compressed = {}
+
+    @classmethod
+    def from_body(cls, body):
+        """
+        Wrap an already serialized JSON body.
+
+        Args:
+            body (bytes): Serialized JSON
+
+        Returns:
+            EncodedPayload: The payload
+        """
+        payload = cls.__new__(cls)
+        payload.body = body
+        payload._compressed = {}
+        return payload
+
+    def with_extra(self, key, value):
+        """
+        Return a new payload with one more top-level key, without re-encoding the body.
+
+        Args:
+            key (str): The key to add
+            value: JSON-compatible value
+
+        Returns:
+            EncodedPayload: The extended payload
+        """
+        member = dumps(key) + b":" + dumps(value)
+        if self.body.rstrip().endswith(b"{}"):
+            return EncodedPayload.from_body(b"{" + member + b"}")
+        return EncodedPayload.from_body(self.body.rstrip()[:-1] + b"," + member + b"}")
+
+    def encoded(self, encoding):
+        """
+        Get the body for a content coding.
+
+        Args:
+            encoding (str, optional): "br", "gzip", or None
+
+        Returns:
+            tuple: (body bytes, content coding actually applied or None)
+        """
+        if encoding is None or len(self.body) < MIN_COMPRESS_SIZE:
+            return self.body, None
+
+        if encoding not in self._compressed:
+            self._compressed[encoding] = compress(self.body, encoding)
+
+        return self._compressed[encoding], encoding
+
+    @property
+    def size(self):
+        """Size of the uncompressed body in bytes."""
+        return len(self.body)
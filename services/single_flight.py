@@ -0,0 +1,135 @@
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key into a single computation.
+
+    The first caller for a key runs the computation; callers arriving while
+    it is in flight wait for and share its result (or exception). Nothing is
+    cached once the computation finishes. Callers must treat the shared
+    result as read-only.
+
+    `do` serves threaded callers and `do_async` serves coroutines on an
+    event loop; the two keep separate in-flight tables.
+    """
+
+    def __init__(self):
+        """Initialize the in-flight tables."""
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._async_calls = {}
+        self.coalesced = 0
+
+    def do(self, key, fn, *args, **kwargs):
+        """
+        Run `fn(*args, **kwargs)` unless a call with the same key is in flight.
+
+        Args:
+            key: Hashable key identifying the computation
+            fn (callable): The computation
+
+        Returns:
+            The computation's result
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            is_leader = future is None
+            if is_leader:
+                future = Future()
+                self._calls[key] = future
+            else:
+                self.coalesced += 1
+
+        if not is_leader:
+            logger.debug(f"Joining in-flight computation for {key}")
+            return future.result()
+
+        try:
+            result = fn(*args, **kwargs)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def do_stages(self, key, stages_fn, *args, **kwargs):
+        """
+        Staged variant of `do` for generators yielding (stage, payload) pairs.
+
+        The leader iterates `stages_fn(*args, **kwargs)` and passes every
+        stage through; its ("result", payload) stage is shared with callers
+        of `do` or `do_stages` that join while it is in flight. Joining
+        callers only receive the final ("result", payload) stage.
+
+        Args:
+            key: Hashable key identifying the computation
+            stages_fn (callable): Generator function ending with a "result" stage
+
+        Yields:
+            tuple: (stage name, stage payload)
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            is_leader = future is None
+            if is_leader:
+                future = Future()
+                self._calls[key] = future
+            else:
+                self.coalesced += 1
+
+        if not is_leader:
+            logger.debug(f"Joining in-flight computation for {key}")
+            yield "result", future.result()
+            return
+
+        try:
+            for stage, payload in stages_fn(*args, **kwargs):
+                if stage == "result":
+                    future.set_result(payload)
+                yield stage, payload
+        except BaseException as e:
+            if not future.done():
+                future.set_exception(e)
+            raise
+        finally:
+            # Don't leave joined callers waiting if the leader stopped early
+            if not future.done():
+                future.set_exception(RuntimeError("In-flight computation was abandoned"))
+            with self._lock:
+                del self._calls[key]
+
+    async def do_async(self, key, coro_fn, *args, **kwargs):
+        """
+        Await `coro_fn(*args, **kwargs)` unless a call with the same key is in flight.
+
+        The shared task is shielded, so a cancelled waiter does not cancel
+        the computation for the others.
+
+        Args:
+            key: Hashable key identifying the computation
+            coro_fn (callable): Coroutine function performing the computation
+
+        Returns:
+            The computation's result
+        """
+        task = self._async_calls.get(key)
+
+        if task is None:
+            task = asyncio.ensure_future(coro_fn(*args, **kwargs))
+            self._async_calls[key] = task
+            task.add_done_callback(lambda _: self._async_calls.pop(key, None))
+        else:
+            with self._lock:
+                self.coalesced += 1
+            logger.debug(f"Joining in-flight task for {key}")
+
+        return await asyncio.shield(task)
@@ -0,0 +1,133 @@
+import logging
+import contextvars
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, wait
+
+logger = logging.getLogger(__name__)
+
+
+class TaskGraph:
+    """
+    A small graph of tasks run concurrently on an executor.
+
+    Each task is a callable with fixed arguments plus the results of the
+    tasks it depends on. Tasks are submitted as soon as their inputs are
+    ready, from the calling thread, so workers never block waiting on
+    other tasks. Tasks run in a copy of the caller's context, so stage
+    timings are collected as if they ran inline.
+    """
+
+    def __init__(self):
+        """Initialize an empty graph."""
+        self._tasks = {}
+
+    def add(self, name, fn, *args, inputs=None, **kwargs):
+        """
+        Add a task.
+
+        Args:
+            name (str): Unique task name; its result is stored under it
+            fn (callable): The task
+            *args: Positional arguments for `fn`
+            inputs (dict, optional): Keyword argument name to the name of the
+                task whose result is passed as that argument
+            **kwargs: Further keyword arguments for `fn`
+
+        Raises:
+            ValueError: If the name is taken or an input is not a known task
+        """
+        if name in self._tasks:
+            raise ValueError(f"Duplicate task: {name}")
+
+        inputs = dict(inputs or {})
+        unknown = set(inputs.values()) - set(self._tasks)
+        if unknown:
+            raise ValueError(f"Task {name} depends on unknown tasks: {', '.join(sorted(unknown))}")
+
+        self._tasks[name] = (fn, args, kwargs, inputs)
+
+    def run(self, executor):
+        """
+        Run every task and wait for them to finish.
+
+        Args:
+            executor (concurrent.futures.Executor): Executor to run tasks on
+
+        Returns:
+            dict: Task name to result
+
+        Raises:
+            Exception: The first exception raised by a task; tasks not yet
+                started are cancelled
+        """
+        return dict(self.iter_run(executor))
+
+    def iter_run(self, executor):
+        """
+        Run every task, yielding each result as its task finishes.
+
+        Tasks unblocked by a result are submitted before it is yielded, so
+        a slow consumer does not hold back the graph. Closing the iterator
+        early cancels the tasks not yet started.
+
+        Args:
+            executor (concurrent.futures.Executor): Executor to run tasks on
+
+        Yields:
+            tuple: (task name, result), in completion order
+
+        Raises:
+            Exception: The first exception raised by a task; tasks not yet
+                started are cancelled
+        """
+        results = {}
+        pending = dict(self._tasks)
+        running = {}
+
+        try:
+            self._submit_ready(executor, pending, running, results)
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                # In submission order, so tasks finishing together are yielded deterministically
+                finished = [(name, future.result()) for future, name in running.items() if future in done]
+                for future in done:
+                    del running[future]
+                results.update(finished)
+
+                self._submit_ready(executor, pending, running, results)
+                yield from finished
+
+        except BaseException:
+            for future in running:
+                future.cancel()
+            raise
+
+    def _submit_ready(self, executor, pending, running, results):
+        """Submit the pending tasks whose dependencies have all finished."""
+        for name, task in list(pending.items()):
+            if all(dependency in results for dependency in task[3].values()):
+                running[self._submit(executor, task, results)] = name
+                del pending[name]
+
+    def _submit(self, executor, task, results):
+        """Submit a task with its dependencies' results, in a copy of the current context."""
+        fn, args, kwargs, inputs = task
+        kwargs = {**kwargs, **{argument: results[dependency] for argument, dependency in inputs.items()}}
+        return executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+class InlineExecutor(Executor):
+    """
+    Executor running each task on the calling thread as it is submitted.
+
+    A TaskGraph run on it executes its tasks one at a time, for work that
+    must stay on one thread, e.g. while it is profiled.
+    """
+
+    def submit(self, fn, /, *args, **kwargs):
+        """Run `fn` now and return its completed future."""
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
@@ -0,0 +1,129 @@
+import time
+import logging
+import threading
+from utils.corpus import discover_topics
+
+logger = logging.getLogger(__name__)
+
+
+class WarmupManager:
+    """
+    Precomputes analyses for known topics in a background thread.
+
+    Every configured topic (or every topic with files in the data
+    directory) is triaged and handed to `warm_fn`, which is expected to
+    compute and cache the response. Afterwards the data files are polled
+    and topics whose corpus fingerprint changed are warmed again.
+    """
+
+    def __init__(self, system, warm_fn, topics=None, interval=30.0):
+        """
+        Initialize the warm-up manager.
+
+        Args:
+            system (JTBDMultiAgentSystem): System whose agents resolve topics
+            warm_fn (callable): Called with a triage result to compute and cache it
+            topics (list, optional): Topics to warm; defaults to all topics in the data directory
+            interval (float): Seconds between checks for changed data; 0 disables watching
+        """
+        self.system = system
+        self.warm_fn = warm_fn
+        self.topics = topics
+        self.interval = interval
+
+        self._fingerprints = {}
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._status = {
+            "state": "pending",
+            "topics_total": 0,
+            "topics_warmed": 0,
+            "current_topic": None,
+            "last_completed_at": None,
+            "errors": {},
+        }
+
+    def start(self):
+        """Start warming in a background thread."""
+        self._thread = threading.Thread(target=self._run, name="jtbd-warmup", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background thread after the current topic."""
+        self._stop.set()
+
+    @property
+    def ready(self):
+        """Whether the initial warm-up pass has completed."""
+        return self._status["last_completed_at"] is not None
+
+    def status(self):
+        """
+        Get warm-up progress.
+
+        Returns:
+            dict: Current state, topic counts, current topic and errors
+        """
+        with self._lock:
+            status = dict(self._status)
+            status["errors"] = dict(self._status["errors"])
+
+        status["ready"] = status["last_completed_at"] is not None
+        return status
+
+    def _run(self):
+        """Warm all topics, then re-warm topics whose data changes."""
+        self.warm_all()
+
+        while self.interval and not self._stop.wait(self.interval):
+            self.warm_all(only_changed=True)
+
+    def warm_all(self, only_changed=False):
+        """
+        Warm every topic, or only those whose data files changed.
+
+        Args:
+            only_changed (bool): Skip topics whose fingerprint is unchanged
+        """
+        topics = self.topics or discover_topics(self.system.triage_agent.data_directory)
+
+        if only_changed:
+            topics = [
+                topic for topic in topics
+                if self._fingerprints.get(topic) != self.system.corpus_fingerprint(topic)
+            ]
+            if not topics:
+                return
+            logger.info(f"Data changed for {len(topics)} topics, warming again")
+
+        with self._lock:
+            self._status.update(state="running", topics_total=len(topics), topics_warmed=0)
+
+        for topic in topics:
+            if self._stop.is_set():
+                return
+
+            with self._lock:
+                self._status["current_topic"] = topic
+
+            start_time = time.perf_counter()
+            try:
+                fingerprint = self.system.corpus_fingerprint(topic)
+                self.warm_fn(self.system.triage_agent.triage_topic(topic))
+                self._fingerprints[topic] = fingerprint
+
+                with self._lock:
+                    self._status["errors"].pop(topic, None)
+                logger.info(f"Warmed topic '{topic}' in {time.perf_counter() - start_time:.2f}s")
+
+            except Exception as e:
+                logger.error(f"Error warming topic '{topic}': {str(e)}")
+                with self._lock:
+                    self._status["errors"][topic] = str(e)
+
+            with self._lock:
+                self._status["topics_warmed"] += 1
+
+        with self._lock:
+            self._status.update(state="idle", current_topic=None, last_completed_at=time.time())
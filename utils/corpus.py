@@ -0,0 +1,194 @@
+import json
+import hashlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Research data file formats: a single JSON document, or JSON Lines whose
+# first line is a header ({"topic", "sources", "entries"}) followed by one
+# research entry per line
+DATA_FILE_SUFFIXES = (".json", ".jsonl")
+
+
+def normalize_topic(topic):
+    """
+    Normalize a topic name for file matching.
+
+    Args:
+        topic (str): The topic name
+
+    Returns:
+        str: Lowercase topic with spaces replaced by underscores
+    """
+    return topic.lower().replace(" ", "_")
+
+
+def find_topic_files(data_directory, topic):
+    """
+    Find the research data files for a topic.
+
+    Args:
+        data_directory (Path): Directory containing the research data files
+        topic (str): The topic to find files for
+
+    Returns:
+        list: Matching file paths, sorted by name
+    """
+    normalized_topic = normalize_topic(topic)
+    return sorted(
+        file_path for file_path in data_directory.glob(f"*{normalized_topic}*")
+        if file_path.suffix in DATA_FILE_SUFFIXES
+    )
+
+
+def discover_topics(data_directory):
+    """
+    List the topics that have research data files.
+
+    Topic names are derived from file names such as
+    "online_grocery_shopping_complete.json" or "..._complete.jsonl".
+
+    Args:
+        data_directory (Path): Directory containing the research data files
+
+    Returns:
+        list: Sorted topic names
+    """
+    topics = set()
+    for file_path in data_directory.glob("*"):
+        if file_path.suffix not in DATA_FILE_SUFFIXES:
+            continue
+        name = file_path.stem
+        for suffix in ("_complete", "_partial"):
+            if name.endswith(suffix):
+                name = name[:-len(suffix)]
+                break
+        topics.add(name.replace("_", " "))
+
+    return sorted(topics)
+
+
+def read_corpus_file(file_path):
+    """
+    Load a research data file in either supported format.
+
+    Args:
+        file_path (Path): Path of a .json or .jsonl data file
+
+    Returns:
+        dict: The data, with "topic", "sources" and "research_data"
+    """
+    with open(file_path, "r") as file:
+        if file_path.suffix != ".jsonl":
+            return json.load(file)
+
+        header = json.loads(file.readline())
+        return {
+            "topic": header.get("topic"),
+            "sources": header.get("sources", []),
+            "research_data": [json.loads(line) for line in file if line.strip()]
+        }
+
+
+def read_corpus_header(file_path):
+    """
+    Read the topic, sources and entry count of a research data file.
+
+    JSON Lines files answer from their header line, so large corpora can be
+    inspected without parsing every entry.
+
+    Args:
+        file_path (Path): Path of a .json or .jsonl data file
+
+    Returns:
+        dict: "topic", "sources" and "entries"
+    """
+    if file_path.suffix == ".jsonl":
+        with open(file_path, "r") as file:
+            header = json.loads(file.readline())
+            if "entries" not in header:
+                header["entries"] = sum(1 for line in file if line.strip())
+    else:
+        data = read_corpus_file(file_path)
+        header = {"topic": data.get("topic"), "entries": len(data.get("research_data", []))}
+        header["sources"] = data.get("sources", [])
+
+    return {"topic": header.get("topic"), "sources": header.get("sources", []), "entries": header["entries"]}
+
+
+def read_corpus_summary(file_path):
+    """
+    Count the sources and entries in a research data file.
+
+    Args:
+        file_path (Path): Path of a .json or .jsonl data file
+
+    Returns:
+        tuple: (number of sources, number of entries)
+    """
+    header = read_corpus_header(file_path)
+    return len(header["sources"]), header["entries"]
+
+
+class CorpusEntries:
+    """
+    Re-iterable, lazily read view of the research entries in data files.
+
+    Each iteration reads the files again. JSON Lines files are read one
+    entry at a time, so only the entry being processed is held in memory;
+    a .json file is parsed whole on every pass, so only JSON Lines corpora
+    are streamed to stay within a memory budget.
+    """
+
+    def __init__(self, data_files):
+        """
+        Initialize the view.
+
+        Args:
+            data_files (list): Paths of the research data files
+        """
+        self.data_files = list(data_files)
+        self._length = None
+
+    def __iter__(self):
+        """Yield the entries of every file in order."""
+        for file_path in self.data_files:
+            if file_path.suffix != ".jsonl":
+                yield from read_corpus_file(file_path).get("research_data", [])
+                continue
+
+            with open(file_path, "r") as file:
+                file.readline()
+                for line in file:
+                    if line.strip():
+                        yield json.loads(line)
+
+    def __len__(self):
+        """Number of entries, counted once from the file summaries."""
+        if self._length is None:
+            self._length = sum(read_corpus_summary(file_path)[1] for file_path in self.data_files)
+        return self._length
+
+
+def corpus_fingerprint(data_files):
+    """
+    Compute a fingerprint that changes whenever the given data files change.
+
+    Uses file names, sizes and modification times, so it is cheap enough
+    to compute on every request.
+
+    Args:
+        data_files (list): Paths of the research data files
+
+    Returns:
+        str: Hex digest identifying the current state of the files
+    """
+    digest = hashlib.sha1()
+    for file_path in sorted(data_files):
+        try:
+            stat = file_path.stat()
+        except OSError:
+            continue
+        digest.update(f"{file_path.name}:{stat.st_size}:{stat.st_mtime_ns};".encode("utf-8"))
+
+    return digest.hexdigest()
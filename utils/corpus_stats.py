@@ -0,0 +1,221 @@
+import json
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from utils.corpus import CorpusEntries, corpus_fingerprint, find_topic_files, normalize_topic, read_corpus_header
+
+logger = logging.getLogger(__name__)
+
+# Age band edges (lower bounds) and labels used for demographic breakdowns
+AGE_BAND_EDGES = [0, 25, 35, 45, 55, 65, np.inf]
+AGE_BANDS = ["under 25", "25-34", "35-44", "45-54", "55-64", "65+"]
+
+# Columns of the columnar view built from research entries
+STAT_COLUMNS = ["source", "job_type", "age", "gender", "experience_level"]
+
+# Demographic dimensions entries can be segmented by
+SEGMENT_DIMENSIONS = ["age_band", "gender", "experience_level"]
+
+# Subdirectory of the data directory holding cached statistics
+STATS_DIRECTORY = ".corpus_stats"
+
+# Version of the statistics below; cached statistics of other versions are recomputed
+STATS_VERSION = 2
+
+
+def corpus_frame(entries, statements=False):
+    """
+    Build a columnar view of research entries.
+
+    Args:
+        entries (iterable): Research entries
+        statements (bool): Also include a "statement" column
+
+    Returns:
+        pandas.DataFrame: One row per entry with STAT_COLUMNS
+    """
+    records = (
+        (
+            entry.get("source", "Unknown"),
+            entry.get("job_type", "unknown"),
+            (entry.get("user_demographics") or {}).get("age"),
+            (entry.get("user_demographics") or {}).get("gender", "Unknown"),
+            (entry.get("user_demographics") or {}).get("experience_level", "Unknown"),
+            *((entry.get("statement", ""),) if statements else ()),
+        )
+        for entry in entries
+    )
+    columns = STAT_COLUMNS + ["statement"] if statements else STAT_COLUMNS
+    frame = pd.DataFrame.from_records(records, columns=columns)
+    frame["age"] = pd.to_numeric(frame["age"], errors="coerce")
+    return frame
+
+
+def segment_column(frame, dimension):
+    """
+    Get the column of a frame that segments it by a demographic dimension.
+
+    Args:
+        frame (pandas.DataFrame): Result of corpus_frame
+        dimension (str): One of SEGMENT_DIMENSIONS
+
+    Returns:
+        pandas.Series: Segment label of each entry
+    """
+    if dimension == "age_band":
+        return age_bands(frame["age"])
+    return frame[dimension]
+
+
+def age_bands(ages):
+    """
+    Label ages with their band.
+
+    Args:
+        ages (pandas.Series): Ages, possibly with missing values
+
+    Returns:
+        pandas.Series: Categorical age band labels
+    """
+    return pd.cut(ages, bins=AGE_BAND_EDGES, labels=AGE_BANDS, right=False)
+
+
+def compute_corpus_stats(data_files):
+    """
+    Compute corpus statistics with vectorized group-bys over a columnar view.
+
+    Args:
+        data_files (list): Paths of the topic's research data files
+
+    Returns:
+        dict: Entry and source counts (distinct, and summed over files),
+            per-source, job type and demographic distributions, and whether
+            the sources triangulate
+    """
+    sources = set()
+    listed_source_count = 0
+    readable_files = []
+    for file_path in data_files:
+        try:
+            file_sources = read_corpus_header(file_path)["sources"]
+            sources.update(file_sources)
+            listed_source_count += len(file_sources)
+            readable_files.append(file_path)
+        except Exception as e:
+            logger.error(f"Error reading data file {file_path}: {e}")
+
+    frame = corpus_frame(CorpusEntries(readable_files))
+
+    entries_per_source = frame["source"].value_counts()
+    demographics = {
+        dimension: segment_column(frame, dimension).value_counts(sort=dimension != "age_band")
+        for dimension in SEGMENT_DIMENSIONS
+    }
+
+    return {
+        "entries": len(frame),
+        "sources": sorted(sources),
+        "source_count": len(sources),
+        # Sources summed over files (repeats counted once per file), as triage counts them
+        "listed_source_count": listed_source_count,
+        "entries_per_source": _counts(entries_per_source),
+        "job_types": _counts(frame["job_type"].value_counts()),
+        "demographics": {name: _counts(counts) for name, counts in demographics.items()},
+        "has_triangulation": bool(len(entries_per_source) >= 2 and (entries_per_source >= 2).all()),
+    }
+
+
+def _counts(series):
+    """Convert value counts to a plain dict of label to int."""
+    return {str(label): int(count) for label, count in series.items()}
+
+
+class CorpusStatsStore:
+    """
+    Corpus statistics per topic, cached by corpus fingerprint.
+
+    Statistics are kept in memory (LRU) and written next to the corpus in
+    a `.corpus_stats` directory, so they are computed once per version of
+    the data files, even across restarts.
+    """
+
+    def __init__(self, data_directory="data", max_entries=256):
+        """
+        Initialize the store.
+
+        Args:
+            data_directory (str): Directory holding the research data files
+            max_entries (int): Number of topics kept in memory
+        """
+        self.data_directory = Path(data_directory)
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, topic):
+        """
+        Get the statistics of a topic's corpus, computing them if needed.
+
+        Args:
+            topic (str): The topic
+
+        Returns:
+            dict: Corpus statistics (see compute_corpus_stats) with the
+                corpus "fingerprint", or None if the topic has no data files
+        """
+        data_files = find_topic_files(self.data_directory, topic)
+        if not data_files:
+            return None
+
+        fingerprint = corpus_fingerprint(data_files)
+        key = (normalize_topic(topic), fingerprint)
+
+        with self._lock:
+            stats = self._entries.get(key)
+            if stats is not None:
+                self._entries.move_to_end(key)
+                return stats
+
+        stats = self._read(key) or self._compute(key, data_files)
+
+        with self._lock:
+            self._entries[key] = stats
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+        return stats
+
+    def _path(self, key):
+        """Path of the cached statistics file for a (topic, fingerprint) key."""
+        topic, fingerprint = key
+        return self.data_directory / STATS_DIRECTORY / f"{topic}-v{STATS_VERSION}-{fingerprint[:16]}.json"
+
+    def _read(self, key):
+        """Load cached statistics from disk, or None if absent or unreadable."""
+        path = self._path(key)
+        try:
+            with open(path, "r") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def _compute(self, key, data_files):
+        """Compute statistics and write them to disk, replacing older versions."""
+        stats = compute_corpus_stats(data_files)
+        stats["fingerprint"] = key[1]
+
+        path = self._path(key)
+        try:
+            path.parent.mkdir(exist_ok=True)
+            for stale_path in path.parent.glob(f"{key[0]}-*.json"):
+                stale_path.unlink()
+            with open(path, "w") as file:
+                json.dump(stats, file)
+        except OSError as e:
+            logger.warning(f"Could not cache corpus statistics at {path}: {e}")
+
+        return stats
@@ -2,18 +2,117 @@ import json
 import random
 import os
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
 import logging
+import numpy as np
+from utils.corpus import normalize_topic
 
 logger = logging.getLogger(__name__)
 
+# Sources used for complete datasets
+COMPLETE_SOURCES = [
+    "User Interviews",
+    "Customer Support Logs",
+    "Product Reviews",
+    "Survey Responses",
+    "Usability Testing"
+]
+
+JOB_TYPES = ["functional", "social", "emotional"]
+GENDERS = ["Male", "Female", "Non-binary"]
+EXPERIENCE_LEVELS = ["Beginner", "Intermediate", "Advanced"]
+
+# Statement and context templates by job type; "{topic}" is filled in per dataset
+FUNCTIONAL_TEMPLATES = [
+    "I need to use {topic} to get my work done faster.",
+    "I have to use {topic} because it helps me organize everything in one place.",
+    "Using {topic} allows me to accomplish multiple tasks at once.",
+    "I want to use {topic} that doesn't require much training or setup.",
+    "{topic} helps me avoid mistakes in my work.",
+    "I need {topic} to handle the complex parts of the process automatically.",
+    "I'm trying to find a {topic} solution that integrates with my existing tools.",
+    "The main reason I use {topic} is to save time on repetitive tasks.",
+    "{topic} needs to help me track my progress toward my goals.",
+    "I switch between different {topic} options until I find one that's efficient enough.",
+    "The most important thing for me is that {topic} is reliable and doesn't crash.",
+    "I need {topic} to work across all my devices seamlessly."
+]
+
+SOCIAL_TEMPLATES = [
+    "My colleagues respect me more when they see me using {topic} effectively.",
+    "I want people to see that I'm skilled with advanced {topic} features.",
+    "Using {topic} shows that I'm serious about my work.",
+    "I feel like I belong to a community of professionals who use {topic}.",
+    "It's important that my boss sees me using {topic} to solve problems.",
+    "I don't want to be the only person in my team who doesn't understand {topic}.",
+    "People ask for my advice about {topic}, which makes me feel valued.",
+    "Using the latest {topic} trends helps me stay relevant in my industry.",
+    "I want to be seen as an expert in {topic} by my peers.",
+    "Being able to recommend good {topic} solutions gives me status in my network.",
+    "I don't talk about using {topic} because I don't want to seem like I'm showing off.",
+    "I want my clients to be impressed by the {topic} tools I use."
+]
+
+EMOTIONAL_TEMPLATES = [
+    "I feel anxious when {topic} isn't working correctly.",
+    "Using {topic} gives me confidence that I won't miss anything important.",
+    "I get frustrated when {topic} is too complicated to figure out quickly.",
+    "I feel a sense of accomplishment when I master new {topic} features.",
+    "I worry about making mistakes when using {topic} for important tasks.",
+    "I feel overwhelmed by all the {topic} options available.",
+    "Using {topic} gives me peace of mind knowing my work is backed up.",
+    "I feel in control when I use {topic} to organize my projects.",
+    "I get excited when I discover new ways that {topic} can help me.",
+    "I feel stressed when {topic} changes its interface or features.",
+    "I trust that {topic} will protect my privacy and security.",
+    "I feel satisfied when {topic} helps me complete something difficult."
+]
+
+STATEMENT_TEMPLATES = {
+    "functional": FUNCTIONAL_TEMPLATES,
+    "social": SOCIAL_TEMPLATES,
+    "emotional": EMOTIONAL_TEMPLATES
+}
+
+CONTEXT_TEMPLATES = {
+    "functional": [
+        "When discussing how they accomplish tasks with {topic}",
+        "While demonstrating their use of {topic}",
+        "When asked about their workflow with {topic}",
+        "During a discussion about productivity and {topic}"
+    ],
+    "social": [
+        "When discussing how others perceive their use of {topic}",
+        "In a conversation about workplace status and {topic}",
+        "When asked about sharing their experience with {topic}",
+        "During a discussion about professional identity and {topic}"
+    ],
+    "emotional": [
+        "When reflecting on their feelings about {topic}",
+        "After using {topic} for a challenging task",
+        "When discussing stress factors related to {topic}",
+        "During a conversation about satisfaction with {topic}"
+    ]
+}
+
+# Entries generated per vectorized batch when writing large corpora
+BATCH_SIZE = 100000
+
 class TestDataGenerator:
     """
     Generates test research data for the JTBD multi-agent system.
     """
     
-    def __init__(self):
-        """Initialize the test data generator."""
-        self.data_directory = Path("data")
+    def __init__(self, data_directory="data", seed=None):
+        """
+        Initialize the test data generator.
+        
+        Args:
+            data_directory (str): Directory to write data files to
+            seed (int, optional): Seed for reproducible data; random when omitted
+        """
+        self.data_directory = Path(data_directory)
+        self.random = random.Random(seed)
         
         # Create data directory if it doesn't exist
         if not os.path.exists(self.data_directory):
@@ -48,6 +147,102 @@ class TestDataGenerator:
         else:
             return {}
     
+    def write_corpus(self, topic, entries_count, data_format="jsonl", seed=None, batch_size=BATCH_SIZE):
+        """
+        Stream a large complete dataset for a topic to a file.
+        
+        Entries are built from the same templates as generate_data, but the
+        choices are drawn in vectorized batches from a NumPy generator and
+        written as they are produced, so memory use stays flat. The same
+        seed, topic and count always produce the same file.
+        
+        Args:
+            topic (str): The topic to generate data for
+            entries_count (int): Number of research entries
+            data_format (str): "jsonl" or "json"
+            seed (int or numpy.random.SeedSequence, optional): Generator seed
+            batch_size (int): Entries generated per batch
+            
+        Returns:
+            Path: The written file
+        """
+        if data_format not in ("jsonl", "json"):
+            raise ValueError(f"Unsupported data format: {data_format}")
+        
+        rng = np.random.default_rng(seed)
+        file_path = self.data_directory / f"{normalize_topic(topic)}_complete.{data_format}"
+        
+        with open(file_path, 'w') as file:
+            if data_format == "jsonl":
+                file.write(json.dumps({"topic": topic, "sources": COMPLETE_SOURCES, "entries": entries_count}) + "\n")
+            else:
+                file.write(json.dumps({"topic": topic, "sources": COMPLETE_SOURCES})[:-1] + ', "research_data": [')
+            
+            for start in range(0, entries_count, batch_size):
+                lines = self._generate_entry_batch(rng, topic, start, min(batch_size, entries_count - start))
+                if data_format == "jsonl":
+                    file.write("\n".join(lines) + "\n")
+                else:
+                    file.write(("," if start else "") + ",".join(lines))
+            
+            if data_format == "json":
+                file.write("]}")
+        
+        logger.info(f"Wrote {entries_count} entries for '{topic}' to {file_path}")
+        return file_path
+    
+    def _generate_entry_batch(self, rng, topic, start, size):
+        """
+        Generate a batch of research entries as serialized JSON objects.
+        
+        Args:
+            rng (numpy.random.Generator): Source of randomness
+            topic (str): The topic for the entries
+            start (int): Index of the first entry, used to rotate sources
+            size (int): Number of entries
+            
+        Returns:
+            list: One JSON string per entry
+        """
+        # Flatten the templates so one index array selects across job types
+        statements, statement_offsets, statement_counts = [], [], []
+        contexts, context_offsets, context_counts = [], [], []
+        for job_type in JOB_TYPES:
+            statement_offsets.append(len(statements))
+            statement_counts.append(len(STATEMENT_TEMPLATES[job_type]))
+            statements.extend(json.dumps(template.format(topic=topic)) for template in STATEMENT_TEMPLATES[job_type])
+            
+            context_offsets.append(len(contexts))
+            context_counts.append(len(CONTEXT_TEMPLATES[job_type]))
+            contexts.extend(json.dumps(template.format(topic=topic)) for template in CONTEXT_TEMPLATES[job_type])
+        
+        job_types = rng.integers(0, len(JOB_TYPES), size)
+        statement_index = np.asarray(statement_offsets)[job_types] + (
+            rng.random(size) * np.asarray(statement_counts)[job_types]
+        ).astype(np.int64)
+        context_index = np.asarray(context_offsets)[job_types] + (
+            rng.random(size) * np.asarray(context_counts)[job_types]
+        ).astype(np.int64)
+        source_index = (start + np.arange(size)) % len(COMPLETE_SOURCES)
+        ages = rng.integers(18, 66, size)
+        genders = rng.integers(0, len(GENDERS), size)
+        experience_levels = rng.integers(0, len(EXPERIENCE_LEVELS), size)
+        
+        sources = [json.dumps(source) for source in COMPLETE_SOURCES]
+        job_type_names = [json.dumps(job_type) for job_type in JOB_TYPES]
+        gender_names = [json.dumps(gender) for gender in GENDERS]
+        experience_names = [json.dumps(level) for level in EXPERIENCE_LEVELS]
+        
+        return [
+            f'{{"statement": {statements[s]}, "source": {sources[so]}, "context": {contexts[c]}, '
+            f'"job_type": {job_type_names[j]}, "user_demographics": {{"age": {a}, '
+            f'"gender": {gender_names[g]}, "experience_level": {experience_names[e]}}}}}'
+            for s, so, c, j, a, g, e in zip(
+                statement_index.tolist(), source_index.tolist(), context_index.tolist(), job_types.tolist(),
+                ages.tolist(), genders.tolist(), experience_levels.tolist()
+            )
+        ]
+    
     def _generate_complete_data(self, topic):
         """
         Generate complete research data for a topic.
@@ -59,13 +254,7 @@ class TestDataGenerator:
             dict: The generated data
         """
         # Define sources for complete data
-        sources = [
-            "User Interviews",
-            "Customer Support Logs",
-            "Product Reviews",
-            "Survey Responses",
-            "Usability Testing"
-        ]
+        sources = list(COMPLETE_SOURCES)
         
         # Generate research data with a good mix of functional, social, and emotional jobs
         research_data = []
@@ -73,7 +262,7 @@ class TestDataGenerator:
         # Generate data from each source
         for source in sources:
             # Number of entries per source
-            entries_count = random.randint(5, 10)
+            entries_count = self.random.randint(5, 10)
             
             for _ in range(entries_count):
                 entry = self._generate_research_entry(topic, source)
@@ -96,7 +285,7 @@ class TestDataGenerator:
             dict: The generated data
         """
         # Define sources for partial data (fewer sources)
-        sources = random.sample([
+        sources = self.random.sample([
             "User Interviews",
             "Customer Support Logs",
             "Product Reviews"
@@ -108,7 +297,7 @@ class TestDataGenerator:
         # Generate data from each source
         for source in sources:
             # Fewer entries per source for partial data
-            entries_count = random.randint(2, 5)
+            entries_count = self.random.randint(2, 5)
             
             for _ in range(entries_count):
                 entry = self._generate_research_entry(topic, source)
@@ -132,38 +321,23 @@ class TestDataGenerator:
             dict: The generated entry
         """
         # Select job type
-        job_type = random.choice(["functional", "social", "emotional"])
+        job_type = self.random.choice(JOB_TYPES)
         
         # Generate statement based on job type
         if job_type == "functional":
             statement = self._generate_functional_statement(topic)
-            context = random.choice([
-                f"When discussing how they accomplish tasks with {topic}",
-                f"While demonstrating their use of {topic}",
-                f"When asked about their workflow with {topic}",
-                f"During a discussion about productivity and {topic}"
-            ])
+            context = self.random.choice(CONTEXT_TEMPLATES["functional"]).format(topic=topic)
         elif job_type == "social":
             statement = self._generate_social_statement(topic)
-            context = random.choice([
-                f"When discussing how others perceive their use of {topic}",
-                f"In a conversation about workplace status and {topic}",
-                f"When asked about sharing their experience with {topic}",
-                f"During a discussion about professional identity and {topic}"
-            ])
+            context = self.random.choice(CONTEXT_TEMPLATES["social"]).format(topic=topic)
         else:  # emotional
             statement = self._generate_emotional_statement(topic)
-            context = random.choice([
-                f"When reflecting on their feelings about {topic}",
-                f"After using {topic} for a challenging task",
-                f"When discussing stress factors related to {topic}",
-                f"During a conversation about satisfaction with {topic}"
-            ])
+            context = self.random.choice(CONTEXT_TEMPLATES["emotional"]).format(topic=topic)
         
         # Generate user demographics
-        age = random.randint(18, 65)
-        gender = random.choice(["Male", "Female", "Non-binary"])
-        experience_level = random.choice(["Beginner", "Intermediate", "Advanced"])
+        age = self.random.randint(18, 65)
+        gender = self.random.choice(GENDERS)
+        experience_level = self.random.choice(EXPERIENCE_LEVELS)
         
         return {
             "statement": statement,
@@ -187,22 +361,7 @@ class TestDataGenerator:
         Returns:
             str: A functional job statement
         """
-        templates = [
-            f"I need to use {topic} to get my work done faster.",
-            f"I have to use {topic} because it helps me organize everything in one place.",
-            f"Using {topic} allows me to accomplish multiple tasks at once.",
-            f"I want to use {topic} that doesn't require much training or setup.",
-            f"{topic} helps me avoid mistakes in my work.",
-            f"I need {topic} to handle the complex parts of the process automatically.",
-            f"I'm trying to find a {topic} solution that integrates with my existing tools.",
-            f"The main reason I use {topic} is to save time on repetitive tasks.",
-            f"{topic} needs to help me track my progress toward my goals.",
-            f"I switch between different {topic} options until I find one that's efficient enough.",
-            f"The most important thing for me is that {topic} is reliable and doesn't crash.",
-            f"I need {topic} to work across all my devices seamlessly."
-        ]
-        
-        return random.choice(templates)
+        return self.random.choice(FUNCTIONAL_TEMPLATES).format(topic=topic)
     
     def _generate_social_statement(self, topic):
         """
@@ -214,22 +373,7 @@ class TestDataGenerator:
         Returns:
             str: A social job statement
         """
-        templates = [
-            f"My colleagues respect me more when they see me using {topic} effectively.",
-            f"I want people to see that I'm skilled with advanced {topic} features.",
-            f"Using {topic} shows that I'm serious about my work.",
-            f"I feel like I belong to a community of professionals who use {topic}.",
-            f"It's important that my boss sees me using {topic} to solve problems.",
-            f"I don't want to be the only person in my team who doesn't understand {topic}.",
-            f"People ask for my advice about {topic}, which makes me feel valued.",
-            f"Using the latest {topic} trends helps me stay relevant in my industry.",
-            f"I want to be seen as an expert in {topic} by my peers.",
-            f"Being able to recommend good {topic} solutions gives me status in my network.",
-            f"I don't talk about using {topic} because I don't want to seem like I'm showing off.",
-            f"I want my clients to be impressed by the {topic} tools I use."
-        ]
-        
-        return random.choice(templates)
+        return self.random.choice(SOCIAL_TEMPLATES).format(topic=topic)
     
     def _generate_emotional_statement(self, topic):
         """
@@ -241,22 +385,7 @@ class TestDataGenerator:
         Returns:
             str: An emotional job statement
         """
-        templates = [
-            f"I feel anxious when {topic} isn't working correctly.",
-            f"Using {topic} gives me confidence that I won't miss anything important.",
-            f"I get frustrated when {topic} is too complicated to figure out quickly.",
-            f"I feel a sense of accomplishment when I master new {topic} features.",
-            f"I worry about making mistakes when using {topic} for important tasks.",
-            f"I feel overwhelmed by all the {topic} options available.",
-            f"Using {topic} gives me peace of mind knowing my work is backed up.",
-            f"I feel in control when I use {topic} to organize my projects.",
-            f"I get excited when I discover new ways that {topic} can help me.",
-            f"I feel stressed when {topic} changes its interface or features.",
-            f"I trust that {topic} will protect my privacy and security.",
-            f"I feel satisfied when {topic} helps me complete something difficult."
-        ]
-        
-        return random.choice(templates)
+        return self.random.choice(EMOTIONAL_TEMPLATES).format(topic=topic)
     
     def _save_data(self, data, filename):
         """
@@ -278,6 +407,43 @@ class TestDataGenerator:
             logger.error(f"Error saving test data to {file_path}: {e}")
 
 
+def _write_topic_corpus(data_directory, topic, entries_count, data_format, seed):
+    """Write one topic's corpus inside a worker process."""
+    return TestDataGenerator(data_directory).write_corpus(topic, entries_count, data_format, seed)
+
+
+def generate_corpora(topics, entries_count, seed=None, data_directory="data", data_format="jsonl", max_workers=None):
+    """
+    Write large seeded datasets for several topics in parallel.
+    
+    Each topic gets its own child of the seed, so a topic's file does not
+    depend on the other topics or on the number of workers.
+    
+    Args:
+        topics (list): Topics to generate data for
+        entries_count (int): Number of research entries per topic
+        seed (int, optional): Root seed; random when omitted
+        data_directory (str): Directory to write data files to
+        data_format (str): "jsonl" or "json"
+        max_workers (int, optional): Worker processes; defaults to the CPU count
+        
+    Returns:
+        list: The written file paths, in topic order
+    """
+    # Creates the data directory before the workers start
+    TestDataGenerator(data_directory)
+    
+    seeds = np.random.SeedSequence(seed).spawn(len(topics))
+    max_workers = min(max_workers or os.cpu_count() or 1, len(topics))
+    
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(_write_topic_corpus, data_directory, topic, entries_count, data_format, topic_seed)
+            for topic, topic_seed in zip(topics, seeds)
+        ]
+        return [future.result() for future in futures]
+
+
 def generate_sample_datasets():
     """Generate sample datasets for common topics."""
     generator = TestDataGenerator()
@@ -0,0 +1,212 @@
+import hashlib
+import logging
+import os
+import threading
+from pathlib import Path
+import numpy as np
+from sklearn.feature_extraction.text import HashingVectorizer
+
+logger = logging.getLogger(__name__)
+
+# spaCy is optional; only needed for the "spacy" backend
+try:
+    import spacy
+except ImportError:
+    spacy = None
+
+# Subdirectory of the data directory holding cached embeddings
+EMBEDDINGS_DIRECTORY = ".embeddings"
+
+# Dimensions of the hashed n-gram encoder
+HASHING_DIMENSIONS = 256
+
+# Bytes of the statement digest keying each cached vector
+KEY_BYTES = 16
+
+# Embedding backends; "tfidf" clusters on TF-IDF without embeddings
+EMBEDDING_BACKENDS = ("tfidf", "hashing", "spacy")
+
+# spaCy model used by the "spacy" backend unless one is given
+DEFAULT_SPACY_MODEL = "en_core_web_md"
+
+
+class HashingEncoder:
+    """
+    Encode statements as hashed character n-grams.
+
+    Needs no model or network. Statements sharing word stems ("worry",
+    "worried", "worrying") land close together, which TF-IDF over whole
+    words misses; synonyms need a model with word vectors (SpacyEncoder).
+    """
+
+    def __init__(self, dimensions=HASHING_DIMENSIONS, ngram_range=(3, 5)):
+        """
+        Initialize the encoder.
+
+        Args:
+            dimensions (int): Length of the vectors
+            ngram_range (tuple): Smallest and largest character n-gram
+        """
+        self.dimensions = dimensions
+        self.name = f"hashing-{dimensions}-{ngram_range[0]}-{ngram_range[1]}"
+        self._vectorizer = HashingVectorizer(
+            analyzer="char_wb", ngram_range=ngram_range, n_features=dimensions,
+            alternate_sign=False, norm="l2"
+        )
+
+    def encode(self, statements):
+        """Encode statements as L2-normalized float32 rows."""
+        return self._vectorizer.transform(statements).toarray().astype(np.float32)
+
+
+class SpacyEncoder:
+    """Encode statements as the mean word vector of a locally installed spaCy model."""
+
+    def __init__(self, model=DEFAULT_SPACY_MODEL):
+        """
+        Load the model.
+
+        Args:
+            model (str): Name or path of an installed spaCy model with word vectors
+
+        Raises:
+            ValueError: If spaCy or the model is unavailable, or it has no vectors
+        """
+        if spacy is None:
+            raise ValueError("The spacy embedding backend requires the spacy package")
+        try:
+            self._nlp = spacy.load(model, exclude=["tagger", "parser", "ner", "lemmatizer", "attribute_ruler"])
+        except OSError as e:
+            raise ValueError(f"spaCy model {model} is not installed: {e}")
+        if not self._nlp.vocab.vectors_length:
+            raise ValueError(f"spaCy model {model} has no word vectors")
+
+        self.dimensions = self._nlp.vocab.vectors_length
+        self.name = f"spacy-{Path(model).name}"
+
+    def encode(self, statements):
+        """Encode statements as L2-normalized float32 rows."""
+        vectors = np.array([doc.vector for doc in self._nlp.pipe(statements)], dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+
+class EmbeddingCache:
+    """
+    Persistent cache of statement embeddings.
+
+    Vectors live in one append-only file of fixed-size records (statement
+    digest, float32 vector) per encoder, memory-mapped for reads, so each
+    statement is embedded once across queries, restarts and worker
+    processes. Records are appended with single O_APPEND writes, so
+    processes sharing the file never interleave records.
+    """
+
+    def __init__(self, encoder, data_directory="data"):
+        """
+        Open (and create if needed) the cache of an encoder.
+
+        Args:
+            encoder (HashingEncoder or SpacyEncoder): Encoder of missing statements
+            data_directory (str): Directory holding the research data files
+        """
+        self.encoder = encoder
+        self.path = Path(data_directory) / EMBEDDINGS_DIRECTORY / f"{encoder.name}.vectors"
+        self.record = np.dtype([("key", f"V{KEY_BYTES}"), ("vector", "<f4", (encoder.dimensions,))])
+        self._rows = {}
+        self._count = 0
+        self._vectors = None
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._truncate_partial_record()
+        self._refresh()
+
+    def embed(self, statements):
+        """
+        Get the embeddings of statements, encoding those not cached yet.
+
+        Args:
+            statements (list): Statements to embed
+
+        Returns:
+            numpy.ndarray: float32 matrix with one row per statement
+        """
+        keys = [hashlib.blake2b(statement.encode("utf-8"), digest_size=KEY_BYTES).digest() for statement in statements]
+
+        with self._lock:
+            self._refresh()
+            missing = {key: statement for key, statement in zip(keys, statements) if key not in self._rows}
+            if missing:
+                self._append(list(missing), self.encoder.encode(list(missing.values())))
+                self._refresh()
+
+            rows = np.fromiter((self._rows[key] for key in keys), dtype=np.int64, count=len(keys))
+            if not len(rows):
+                return np.empty((0, self.encoder.dimensions), dtype=np.float32)
+            return np.asarray(self._vectors["vector"][rows])
+
+    def __len__(self):
+        """Number of cached statements."""
+        with self._lock:
+            return len(self._rows)
+
+    def _append(self, keys, vectors):
+        """Append records to the cache file in a single write."""
+        records = np.empty(len(keys), dtype=self.record)
+        records["key"] = np.frombuffer(b"".join(keys), dtype=f"V{KEY_BYTES}")
+        records["vector"] = vectors
+        descriptor = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(descriptor, records.tobytes())
+        finally:
+            os.close(descriptor)
+
+    def _refresh(self):
+        """Map records appended since the last refresh (by any process)."""
+        try:
+            count = self.path.stat().st_size // self.record.itemsize
+        except FileNotFoundError:
+            return
+        if count == self._count:
+            return
+
+        # Processes may append the same statement concurrently; the first record wins
+        self._vectors = np.memmap(self.path, dtype=self.record, mode="r", shape=(count,))
+        keys = self._vectors["key"][self._count:].tobytes()
+        for offset, row in enumerate(range(self._count, count)):
+            self._rows.setdefault(keys[offset * KEY_BYTES:(offset + 1) * KEY_BYTES], row)
+        self._count = count
+
+    def _truncate_partial_record(self):
+        """Drop a trailing partial record left by an interrupted write."""
+        try:
+            size = self.path.stat().st_size
+        except FileNotFoundError:
+            return
+        if size % self.record.itemsize:
+            logger.warning(f"Dropping a partial record at the end of {self.path}")
+            os.truncate(self.path, size - size % self.record.itemsize)
+
+
+def create_embedding_cache(backend, data_directory="data", model=None):
+    """
+    Create the embedding cache of a backend.
+
+    Args:
+        backend (str): One of EMBEDDING_BACKENDS
+        data_directory (str): Directory holding the research data files
+        model (str, optional): spaCy model for the "spacy" backend
+
+    Returns:
+        EmbeddingCache: The cache, or None for "tfidf"
+
+    Raises:
+        ValueError: If the backend is unknown or unavailable
+    """
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown embedding backend: {backend}")
+    if backend == "tfidf":
+        return None
+    encoder = HashingEncoder() if backend == "hashing" else SpacyEncoder(model or DEFAULT_SPACY_MODEL)
+    return EmbeddingCache(encoder, data_directory)
@@ -0,0 +1,501 @@
+import os
+import string
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from operator import methodcaller
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.linear_model import LogisticRegression
+from sklearn.utils import murmurhash3_32
+from utils.corpus import DATA_FILE_SUFFIXES, CorpusEntries
+
+logger = logging.getLogger(__name__)
+
+# Delimits tokens in the vocabulary text searched for indicators
+TOKEN_SEPARATOR = "\x00"
+
+# Job type classifiers; "trained" needs a model from `cli.py train-classifier`
+JOB_CLASSIFIERS = ("keyword", "trained")
+
+# Subdirectory of the data directory holding trained models
+MODELS_DIRECTORY = ".models"
+
+# File name of the trained model unless a path is given
+DEFAULT_MODEL_FILE = "job_types.npz"
+
+# Hashed feature dimensions and longest word n-gram of trained models
+HASHED_FEATURES = 2 ** 18
+MAX_NGRAM = 2
+
+# Characters stripped from tokens before they are hashed
+TOKEN_STRIP_CHARACTERS = string.punctuation + string.whitespace
+
+
+class KeywordClassifier:
+    """
+    Classify statements into job types by indicator substrings, in batch.
+
+    All documents (statement plus context) are split on spaces into one
+    sparse document-term matrix over their distinct tokens, and indicators
+    are looked up in that vocabulary instead of in every document: a word
+    occurs in the tokens containing it, and a phrase in runs of consecutive
+    tokens ending with its first word, equal to its middle words and
+    starting with its last one. The document-indicator counts are then
+    multiplied by an indicator-weight matrix with one column per job type.
+    A type is assigned when its score reaches the threshold, and documents
+    with no type get the default one, so unit weights and a threshold of 1
+    give exactly the "type if any indicator is a substring" rules.
+    """
+
+    def __init__(self, indicators, weights=None, threshold=1.0, default="functional"):
+        """
+        Compile the classifier.
+
+        Args:
+            indicators (dict): Job type to its indicator substrings
+            weights (dict, optional): Indicator to weight; 1 when omitted
+            threshold (float): Score a type needs to be assigned
+            default (str): Type of documents that reach no threshold
+        """
+        self.name = "keyword"
+        self.types = list(indicators)
+        self.threshold = threshold
+        self.default = default
+        self.indicators = list(dict.fromkeys(indicator for words in indicators.values() for indicator in words))
+        # Words of the indicators spanning several tokens, by column
+        self._phrases = {
+            column: indicator.split(" ") for column, indicator in enumerate(self.indicators) if " " in indicator
+        }
+
+        self.weights = np.zeros((len(self.indicators), len(self.types)), dtype=np.float32)
+        for type_index, job_type in enumerate(self.types):
+            for indicator in indicators[job_type]:
+                self.weights[self.indicators.index(indicator), type_index] = (weights or {}).get(indicator, 1.0)
+
+    def scores(self, statements, contexts):
+        """
+        Score documents by job type.
+
+        Args:
+            statements (list): Statements
+            contexts (list): Context of each statement
+
+        Returns:
+            numpy.ndarray: float32 matrix, one row per statement and one
+                column per type (in `self.types` order)
+        """
+        return np.asarray(self.indicator_matrix(statements, contexts) @ self.weights)
+
+    def predict(self, statements, contexts):
+        """
+        Classify statements.
+
+        Args:
+            statements (list): Statements
+            contexts (list): Context of each statement
+
+        Returns:
+            list: The job types of each statement, in `self.types` order
+        """
+        assigned = self.scores(statements, contexts) >= self.threshold
+        # Build the list of types once per distinct combination, as a bit set
+        combinations, rows = np.unique(assigned @ (1 << np.arange(len(self.types))), return_inverse=True)
+        types = [
+            [job_type for bit, job_type in enumerate(self.types) if combination >> bit & 1] or [self.default]
+            for combination in combinations.tolist()
+        ]
+        return [list(types[row]) for row in rows.tolist()]
+
+    def confidences(self, statements, contexts):
+        """
+        Share of each statement's indicator score per type.
+
+        Returns:
+            numpy.ndarray: Rows summing to 1, or 0 for statements without indicators
+        """
+        scores = self.scores(statements, contexts)
+        totals = scores.sum(axis=1, keepdims=True)
+        return scores / np.where(totals == 0, 1, totals)
+
+    def indicator_matrix(self, statements, contexts):
+        """
+        Count indicator occurrences per document.
+
+        Args:
+            statements (list): Statements
+            contexts (list): Context of each statement
+
+        Returns:
+            scipy.sparse.csr_matrix: Documents by indicators (`self.indicators` order)
+        """
+        tokens = _Tokens(statements, contexts)
+        codes, vocabulary, token_documents = tokens.codes, tokens.vocabulary, tokens.token_documents
+        lookup = _VocabularyLookup(vocabulary)
+
+        term_rows, term_columns = [], []
+        for column, indicator in enumerate(self.indicators):
+            if column not in self._phrases:
+                rows = lookup.containing(indicator)
+                term_rows.append(rows)
+                term_columns.append(np.full(len(rows), column))
+
+        # Runs of tokens spelling a phrase, within one document; only
+        # positions ending with a phrase's first word are followed up
+        first_words = {column: lookup.mask(lookup.ending(words[0])) for column, words in self._phrases.items()}
+        candidates = np.flatnonzero(np.logical_or.reduce(list(first_words.values()))[codes]) if first_words else []
+        phrase_rows, phrase_columns = [], []
+        for column, words in self._phrases.items():
+            span = len(words) - 1
+            positions = candidates[candidates < len(codes) - span]
+            positions = positions[first_words[column][codes[positions]]]
+            for offset, word in enumerate(words[1:-1], 1):
+                positions = positions[lookup.mask(lookup.equal(word))[codes[positions + offset]]]
+            positions = positions[lookup.mask(lookup.starting(words[-1]))[codes[positions + span]]]
+            positions = positions[token_documents[positions] == token_documents[positions + span]]
+
+            phrase_rows.append(token_documents[positions])
+            phrase_columns.append(np.full(len(positions), column))
+
+        term_indicators = _count_matrix(term_rows, term_columns, (len(vocabulary), len(self.indicators)))
+        phrase_indicators = _count_matrix(phrase_rows, phrase_columns, (len(tokens), len(self.indicators)))
+        return (tokens.document_terms() @ term_indicators + phrase_indicators).tocsr()
+
+
+class TrainedClassifier:
+    """
+    Classify statements into job types with a linear model on hashed word n-grams.
+
+    The model is a logistic regression trained offline on the `job_type`
+    labels of research entries (`cli.py train-classifier`) and stored as an
+    .npz file of its coefficients, read on first use. A batch is tokenized
+    once and each distinct n-gram hashed once, so scoring is a sparse
+    document-feature matrix times the coefficients. Unlike the keyword
+    rules it assigns one type per statement, the most probable.
+    """
+
+    def __init__(self, path):
+        """
+        Open a trained model; it is loaded on first prediction.
+
+        Args:
+            path (str): Path of the model file
+
+        Raises:
+            ValueError: If there is no model file
+        """
+        self.path = Path(path)
+        try:
+            stat = self.path.stat()
+        except OSError:
+            raise ValueError(f"No job type model at {self.path}; train one with `python cli.py train-classifier`")
+        # Names the model in statement store versions, so retraining starts a new store
+        self.name = "trained-" + hashlib.sha1(
+            f"{self.path.name}:{stat.st_size}:{stat.st_mtime_ns}".encode("utf-8")
+        ).hexdigest()[:12]
+        self._model = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def train(cls, statements, contexts, labels, path, n_features=HASHED_FEATURES, max_ngram=MAX_NGRAM,
+              regularization=1.0):
+        """
+        Train a model on labeled statements and save it.
+
+        Args:
+            statements (list): Statements
+            contexts (list): Context of each statement
+            labels (list): Job type of each statement
+            path (str): Path to write the model file to
+            n_features (int): Hashed feature dimensions
+            max_ngram (int): Longest word n-gram used as a feature
+            regularization (float): Inverse regularization strength (C)
+
+        Returns:
+            TrainedClassifier: The saved model
+
+        Raises:
+            ValueError: If the labels have fewer than two job types, or
+                max_ngram is below 1
+        """
+        if max_ngram < 1:
+            raise ValueError(f"max_ngram must be at least 1, got {max_ngram}")
+        tokens = _Tokens(statements, contexts)
+        documents, features = _hashed_ngrams(tokens, n_features, max_ngram)
+        features = _count_matrix([documents], [features], (len(tokens), n_features))
+        model = LogisticRegression(C=regularization, max_iter=1000).fit(features, labels)
+
+        # Binary models have one row of coefficients, for the second class
+        coefficients, intercepts = model.coef_, model.intercept_
+        if len(model.classes_) == 2:
+            coefficients = np.vstack([np.zeros_like(coefficients), coefficients])
+            intercepts = np.concatenate([[0.0], intercepts])
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary_path = path.with_name(path.name + ".tmp")
+        with open(temporary_path, "wb") as file:
+            np.savez_compressed(
+                file, types=np.array(model.classes_, dtype=str), coefficients=coefficients.astype(np.float32),
+                intercepts=intercepts.astype(np.float32), n_features=n_features, max_ngram=max_ngram
+            )
+        os.replace(temporary_path, path)
+        logger.info(f"Saved job type model trained on {len(labels)} statements to {path}")
+        return cls(path)
+
+    @property
+    def types(self):
+        """Job types the model assigns."""
+        return self._load()["types"]
+
+    def scores(self, statements, contexts):
+        """
+        Score documents by job type.
+
+        Returns:
+            numpy.ndarray: Decision values, one row per statement and one
+                column per type (in `self.types` order)
+        """
+        model = self._load()
+        tokens = _Tokens(statements, contexts)
+        documents, features = _hashed_ngrams(tokens, model["n_features"], model["max_ngram"])
+
+        # Sum the coefficients of each document's n-grams, one type at a time
+        scores = np.column_stack([
+            np.bincount(documents, weights=coefficients[features], minlength=len(tokens))
+            for coefficients in model["coefficients"]
+        ]) if len(tokens) else np.empty((0, len(model["types"])))
+        return scores + model["intercepts"]
+
+    def predict(self, statements, contexts):
+        """
+        Classify statements.
+
+        Args:
+            statements (list): Statements
+            contexts (list): Context of each statement
+
+        Returns:
+            list: The most probable job type of each statement, as a one-item list
+        """
+        types = self.types
+        return [[types[best]] for best in np.argmax(self.scores(statements, contexts), axis=1).tolist()]
+
+    def confidences(self, statements, contexts):
+        """
+        Probability of each type per statement.
+
+        Returns:
+            numpy.ndarray: Rows summing to 1
+        """
+        scores = self.scores(statements, contexts)
+        probabilities = np.exp(scores - scores.max(axis=1, keepdims=True))
+        return probabilities / probabilities.sum(axis=1, keepdims=True)
+
+    def _load(self):
+        """Read the model file on first use."""
+        with self._lock:
+            if self._model is None:
+                with np.load(self.path, allow_pickle=False) as arrays:
+                    self._model = {
+                        "types": arrays["types"].tolist(),
+                        "coefficients": arrays["coefficients"],
+                        "intercepts": arrays["intercepts"],
+                        "n_features": int(arrays["n_features"]),
+                        "max_ngram": int(arrays["max_ngram"])
+                    }
+                logger.info(f"Loaded job type model from {self.path}")
+            return self._model
+
+
+def create_job_classifier(kind, data_directory="data", path=None):
+    """
+    Create a job type classifier.
+
+    Args:
+        kind (str): One of JOB_CLASSIFIERS
+        data_directory (str): Directory holding the research data files
+        path (str, optional): Model file of the "trained" classifier
+
+    Returns:
+        TrainedClassifier: The classifier, or None for "keyword" (the
+            agent's keyword rules)
+
+    Raises:
+        ValueError: If the kind is unknown or the model is missing
+    """
+    if kind not in JOB_CLASSIFIERS:
+        raise ValueError(f"Unknown job classifier: {kind}")
+    if kind == "keyword":
+        return None
+    return TrainedClassifier(path or Path(data_directory) / MODELS_DIRECTORY / DEFAULT_MODEL_FILE)
+
+
+def read_labeled_entries(data_directory="data"):
+    """
+    Collect the entries of every data file that have a job type label.
+
+    Args:
+        data_directory (str): Directory holding the research data files
+
+    Returns:
+        tuple: (statements, contexts, labels) lists
+    """
+    data_files = sorted(path for path in Path(data_directory).glob("*") if path.suffix in DATA_FILE_SUFFIXES)
+    statements, contexts, labels = [], [], []
+    for entry in CorpusEntries(data_files):
+        if entry.get("job_type"):
+            statements.append(entry.get("statement", ""))
+            contexts.append(entry.get("context", ""))
+            labels.append(entry["job_type"])
+    return statements, contexts, labels
+
+
+def holdout_split(count, holdout=0.2, seed=42):
+    """
+    Split entry indices into a training and a held-out set.
+
+    Returns:
+        tuple: (training indices, held-out indices)
+    """
+    order = np.random.default_rng(seed).permutation(count)
+    held_out = int(count * holdout)
+    return np.sort(order[held_out:]), np.sort(order[:held_out])
+
+
+def evaluate_classifier(classifier, statements, contexts, labels):
+    """
+    Compare a classifier's job types with labels.
+
+    Returns:
+        dict: "accuracy" (share of statements whose types are exactly the
+            label) and "recall" (share whose types include the label)
+    """
+    predictions = classifier.predict(statements, contexts)
+    count = max(len(labels), 1)
+    return {
+        "accuracy": sum(types == [label] for types, label in zip(predictions, labels)) / count,
+        "recall": sum(label in types for types, label in zip(predictions, labels)) / count
+    }
+
+
+class _Tokens:
+    """The space-separated tokens of a batch of documents (statement plus context, lowercased)."""
+
+    def __init__(self, statements, contexts):
+        # The lookup separator never occurs in indicators, so replacing it changes no match
+        documents = [
+            (statement.lower() + " " + context.lower()).replace(TOKEN_SEPARATOR, "\x01")
+            for statement, context in zip(statements, contexts)
+        ]
+        self.size = len(documents)
+
+        # Joining on a space keeps the tokens of each document apart
+        tokens = " ".join(documents).split(" ") if documents else []
+        self.codes, self.vocabulary = pd.factorize(np.array(tokens, dtype=object))
+        self.token_documents = np.repeat(
+            np.arange(self.size),
+            np.fromiter(map(methodcaller("count", " "), documents), dtype=np.int64, count=self.size) + 1
+        )
+
+    def __len__(self):
+        """Number of documents."""
+        return self.size
+
+    def document_terms(self):
+        """Sparse documents by vocabulary matrix of token counts."""
+        return sparse.csr_matrix(
+            (np.ones(len(self.codes), dtype=np.float32), (self.token_documents, self.codes)),
+            shape=(self.size, len(self.vocabulary))
+        )
+
+
+class _VocabularyLookup:
+    """Find the tokens of a vocabulary by substring, prefix, suffix or equality."""
+
+    def __init__(self, vocabulary):
+        self.size = len(vocabulary)
+        # Every token sits between two separators, found by plain substring search
+        self.text = TOKEN_SEPARATOR + TOKEN_SEPARATOR.join(vocabulary) + TOKEN_SEPARATOR
+        lengths = np.fromiter(map(len, vocabulary), dtype=np.int64, count=self.size)
+        self.separators = np.concatenate([[0], np.cumsum(lengths + 1)])
+
+    def containing(self, substring):
+        """Rows of the tokens containing `substring`."""
+        return self._rows(substring)
+
+    def starting(self, prefix):
+        """Rows of the tokens starting with `prefix`."""
+        return self._rows(TOKEN_SEPARATOR + prefix)
+
+    def ending(self, suffix):
+        """Rows of the tokens ending with `suffix`."""
+        return self._rows(suffix + TOKEN_SEPARATOR, anchor=len(suffix), shift=-1)
+
+    def equal(self, word):
+        """Row of the token equal to `word`, if any."""
+        return self._rows(TOKEN_SEPARATOR + word + TOKEN_SEPARATOR)
+
+    def mask(self, rows):
+        """Boolean mask over the vocabulary of `rows`."""
+        mask = np.zeros(self.size, dtype=bool)
+        mask[rows] = True
+        return mask
+
+    def _rows(self, pattern, anchor=0, shift=0):
+        """
+        Rows of the tokens matching a pattern, located by the character
+        `anchor` characters into each match (a separator stands for the
+        token after it) and moved by `shift` rows.
+        """
+        positions = []
+        position = self.text.find(pattern)
+        while position != -1:
+            positions.append(position + anchor)
+            position = self.text.find(pattern, position + 1)
+        rows = np.searchsorted(self.separators, np.array(positions, dtype=np.int64), side="right") - 1 + shift
+        return np.unique(rows[(rows >= 0) & (rows < self.size)])
+
+
+def _hashed_ngrams(tokens, n_features, max_ngram):
+    """
+    Hash the word n-grams of each document.
+
+    Tokens are stripped of punctuation and dropped when nothing is left;
+    each distinct token and n-gram is hashed once per batch.
+
+    Returns:
+        tuple: (document, hashed feature) arrays with one item per n-gram occurrence
+    """
+    words = np.array([token.strip(TOKEN_STRIP_CHARACTERS) for token in tokens.vocabulary], dtype=object)
+    kept = (words != "")[tokens.codes] if len(words) else np.zeros(0, dtype=bool)
+    codes, documents = tokens.codes[kept], tokens.token_documents[kept]
+
+    rows, columns = [], []
+    grams, gram_words = codes, words
+    for n in range(1, max_ngram + 1):
+        if n > 1:
+            # Extend each (n-1)-gram with the next word, as codes of the distinct n-grams
+            grams, distinct = pd.factorize(grams[:-1] * len(words) + codes[n - 1:])
+            gram_words = np.array(
+                [gram_words[combined // len(words)] + " " + words[combined % len(words)] for combined in distinct],
+                dtype=object
+            )
+        hashes = np.fromiter(
+            (murmurhash3_32(gram, positive=True) % n_features for gram in gram_words), dtype=np.int64,
+            count=len(gram_words)
+        )
+        within = documents[:len(grams)] == documents[n - 1:]
+        rows.append(documents[:len(grams)][within])
+        columns.append(hashes[grams[within]])
+
+    return np.concatenate(rows), np.concatenate(columns)
+
+
+def _count_matrix(rows, columns, shape):
+    """Sparse matrix counting each (row, column) pair of the concatenated arrays."""
+    rows = np.concatenate(rows) if rows else np.empty(0, dtype=np.int64)
+    columns = np.concatenate(columns) if columns else np.empty(0, dtype=np.int64)
+    return sparse.csr_matrix((np.ones(len(rows), dtype=np.float32), (rows, columns)), shape=shape)
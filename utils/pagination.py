@@ -0,0 +1,172 @@
+import base64
+import binascii
+import json
+import logging
+from agents.jtbd_agent import JOB_LIST_FIELDS
+
+logger = logging.getLogger(__name__)
+
+
+def paginate_response(response, limit=None, cursor=None, job_refs=False):
+    """
+    Paginate the analysis contained in a system response.
+
+    Handles both a bare analysis (complete route) and a response wrapping
+    one under "jtbd_analysis" (partial route). Research plans are returned
+    unchanged.
+
+    Args:
+        response (dict): Response from JTBDMultiAgentSystem.process_query
+        limit (int, optional): Maximum number of jobs per job list
+        cursor (str, optional): Cursor returned by a previous page
+        job_refs (bool): Whether to reference jobs by id instead of embedding them
+
+    Returns:
+        dict: The paginated response
+    """
+    if "jtbd_analysis" in response:
+        return {
+            **response,
+            "jtbd_analysis": paginate_analysis(response["jtbd_analysis"], limit, cursor, job_refs)
+        }
+
+    if "analysis_type" in response:
+        return paginate_analysis(response, limit, cursor, job_refs)
+
+    return response
+
+
+def paginate_analysis(analysis, limit=None, cursor=None, job_refs=False):
+    """
+    Paginate the job lists of an analysis.
+
+    Each job type list is paged independently using offsets carried in a
+    single opaque cursor. Theme job lists are trimmed to the `limit`
+    highest-frequency jobs; their full size is still given by "job_count".
+    With `job_refs`, job lists hold job ids and each job on the page is
+    included once in a top-level "jobs" mapping.
+
+    Args:
+        analysis (dict): A JTBD analysis
+        limit (int, optional): Maximum number of jobs per job list
+        cursor (str, optional): Cursor returned by a previous page
+        job_refs (bool): Whether to reference jobs by id instead of embedding them
+
+    Returns:
+        dict: The paginated analysis
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    if "error" in analysis:
+        return analysis
+
+    offsets = decode_cursor(cursor) if cursor else {}
+    referenced_jobs = {}
+
+    paged = dict(analysis)
+    pagination = {}
+    next_offsets = {}
+    has_more = False
+
+    for field in JOB_LIST_FIELDS:
+        if field not in analysis:
+            continue
+
+        jobs = analysis[field]
+        start = min(offsets.get(field, 0), len(jobs))
+        end = min(start + limit, len(jobs)) if limit else len(jobs)
+
+        paged[field] = _page_jobs(jobs[start:end], referenced_jobs, job_refs)
+        pagination[field] = {
+            "offset": start,
+            "count": end - start,
+            "total": len(jobs)
+        }
+
+        next_offsets[field] = end
+        has_more = has_more or end < len(jobs)
+
+    if "themes" in analysis:
+        paged["themes"] = []
+        for theme in analysis["themes"]:
+            theme_jobs = theme.get("jobs", [])
+            if limit:
+                theme_jobs = sorted(theme_jobs, key=lambda x: x["frequency"], reverse=True)[:limit]
+
+            paged["themes"].append({
+                **theme,
+                "jobs": _page_jobs(theme_jobs, referenced_jobs, job_refs)
+            })
+
+    if job_refs:
+        paged["jobs"] = referenced_jobs
+
+    if limit or cursor:
+        pagination["next_cursor"] = encode_cursor(next_offsets) if has_more else None
+        paged["pagination"] = pagination
+
+    return paged
+
+
+def _page_jobs(jobs, referenced_jobs, job_refs):
+    """
+    Return a page of jobs, either embedded or as id references.
+
+    Args:
+        jobs (list): The jobs on the page
+        referenced_jobs (dict): Mapping of id to job, updated with referenced jobs
+        job_refs (bool): Whether to return id references
+
+    Returns:
+        list: Jobs or job ids
+    """
+    if not job_refs:
+        return jobs
+
+    for job in jobs:
+        referenced_jobs[job["id"]] = job
+
+    return [job["id"] for job in jobs]
+
+
+def encode_cursor(offsets):
+    """
+    Encode per-list offsets as an opaque cursor string.
+
+    Args:
+        offsets (dict): Mapping of job list field to the next offset
+
+    Returns:
+        str: URL-safe cursor
+    """
+    raw = json.dumps(offsets, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor produced by `encode_cursor`.
+
+    Args:
+        cursor (str): The cursor string
+
+    Returns:
+        dict: Mapping of job list field to offset
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        offsets = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, binascii.Error, UnicodeEncodeError):
+        raise ValueError("Invalid pagination cursor")
+
+    if not isinstance(offsets, dict) or not all(
+        field in JOB_LIST_FIELDS and isinstance(offset, int) and offset >= 0
+        for field, offset in offsets.items()
+    ):
+        raise ValueError("Invalid pagination cursor")
+
+    return offsets
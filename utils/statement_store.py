@@ -0,0 +1,169 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+from itertools import islice
+from pathlib import Path
+from services.metrics import CACHE_REQUESTS, current_timings
+
+logger = logging.getLogger(__name__)
+
+# Subdirectory of the data directory holding statement stores
+STATEMENTS_DIRECTORY = ".statements"
+
+# Bytes of the digest addressing a statement and its context
+KEY_BYTES = 16
+
+# Entries looked up, and their new statements analyzed, together
+RESOLVE_BATCH_SIZE = 4096
+
+
+def statement_key(statement, context=""):
+    """
+    Content address of a statement in its context.
+
+    Args:
+        statement (str): The statement
+        context (str): Context the statement was given in
+
+    Returns:
+        bytes: blake2b digest of KEY_BYTES bytes
+    """
+    return hashlib.blake2b(f"{statement}\x1f{context}".encode("utf-8"), digest_size=KEY_BYTES).digest()
+
+
+class StatementStore:
+    """
+    Global content-addressed store of per-statement analysis.
+
+    Maps the digest of a statement and its context to the normalized
+    statement and its job types, so the work is done once per distinct
+    statement no matter how many topics, files or queries contain it.
+    Statement vectors are kept by the EmbeddingCache, content-addressed too.
+    Records are appended to a JSON Lines file named after the version of
+    the rules that produced them, so changing the rules starts afresh.
+    """
+
+    def __init__(self, data_directory="data", version="default"):
+        """
+        Initialize the store; the file is read on first use.
+
+        Args:
+            data_directory (str): Directory holding the research data files
+            version (str): Version of the normalization and classification rules
+        """
+        self.path = Path(data_directory) / STATEMENTS_DIRECTORY / f"statements-{version}.jsonl"
+        self.hits = 0
+        self.misses = 0
+        self._records = None
+        self._types = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, entries, analyze, batch_size=RESOLVE_BATCH_SIZE):
+        """
+        Pair research entries with their statement's analysis.
+
+        Entries are consumed lazily, in batches, so streamed corpora work
+        too; the statements of a batch missing from the store are analyzed
+        with one call. New analyses are written to disk when the iteration ends.
+
+        Args:
+            entries (iterable): Research entries with "statement" and "context"
+            analyze (callable): Maps lists of statements and of their contexts
+                to a list of (normalized statement, list of job types), for
+                statements not stored yet
+            batch_size (int): Entries looked up per batch
+
+        Yields:
+            tuple: (entry, (normalized statement, tuple of job types))
+        """
+        records = self._load()
+        added = {}
+        hits = misses = 0
+        entries = iter(entries)
+
+        try:
+            for batch in iter(lambda: list(islice(entries, batch_size)), []):
+                keys = [statement_key(entry.get("statement", ""), entry.get("context", "")) for entry in batch]
+
+                missing = {}
+                for key, entry in zip(keys, batch):
+                    if key in records or key in added or key in missing:
+                        hits += 1
+                    else:
+                        missing[key] = entry
+                        misses += 1
+
+                if missing:
+                    analyses = analyze(
+                        [entry.get("statement", "") for entry in missing.values()],
+                        [entry.get("context", "") for entry in missing.values()]
+                    )
+                    for key, (normalized, job_types) in zip(missing, analyses):
+                        added[key] = (normalized, self._types.setdefault(tuple(job_types), tuple(job_types)))
+
+                for key, entry in zip(keys, batch):
+                    record = records.get(key)
+                    yield entry, record if record is not None else added[key]
+        finally:
+            self._record(added, hits, misses)
+
+    def hit_ratio(self):
+        """Share of lookups served from the store since it was created, or None before any."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else None
+
+    def __len__(self):
+        """Number of stored statements."""
+        return len(self._load())
+
+    def _load(self):
+        """Read the store file on first use."""
+        with self._lock:
+            if self._records is None:
+                self._records = {}
+                try:
+                    with open(self.path, "r") as file:
+                        for line in file:
+                            try:
+                                record = json.loads(line)
+                            except ValueError:
+                                continue  # Partial line of an interrupted write
+                            job_types = tuple(record["t"])
+                            self._records[bytes.fromhex(record["k"])] = (
+                                record["n"], self._types.setdefault(job_types, job_types)
+                            )
+                except FileNotFoundError:
+                    pass
+            return self._records
+
+    def _record(self, added, hits, misses):
+        """Store new analyses, append them to the file and count the lookups."""
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+            added = {key: record for key, record in added.items() if key not in self._records}
+            self._records.update(added)
+
+            if added:
+                lines = "".join(
+                    json.dumps({"k": key.hex(), "n": normalized, "t": list(job_types)}) + "\n"
+                    for key, (normalized, job_types) in added.items()
+                )
+                try:
+                    self.path.parent.mkdir(exist_ok=True)
+                    # One O_APPEND write, so processes sharing the file never interleave lines
+                    descriptor = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+                    try:
+                        os.write(descriptor, lines.encode("utf-8"))
+                    finally:
+                        os.close(descriptor)
+                except OSError as e:
+                    logger.warning(f"Could not persist statements to {self.path}: {e}")
+
+        CACHE_REQUESTS.inc(hits, cache="statements", result="hit")
+        CACHE_REQUESTS.inc(misses, cache="statements", result="miss")
+        timings = current_timings()
+        if timings is not None and hits + misses:
+            timings.notes["statement_hit_ratio"] = round(hits / (hits + misses), 4)